@@ -1,37 +1,73 @@
-from mesa import Agent
-import statistics
-import numpy as np 
+import numpy as np
+from array import array
+from strategy import compile_strategy, GRIP_OK, GRIP_WET_WRONG_TYRE, GRIP_DRY_WRONG_TYRE
+from lap_stats import LapStats
+from race_events import LAP_COMPLETED, MOM_GRANTED, PIT_ENTRY, PIT_EXIT, TYRE_CLIFF, RACE_END
 
 # --- Define tyre types ---
 DRY_TYRES = ["soft", "medium", "hard"]
 WET_TYRES = ["intermediate"]
 
-class F1Agent(Agent):
+# --- Integer status codes (telemetry recorder, vector engine) ---
+STATUS_NAMES = ["RACING", "PITTING", "FINISHED", "OUT_OF_ENERGY", "CRASHED"]
+STATUS_CODES = {name: code for code, name in enumerate(STATUS_NAMES)}
+
+class F1Agent:
     """
     An agent representing a single 2026 F1 car.
     (Pro++: "Universal Brain" - Can run random or map-based logic)
+
+    Plain __slots__ class (no Mesa Agent base, no per-car __dict__): the
+    model steps its cars itself, and large grids / many finished races are
+    dominated by per-object overhead. Lap times are a compact array('d').
     """
 
-    def __init__(self, unique_id, model, strategy_config):
+    __slots__ = (
+        'unique_id', 'model', 'strategy', 'params', 'team',
+        # Physics / race state
+        'position', 'velocity', 'status', 'car_ahead', 'gap_ahead', 'laps_completed',
+        'total_distance_traveled', 'total_race_time_s', 'lap_times', 'lap_stats',
+        # Power unit, aero & MOM
+        'battery_capacity_mj', 'battery_soc', 'fuel_energy_remaining', 'energy_recovered_this_lap_mj',
+        'aero_mode', 'mom_available', 'mom_active',
+        # Tyres, pits, stats
+        'tyre_compound', 'tyre_life_remaining', 'tyre_grip_modifier', 'on_cliff', 'tyre_temp',
+        'wants_to_pit', 'time_in_pit_stall', 'pit_stops_made',
+        'time_on_softs_s', 'time_on_mediums_s', 'time_on_hards_s', 'mom_uses_count',
+        # Telemetry
+        'telemetry_id', 'plank_wear', 'acceleration_g',
+        'plank_wear_rate_factor', 'tyre_pressure_factor', 'acceleration_g_factor',
+    )
+
+    def __init__(self, unique_id, model, strategy_config, params=None):
         self.unique_id = unique_id
         self.model = model
         self.strategy = strategy_config
+        self.team = None
+        # Compiled, validated view of strategy_config that the per-tick code reads
+        self.params = params if params is not None else compile_strategy(
+            strategy_config, model.compiled_track, model.time_step)
         
         # --- Physics ---
-        self.position = ("n_t15_apex", 0.0) 
+        # (node_id, progress) on the model's compiled track; model.build_grid puts the
+        # car on its grid slot (BatchEngine's cars are built without a model)
+        self.position = (model.compiled_track.pit_fork_node, 0.0) if model is not None else None
         self.velocity = 0.0 
         self.status = "RACING"
         
         # --- Race State ---
+        self.car_ahead = None
+        self.gap_ahead = float('inf')
         self.laps_completed = 0
         self.total_distance_traveled = 0.0
         self.total_race_time_s = 0.0
-        self.lap_times = []
+        self.lap_times = array('d')
+        self.lap_stats = LapStats() # running last/fastest/average, sectors, gaps
         
         # --- Power Unit ---
-        self.battery_capacity_mj = self.strategy['battery_capacity_mj']
+        self.battery_capacity_mj = self.params.battery_capacity_mj
         self.battery_soc = 1.0 
-        self.fuel_energy_remaining = self.strategy['fuel_tank_mj']
+        self.fuel_energy_remaining = self.params.fuel_tank_mj
         self.energy_recovered_this_lap_mj = 0.0 
         
         # --- Aero & MOM ---
@@ -58,12 +94,12 @@ class F1Agent(Agent):
         self.mom_uses_count = 0
         
         # --- FINAL TELEMETRY ---
-        self.telemetry_history = []
+        self.telemetry_id = 0 # Driver code in the model's TelemetryRecorder
         self.plank_wear = 0.0
         self.acceleration_g = 0.0 # <-- RESTORED
-        self.plank_wear_rate_factor = self.strategy.get('plank_wear_factor', 1.0)
-        self.tyre_pressure_factor = self.strategy.get('tyre_pressure_factor', 1.0)
-        self.acceleration_g_factor = self.strategy.get('g_factor', 1.0) # <-- RESTORED FACTOR
+        self.plank_wear_rate_factor = self.params.plank_wear_factor
+        self.tyre_pressure_factor = self.params.tyre_pressure_factor
+        self.acceleration_g_factor = self.params.g_factor # <-- RESTORED FACTOR
         # --- END FINAL TELEMETRY ---
 
     def step(self):
@@ -75,51 +111,35 @@ class F1Agent(Agent):
         """Agent gathers information and makes high-level strategy decisions."""
         if self.status == "FINISHED": return
 
-        # 1. Find car ahead
-        agent_in_front = None
-        min_gap = float('inf')
-        for other in self.model.f1_agents:
-            if other.unique_id == self.unique_id: continue
-            gap = other.total_distance_traveled - self.total_distance_traveled
-            if gap < -self.model.track_length / 2: gap += self.model.track_length
-            if 0 < gap < min_gap:
-                min_gap = gap
-                agent_in_front = other
+        # 1. Car ahead (ranked once per tick by DeltaVModel.update_running_order)
+        agent_in_front = self.car_ahead
+        min_gap = self.gap_ahead
 
         # 2. Check MOM Detection
+        track = self.model.compiled_track
         current_node = self.position[0]
-        successors = list(self.model.track.successors(current_node))
-        if not successors: return
+        if track.first_edge[current_node] < 0: return
         
-        main_track_edge = None
-        for succ in successors:
-             if not self.model.track.get_edge_data(current_node, succ).get('is_pit_lane', False):
-                main_track_edge = self.model.track.get_edge_data(current_node, succ)
-                break
-        
-        if main_track_edge:
-            is_detection_point = main_track_edge.get('mom_detection', False)
-            if is_detection_point and agent_in_front and (min_gap < self.strategy.get("mom_detection_gap", 10.0)):
+        main_track_edge = track.main_edge[current_node]
+        if main_track_edge >= 0:
+            is_detection_point = track.mom_detection[main_track_edge]
+            if is_detection_point and agent_in_front and (min_gap < self.params.mom_detection_gap):
                 if not self.mom_available: 
-                    print(f"--- AGENT {self.unique_id} GOT MOM! (Gap: {min_gap:.1f}m) ---")
+                    self.model.events.emit(MOM_GRANTED, self.model.env.now, self.unique_id,
+                                           self.laps_completed + 1, gap_m=min_gap)
                     # Grant the 0.5 MJ of extra energy
-                    self.battery_soc += (self.strategy.get('mom_extra_energy_mj', 0.5) / self.battery_capacity_mj)
+                    self.battery_soc += self.params.mom_extra_soc
                     if self.battery_soc > 1.0: self.battery_soc = 1.0
                 self.mom_available = True
         
         # 3. Check Pit Decision
-        next_node_for_decision = self.get_next_node_from_successors(force_track=True)
-        if not next_node_for_decision: return
-        
-        edge_data = self.model.track.get_edge_data(current_node, next_node_for_decision)
-        if edge_data:
-            is_pit_decision_point = edge_data.get('is_pit_entry_decision', False)
+        decision_edge = self.get_next_edge(force_track=True)
+        if decision_edge >= 0:
+            is_pit_decision_point = track.is_pit_entry_decision[decision_edge]
             if is_pit_decision_point:
                 
                 # Check for "emergency" reasons to pit
-                PIT_CLIFF_THRESHOLD = self.strategy.get('pit_tyre_cliff_threshold', 0.10)
-                
-                tyre_worn_out = (self.tyre_life_remaining <= PIT_CLIFF_THRESHOLD)
+                tyre_worn_out = (self.tyre_life_remaining <= self.params.cliff_threshold)
                 
                 is_on_dry_tyres = self.tyre_compound in DRY_TYRES
                 is_wet = (self.model.weather_state == "WET")
@@ -130,30 +150,17 @@ class F1Agent(Agent):
                 can_pit = (self.laps_completed > 0) # Can pit anytime after lap 0
 
                 if can_pit and should_pit and self.status == "RACING":
+                    if not self.wants_to_pit: # once per stop, not every tick on the decision edge
+                        self.model.events.emit(PIT_ENTRY, self.model.env.now, self.unique_id, self.laps_completed + 1,
+                                               reason="wrong_tyres" if wrong_tyre_for_conditions else "tyre_wear",
+                                               tyre_life=self.tyre_life_remaining, weather=self.model.weather_state)
                     self.wants_to_pit = True
-                    if wrong_tyre_for_conditions:
-                        print(f"--- AGENT {self.unique_id} PITS FOR WRONG TYRES! (Weather: {self.model.weather_state}) ---")
-                    else:
-                        print(f"--- AGENT {self.unique_id} DECIDES TO PIT! (Tyre: {self.tyre_life_remaining*100:.0f}%) ---")
                 else:
                     self.wants_to_pit = False
 
-    def get_next_node_from_successors(self, force_track=False):
-        current_node = self.position[0]
-        successors = list(self.model.track.successors(current_node))
-        if not successors: return None
-        if force_track or (not self.wants_to_pit and current_node == "n_t15_apex"):
-             for succ in successors:
-                if not self.model.track.get_edge_data(current_node, succ).get('is_pit_lane', False):
-                    return succ
-        elif self.wants_to_pit and current_node == "n_t15_apex":
-            for succ in successors:
-                if self.model.track.get_edge_data(current_node, succ).get('is_pit_lane', False):
-                    return succ 
-        
-        if successors:
-            return successors[0]
-        return None
+    def get_next_edge(self, force_track=False):
+        """Edge ID the car drives next from its current node (-1 at a dead end)."""
+        return self.model.compiled_track.next_edge(self.position[0], self.wants_to_pit, force_track)
 
     def make_decision(self):
         """Agent's "brain" decides velocity, aero, and path (track vs. pits)."""
@@ -165,8 +172,9 @@ class F1Agent(Agent):
             self.mom_active = False
             return
         
+        params = self.params
         if self.model.vsc_active:
-            self.velocity = self.strategy['vsc_speed']
+            self.velocity = params.vsc_speed
             self.aero_mode = "Z-MODE"
             self.mom_active = False
             return
@@ -174,107 +182,70 @@ class F1Agent(Agent):
         # --- REMOVED RANDOMNESS: Driver Error Check Removed ---
             
         # --- 2. Get current track/pit segment data ---
+        track = self.model.compiled_track
         current_node = self.position[0]
-        next_node = self.get_next_node_from_successors()
+        next_edge = self.get_next_edge()
         
-        if current_node == "n_pit_stall":
+        if current_node == track.pit_stall_node:
             self.velocity = 0 
             self.mom_active = False
             self.aero_mode = "Z-MODE"
             return 
         
-        if next_node is None:
+        if next_edge < 0:
             self.velocity = 0
             self.mom_active = False
             self.status = "FINISHED"
             return
         
-        if self.wants_to_pit and current_node == "n_t15_apex":
+        if self.wants_to_pit and current_node == track.pit_fork_node:
             self.status = "PITTING"
 
-        # --- 3. GET EDGE DATA FOR OUR CHOSEN PATH ---
-        edge_data = self.model.track.get_edge_data(current_node, next_node)
-        
-        # --- 4. DYNAMIC PHYSICS & AERO LOGIC ---
-        track_radius = edge_data.get('radius') 
-        
-        standard_top_speed_ms = self.strategy['standard_top_speed_kph'] / 3.6
-        taper_speed_ms = self.strategy.get('electric_motor_taper_kph', 290.0) / 3.6
-        
-        if edge_data.get('is_pit_lane', False):
-            base_velocity = self.strategy['vsc_speed']
-            self.aero_mode = "Z-MODE"
-        
-        elif track_radius is None:
-            self.aero_mode = "X-MODE"
-            base_velocity = standard_top_speed_ms
-            
+        # --- 3. TARGET SPEED AND AERO: DECISION TABLE LOOKUP ---
+        # Pit lane, straight and corner speeds (grip x radius, top speed and
+        # taper caps) are precomputed per edge in params.speed_rows; the row
+        # follows the cliff and the weather / tyre match, so weather flips,
+        # pit stops and cliffs simply select another row.
+        if self.model.weather_state == "WET":
+            grip_state = GRIP_WET_WRONG_TYRE if self.tyre_compound in DRY_TYRES else GRIP_OK
         else:
-            self.aero_mode = "Z-MODE"
-            
-            # --- Weather Grip Modifier ---
-            weather_grip_modifier = 1.0
-            is_wet = (self.model.weather_state == "WET")
-            is_on_dry_tyres = self.tyre_compound in DRY_TYRES
-            
-            if is_wet and is_on_dry_tyres:
-                weather_grip_modifier = self.strategy.get('grip_modifier_wet_wrong_tyre', 0.5)
-            elif not is_wet and not is_on_dry_tyres:
-                weather_grip_modifier = self.strategy.get('grip_modifier_dry_wrong_tyre', 0.7)
-            # --- End Weather Grip ---
-                
-            # Combine base grip, wear grip, and weather grip
-            grip = self.strategy['grip_factor'] * self.tyre_grip_modifier * weather_grip_modifier
-            
-            if track_radius <= 0: base_velocity = 0
-            else: base_velocity = (grip * track_radius) ** 0.5
-            
-            if base_velocity > standard_top_speed_ms:
-                base_velocity = standard_top_speed_ms
-        
-        # --- 5. "UNIVERSAL BRAIN" MOM LOGIC ---
-        self.mom_active = False
-        x_mode_allowed = edge_data.get('x_mode_allowed', False)
-        should_activate_mom = False # Flag to decide
+            grip_state = GRIP_OK if self.tyre_compound in DRY_TYRES else GRIP_DRY_WRONG_TYRE
+        base_velocity = params.speed_rows[(3 if self.on_cliff else 0) + grip_state][next_edge]
+        self.aero_mode = track.aero_mode[next_edge]
 
-        # --- "Pro++" LOGIC (Energy Map) ---
-        if "energy_deployment_map" in self.strategy:
-            energy_map = self.strategy.get("energy_deployment_map", {})
-            command = energy_map.get(current_node, "STANDARD")
+        # --- 4. "UNIVERSAL BRAIN" MOM LOGIC ---
+        self.mom_active = False
 
-            if command == "DEPLOY" and self.mom_available and x_mode_allowed and (not edge_data.get('is_pit_lane', False)):
-                should_activate_mom = True
-        
-        # --- "Pro+" LOGIC (Random Aggressiveness) ---
-        elif "mom_aggressiveness" in self.strategy:
-            # We keep this logic, but aggression is now *deterministic*
-            if self.mom_available and x_mode_allowed and (not edge_data.get('is_pit_lane', False)) and (0.5 < self.strategy['mom_aggressiveness']):
-                should_activate_mom = True
+        # "Pro++" energy map (DEPLOY nodes) or deterministic "Pro+" aggressiveness,
+        # both resolved per node ID by CompiledStrategy
+        should_activate_mom = (params.deploy_at[current_node] and self.mom_available
+                               and track.x_mode_allowed[next_edge] and (not track.is_pit_lane[next_edge]))
 
         # --- EXECUTE DECISION ---
         if should_activate_mom:
-            self.velocity = self.strategy['mom_boost_speed_kph'] / 3.6 # 337 kph
+            self.velocity = params.mom_boost_ms # 337 kph
             self.mom_active = True
             self.mom_uses_count += 1 
         else:
             self.velocity = base_velocity
-            if self.velocity > taper_speed_ms:
-                self.velocity = taper_speed_ms
 
 
     def update_physics(self):
         """Agent's state (position, velocity, soc) is updated."""
         
+        track = self.model.compiled_track
+        params = self.params
+
         # --- PIT STOP SERVICE LOGIC ---
-        if self.status == "PITTING" and self.position[0] == "n_pit_stall" and self.velocity == 0:
+        if self.status == "PITTING" and self.position[0] == track.pit_stall_node and self.velocity == 0:
             self.time_in_pit_stall += self.model.time_step
-            if self.time_in_pit_stall >= self.strategy['pit_time_loss_seconds']:
-                print(f"--- AGENT {self.unique_id} PIT STOP COMPLETE! ---")
-                
+            if self.time_in_pit_stall >= params.pit_time_loss_s:
                 if self.model.weather_state == "WET":
                     self.tyre_compound = "intermediate"
                 else:
                     self.tyre_compound = "medium"
+                self.model.events.emit(PIT_EXIT, self.model.env.now, self.unique_id, self.laps_completed + 1,
+                                       compound=self.tyre_compound)
 
                 self.tyre_life_remaining = 1.0
                 self.on_cliff = False
@@ -284,7 +255,7 @@ class F1Agent(Agent):
                 self.time_in_pit_stall = 0.0
                 self.wants_to_pit = False
                 self.status = "RACING" 
-                self.position = ("n_pit_exit", 0.0)
+                self.position = (track.pit_exit_node, 0.0)
             self.total_race_time_s += self.model.time_step
             return
         
@@ -297,13 +268,12 @@ class F1Agent(Agent):
         # --- 1. Get position details & calculate movement ---
         current_node = self.position[0]
         progress_on_edge = self.position[1] 
-        next_node = self.get_next_node_from_successors()
-        if next_node is None:
+        next_edge = self.get_next_edge()
+        if next_edge < 0:
             self.status = "FINISHED"
             self.velocity = 0
             return
-        edge_data = self.model.track.get_edge_data(current_node, next_node)
-        edge_length = edge_data['length'] 
+        edge_length = track.length[next_edge]
 
         # --- 2. Calculate distance and update totals ---
         distance_to_move = self.velocity * self.model.time_step
@@ -315,39 +285,44 @@ class F1Agent(Agent):
         
         if progress_on_edge >= 1.0:
             leftover_progress_fraction = progress_on_edge - 1.0
-            is_finish = edge_data.get('is_finish_line', False)
+            is_finish = track.is_finish_line[next_edge]
             if is_finish:
-                current_lap_time = self.total_race_time_s - sum(self.lap_times)
+                current_lap_time = self.lap_stats.complete_lap(self.total_race_time_s, self.model.lap_board)
                 self.lap_times.append(current_lap_time) 
                 self.laps_completed += 1
                 self.mom_available = False # Reset MOM at the end of the lap
                 self.energy_recovered_this_lap_mj = 0.0 # Reset per-lap counter
-                print(f"--- AGENT {self.unique_id} COMPLETED LAP {self.laps_completed}! (Time: {current_lap_time:.2f}s) ---")
+                events = self.model.events
+                events.emit(LAP_COMPLETED, self.model.env.now, self.unique_id, self.laps_completed,
+                            lap_time=current_lap_time)
                 
                 if self.laps_completed >= self.model.race_laps and not self.model.race_over:
-                    print(f"--- AGENT {self.unique_id} WINS THE RACE! (First to {self.laps_completed} laps) ---")
+                    events.emit(RACE_END, self.model.env.now, self.unique_id, self.laps_completed)
                     self.model.race_over = True 
                     self.status = "FINISHED"
-            self.position = (next_node, leftover_progress_fraction)
+            self.position = (track.edge_dst[next_edge], leftover_progress_fraction)
+            sector = self.model.sector_start[self.position[0]]
+            if sector:
+                self.lap_stats.split(sector, self.total_race_time_s)
         else:
             self.position = (current_node, progress_on_edge)
 
         # --- 4. ENERGY MODEL (Battery-First) ---
         
-        C1_POWER = float(self.strategy['c_1_power'])
+        C1_POWER = params.c1_power
         if self.aero_mode == "X-MODE":
-            C2_AERO_DRAG = float(self.strategy['c_2_x_mode_drag'])
+            C2_AERO_DRAG = params.c2_x_drag
         else: # Z-MODE
-            C2_AERO_DRAG = float(self.strategy['c_2_z_mode_drag'])
+            C2_AERO_DRAG = params.c2_z_drag
         
         power_cost = C1_POWER * (self.velocity * self.velocity)
         drag_cost = C2_AERO_DRAG
         total_energy_cost_per_step = (power_cost + drag_cost) * self.model.time_step
         
         if self.mom_active:
-            total_energy_cost_per_step += self.strategy.get('mom_energy_cost', 0.0) 
+            total_energy_cost_per_step += params.mom_energy_cost
         
-        battery_power_limit_mj = self.strategy['battery_power_limit_mj_per_step']
+        battery_power_limit_mj = params.battery_limit_mj
         battery_drain = min(total_energy_cost_per_step, battery_power_limit_mj)
         soc_drain = battery_drain / self.battery_capacity_mj 
         
@@ -359,7 +334,7 @@ class F1Agent(Agent):
              self.battery_soc = 0
              energy_cost_remaining = total_energy_cost_per_step - energy_paid_by_battery
              
-        ice_power_limit_mj = self.strategy['ice_power_limit_mj_per_step']
+        ice_power_limit_mj = params.ice_limit_mj
         fuel_drain = min(energy_cost_remaining, ice_power_limit_mj)
         
         if self.fuel_energy_remaining > fuel_drain:
@@ -372,14 +347,13 @@ class F1Agent(Agent):
         # --- C. REGENERATION (FIXED) ---
         if self.aero_mode == "Z-MODE":
             
-            # Use a flat, tunable regen-per-second
-            regen_per_second = self.strategy.get('corner_regen_mj_per_second', 0.05)
-            energy_gained = regen_per_second * self.model.time_step
+            # Use a flat, tunable regen-per-second (pre-multiplied by the time step)
+            energy_gained = params.regen_per_step_mj
 
             # (Removed the buggy lap limiter)
                 
             if self.battery_soc < 1.0 and energy_gained > 0:
-                soc_gain = energy_gained / self.battery_capacity_mj
+                soc_gain = params.regen_soc_per_step
                 self.battery_soc = min(1.0, self.battery_soc + soc_gain)
                 self.energy_recovered_this_lap_mj += energy_gained
 
@@ -387,15 +361,14 @@ class F1Agent(Agent):
         if self.status == "RACING":
             if self.tyre_compound == "soft":
                 self.time_on_softs_s += self.model.time_step 
-                wear_rate = self.strategy['tyre_wear_rate_soft']
+                tyre_wear = params.wear_soft_per_step
             elif self.tyre_compound == "hard":
                 self.time_on_hards_s += self.model.time_step 
-                wear_rate = self.strategy['tyre_wear_rate_hard']
+                tyre_wear = params.wear_hard_per_step
             else: # Default to medium or intermediate
                 self.time_on_mediums_s += self.model.time_step 
-                wear_rate = self.strategy['tyre_wear_rate_medium']
+                tyre_wear = params.wear_medium_per_step
             
-            tyre_wear = wear_rate * self.model.time_step
             if self.aero_mode == "Z-MODE": tyre_wear *= 1.5
             if self.mom_active: tyre_wear *= 2.0
             
@@ -410,14 +383,11 @@ class F1Agent(Agent):
 
             self.tyre_life_remaining -= tyre_wear
             
-            # --- FIX: Use .get() for safety and define variables ---
-            PIT_CLIFF_THRESHOLD = self.strategy.get('pit_tyre_cliff_threshold', 0.10)
-            TYRE_CLIFF_MODIFIER = self.strategy.get('tyre_cliff_grip_modifier', 0.8)
-
-            if not self.on_cliff and (self.tyre_life_remaining <= PIT_CLIFF_THRESHOLD):
+            if not self.on_cliff and (self.tyre_life_remaining <= params.cliff_threshold):
                 self.on_cliff = True
-                self.tyre_grip_modifier = TYRE_CLIFF_MODIFIER
-                print(f"--- AGENT {self.unique_id} TYRES FELL OFF A CLIFF! GRIP REDUCED. ---")
+                self.tyre_grip_modifier = params.cliff_grip
+                self.model.events.emit(TYRE_CLIFF, self.model.env.now, self.unique_id, self.laps_completed + 1,
+                                       tyre_life=self.tyre_life_remaining)
 
             if self.tyre_life_remaining <= 0:
                 self.tyre_life_remaining = 0
@@ -425,19 +395,13 @@ class F1Agent(Agent):
                 self.velocity = 0
 
             # --- TYRE TEMPERATURE MODEL (TUNED) ---
-            base_temp = 95.0
-            temp_gain = 0.0
-            temp_loss = 0.0
-            
+            # (corner gain + MOM gain - straight loss) per step, precompiled per aero mode
             if self.aero_mode == "Z-MODE":
-                temp_gain = self.strategy.get('temp_gain_corners_per_sec', 1.5)
+                temp_step = params.temp_step_z_mom if self.mom_active else params.temp_step_z
             else:
-                temp_loss = self.strategy.get('temp_loss_straights_per_sec', 1.0)
+                temp_step = params.temp_step_x_mom if self.mom_active else params.temp_step_x
             
-            if self.mom_active:
-                temp_gain += self.strategy.get('temp_gain_mom_per_sec', 2.0)
-            
-            self.tyre_temp += (temp_gain - temp_loss) * self.model.time_step
+            self.tyre_temp += temp_step
             
             self.tyre_temp = np.clip(self.tyre_temp, 95.0, 110.0)
             # --- END NEW ---
@@ -456,27 +420,34 @@ class F1Agent(Agent):
         # --- Plank Wear (Simplified: Loss during X-Mode) ---
         if self.aero_mode == "X-MODE":
             # Use the car's unique factor
-            self.plank_wear += self.strategy.get('plank_wear_rate', 0.005) * self.model.time_step * self.plank_wear_rate_factor 
+            self.plank_wear += self.params.plank_wear_per_step
         
         # --- Tyre Pressure (Simplified: Linear with Temperature) ---
         # Apply the car's unique factor to the final calculated pressure
         tyre_pressure_base = 28.0 + (self.tyre_temp - 95.0) * 0.2
         tyre_pressure = tyre_pressure_base * self.tyre_pressure_factor
         
-        # --- Final Data Record ---
-        data_point = {
-            'sim_time': round(current_time, 2),
-            'lap': self.laps_completed + 1,
-            'driver': self.unique_id,
-            'status': self.status,
-            'tyre_life_pct': round(self.tyre_life_remaining * 100, 1),
-            'tyre_temp_c': round(self.tyre_temp, 1),
-            'tyre_pressure_psi': round(tyre_pressure, 1), # <-- UPDATED (NOISE ADDED IN MODEL)
-            'soc_percent': round(self.battery_soc * 100, 1),
-            'fuel_mj': round(self.fuel_energy_remaining, 2),
-            'plank_wear_mm': round(self.plank_wear, 3),
-            'front_wing_angle_deg': 12.0 if self.aero_mode == "Z-MODE" else 5.0,
-            # Removed lateral_g
-        }
-        self.telemetry_history.append(data_point)
+        # --- Final Data Record (columnar, rounded on export) ---
+        recorder = self.model.telemetry
+        if recorder is not None:
+            recorder.record(
+                current_time,
+                self.laps_completed + 1,
+                self.telemetry_id,
+                STATUS_CODES[self.status],
+                self.tyre_life_remaining * 100,
+                self.tyre_temp,
+                tyre_pressure,
+                self.battery_soc * 100,
+                self.fuel_energy_remaining,
+                self.plank_wear,
+                12.0 if self.aero_mode == "Z-MODE" else 5.0,
+            )
+
+    @property
+    def telemetry_history(self):
+        """This car's recorded data points, rebuilt from the shared recorder."""
+        if self.model.telemetry is None:
+            return []
+        return list(self.model.telemetry.rows(driver=self.unique_id))
     # --- END Telemetry Recording Function ---
\ No newline at end of file
@@ -0,0 +1,229 @@
+import numpy as np
+from agent import STATUS_NAMES
+from model import build_grid
+from race_events import RaceEventBus
+from rng import RaceStreams
+from running_order import rank_grid
+from vector_engine import VectorEngine, FINISHED
+
+# weather_system timings (seconds of sim time)
+DRY_WAIT_RANGE = (600, 1200)
+RAIN_DURATION_SECONDS = 900.0
+
+# Arrays that are not indexed by car
+_SHARED_ARRAYS = ("_dry_compound", "decision_speed", "_rank", "_arange")
+
+
+class BatchEngine(VectorEngine):
+    """
+    Advances many independent races at once.
+
+    Every car of every race sits in one set of VectorEngine arrays (rows
+    grouped by race), so a tick is one pass of the vector kernels for all
+    races instead of one Python tick loop per race. Per-race state is the
+    seed, weather and race_over; a race is retired from the arrays as soon
+    as its winner takes the flag (or it reaches max_time).
+
+    Cars are built by model.build_grid from each seed's setup stream, so
+    every car gets exactly the noise DeltaVModel(seed) would give it. The rain cycle follows
+    weather_system from each race's own weather stream, so a seed rains
+    exactly when DeltaVModel(seed) does; only the per-tick step order (and
+    so same-tick tie-breaks) differs. No VSC, telemetry or race events.
+    """
+
+    def __init__(self, assets, seeds, max_time=None):
+        self.seeds = list(seeds)
+        self.events = RaceEventBus() # no sinks: batched races are silent
+        self.now = 0.0
+        self.results = [None] * len(self.seeds)
+
+        streams = [RaceStreams(seed) for seed in self.seeds]
+        tables = {} # decision rows shared by every race's cars
+        grids = [build_grid(assets, rng.setup, tables=tables) for rng in streams]
+        track = assets['compiled_track']
+        sim_params = assets['config']['simulation_params']
+        self.time_step = sim_params['time_step']
+        self.race_laps = sim_params['race_laps']
+        self.track_length = track.track_length
+        self.max_time = max_time or self.race_laps * 92 * 2
+        self.cars_per_race = len(grids[0])
+        self.grid = [(a.unique_id, a.team) for a in grids[0]]
+        self.strategy_of = {d['driver']: d['strategy_file'] for d in assets['config']['grid']}
+
+        self.agents = [a for grid in grids for a in grid]
+        self.n = len(self.agents)
+        self._rank = np.arange(self.n)
+        self._arange = np.arange(self.n)
+
+        self._load_track(track)
+        track_attrs = set(vars(self))
+        self._load_params()
+        self._load_state()
+        self.race_of = np.repeat(np.arange(len(streams)), self.cars_per_race)
+        self.lap_times = np.zeros((self.n, self.race_laps + 1), dtype=float)
+        self.lap_time_sum = np.zeros(self.n, dtype=float)
+        self.fastest_lap = np.full(self.n, np.inf)
+        self.gap_to_leader = np.zeros(self.n, dtype=float)
+        self._car_arrays = [name for name, value in vars(self).items()
+                            if name not in track_attrs and name not in _SHARED_ARRAYS
+                            and isinstance(value, np.ndarray) and value.ndim >= 1 and len(value) == self.n]
+
+        # --- Per-race state (index = position among the active races) ---
+        self.race_id = np.arange(len(streams))
+        self.race_weather = [rng.weather for rng in streams]
+        self.race_shuffle = [rng.shuffle for rng in streams]
+        self.race_wet = np.zeros(len(streams), dtype=bool)
+        self.race_over = np.zeros(len(streams), dtype=bool)
+        self.next_weather = np.array([rng.uniform(*DRY_WAIT_RANGE) for rng in self.race_weather])
+        # Race time at which each lap number was first completed (LapBoard, per race)
+        self.leader_time = np.full((len(streams), self.race_laps + 2), np.nan)
+        # Keeps each race's distances apart, so one sorted array ranks every race
+        self._race_spacing = (self.race_laps + 4) * self.track_length
+        self.agents = None # everything needed now lives in the arrays
+
+    @property
+    def active_races(self):
+        return len(self.race_id)
+
+    def run(self):
+        """Runs every race to its finish (or max_time); returns the per-race results in seed order."""
+        while self.active_races:
+            self.step()
+        return self.results
+
+    # --- Main tick ---
+    def step(self):
+        """Advances every active race by one time_step."""
+        self._advance_weather()
+
+        distance = self.total_distance
+        _, ahead, _ = rank_grid(distance + self.race_of * self._race_spacing, self.track_length)
+        safe_ahead = np.maximum(ahead, 0)
+        other_race = (ahead < 0) | (self.race_of[safe_ahead] != self.race_of)
+        # Gap from the unshifted distances, so it does not depend on the race's slot
+        gap = distance[safe_ahead] - distance
+        gap = np.where(gap > 0, gap, gap + self.track_length)
+        self.car_ahead = np.where(other_race, -1, ahead)
+        self.gap_ahead = np.where(other_race, np.inf, gap)
+
+        is_wet = self.race_wet[self.race_of]
+        is_on_dry_tyres = self._dry_compound[self.compound]
+        wrong_tyre = (is_on_dry_tyres == is_wet)
+
+        self._perceive(wrong_tyre)
+        next_edge = self._decide(is_wet, is_on_dry_tyres, False)
+        self._update(next_edge, wrong_tyre, is_wet)
+
+        timed_out = self.now + self.time_step > self.max_time
+        done = self.race_over | timed_out
+        if done.any():
+            self._retire(np.flatnonzero(done))
+        self.now += self.time_step
+
+    def _advance_weather(self):
+        """weather_system's dry/rain cycle for every race whose next change is due."""
+        for r in np.flatnonzero(self.next_weather <= self.now):
+            rng = self.race_weather[r]
+            while self.next_weather[r] <= self.now:
+                if self.race_wet[r]:
+                    self.race_wet[r] = False
+                    self.next_weather[r] += rng.uniform(*DRY_WAIT_RANGE)
+                elif rng.random() < 0.5:
+                    self.race_wet[r] = True
+                    self.next_weather[r] += RAIN_DURATION_SECONDS
+                else:
+                    self.next_weather[r] += rng.uniform(*DRY_WAIT_RANGE)
+
+    def _complete_laps(self, finishers):
+        lap = self.laps[finishers]
+        lap_time = self.race_time[finishers] - self.lap_time_sum[finishers]
+        self.lap_times[finishers, np.minimum(lap, self.race_laps)] = lap_time
+        self.lap_time_sum[finishers] += lap_time
+        self.fastest_lap[finishers] = np.minimum(self.fastest_lap[finishers], lap_time)
+        self.laps[finishers] = lap + 1
+        line = (self.race_of[finishers], np.minimum(lap + 1, self.race_laps + 1))
+        np.fmin.at(self.leader_time, line, self.race_time[finishers])
+        self.gap_to_leader[finishers] = self.race_time[finishers] - self.leader_time[line]
+        self.mom_available[finishers] = False
+        self.recovered[finishers] = 0.0
+
+        # First across the line on the final lap wins; ties within a tick go
+        # to a random one of them, as the per-tick shuffle would decide
+        candidates = finishers[(lap + 1 >= self.race_laps) & ~self.race_over[self.race_of[finishers]]]
+        for r in np.unique(self.race_of[candidates]).tolist():
+            tied = candidates[self.race_of[candidates] == r]
+            winner = tied[0]
+            if len(tied) > 1:
+                winner = tied[int(self.race_shuffle[r].integers(len(tied)))]
+            self.race_over[r] = True
+            self.status[winner] = FINISHED
+
+    def _split_sectors(self, arrived):
+        pass
+
+    def _record_telemetry(self, cars):
+        pass
+
+    # --- Retiring finished races ---
+    def _retire(self, races):
+        for r in races:
+            self.results[self.race_id[r]] = self._race_result(r)
+
+        keep_race = np.ones(self.active_races, dtype=bool)
+        keep_race[races] = False
+        keep = keep_race[self.race_of]
+        for name in self._car_arrays:
+            setattr(self, name, getattr(self, name)[keep])
+        self.decision_speed = self.decision_speed.reshape(self.n, -1)[keep].reshape(-1)
+        self.n = int(keep.sum())
+        self._rank = np.arange(self.n)
+        self._arange = np.arange(self.n)
+
+        new_index = np.cumsum(keep_race) - 1
+        self.race_of = new_index[self.race_of]
+        self.race_id = self.race_id[keep_race]
+        self.race_weather = [rng for rng, k in zip(self.race_weather, keep_race) if k]
+        self.race_shuffle = [rng for rng, k in zip(self.race_shuffle, keep_race) if k]
+        self.race_wet = self.race_wet[keep_race]
+        self.race_over = self.race_over[keep_race]
+        self.next_weather = self.next_weather[keep_race]
+        self.leader_time = self.leader_time[keep_race]
+
+    def _race_result(self, r):
+        """Same compact result as monte_carlo.run_race."""
+        cars = np.flatnonzero(self.race_of == r)
+        ranked = cars[np.argsort(-self.total_distance[cars], kind='stable')]
+        drivers = {}
+        order = []
+        for position, i in enumerate(ranked.tolist(), start=1):
+            driver, team = self.grid[i - cars[0]]
+            order.append(driver)
+            laps = int(self.laps[i])
+            drivers[driver] = {
+                "team": team,
+                "strategy": self.strategy_of[driver],
+                "position": position,
+                "status": STATUS_NAMES[self.status[i]],
+                "laps": laps,
+                "lap_times": [round(t, 3) for t in self.lap_times[i, :min(laps, self.race_laps + 1)].tolist()],
+                "fastest_lap_s": round(float(self.fastest_lap[i]), 3) if laps else None,
+                "gap_to_leader_s": round(float(self.gap_to_leader[i]), 3),
+                "pit_stops": int(self.pit_stops[i]),
+                "mom_uses": int(self.mom_uses[i]),
+                "battery_soc": round(float(self.soc[i]), 4),
+                "fuel_mj": round(float(self.fuel[i]), 3),
+                "tyre_life": round(float(self.tyre_life[i]), 4),
+                "tyre_compound": self.compound_names[self.compound[i]],
+            }
+        return {
+            "seed": self.seeds[self.race_id[r]],
+            "race_time_s": round(self.now, 2),
+            "race_completed": bool(self.race_over[r]),
+            "finishing_order": order,
+            "drivers": drivers,
+        }
+
+
+def run_batch(assets, seeds, max_time=None):
+    """Runs one batch of races and returns their results in seed order."""
+    return BatchEngine(assets, seeds, max_time).run()
@@ -0,0 +1,371 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from model import DeltaVModel, load_race_assets
+from telemetry_export import export_telemetry
+
+# --- Case matrix ---
+BASE_CASE = {"engine": "agent", "cars": 22, "time_step": 0.1, "laps": 3, "live": False, "telemetry": False}
+# Values swept one at a time from BASE_CASE (default) or all combined (--full)
+AXES = {
+    "cars": (22, 100, 500),
+    "time_step": (0.05, 0.1, 0.5),
+    "laps": (1, 3, 10),
+    "live": (False, True),
+    "telemetry": (False, True),
+}
+GOLDEN_SEEDS = (1, 2, 3)
+GOLDEN_LAPS = 5
+# Reference races for the golden check: a six-car grid on a small circuit
+# and its recorded outcomes, all committed in benchmark_data/
+_HERE = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK_DATA = os.path.join(_HERE, "benchmark_data")
+GOLDEN_CONFIG = os.path.join(BENCHMARK_DATA, "grid.json")
+GOLDEN_FILE = os.path.join(BENCHMARK_DATA, "golden.json")
+
+
+def case_name(case):
+    return (f"{case['engine']}-c{case['cars']}-dt{case['time_step']}-l{case['laps']}-"
+            f"{'live' if case['live'] else 'nolive'}-{'tel' if case['telemetry'] else 'notel'}")
+
+
+def build_cases(engines=("agent",), full=False, **axes):
+    """
+    Cases to run. With no axis given: BASE_CASE plus one case per other value
+    of each axis (and live + telemetry together), or the full product of
+    AXES with full=True. Axes given as lists are combined with each other.
+    """
+    chosen = {name: values for name, values in axes.items() if values}
+    if full or chosen:
+        space = {name: chosen.get(name, AXES[name] if full else (BASE_CASE[name],)) for name in AXES}
+        combos = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    else:
+        combos = [{}]
+        for name, values in AXES.items():
+            combos += [{name: v} for v in values if v != BASE_CASE[name]]
+        combos.append({"live": True, "telemetry": True})
+    cases = []
+    for engine in engines:
+        for combo in combos:
+            cases.append({**BASE_CASE, **combo, "engine": engine})
+    return cases
+
+
+def synthetic_assets(assets, cars=None, time_step=None, laps=None):
+    """
+    Race assets with the grid cycled (or cut) to `cars` cars and the time
+    step / race length replaced. Extra cars repeat the grid as
+    '<driver>_<n>', lined up behind it, so strategies and the track are
+    shared with the loaded assets.
+    """
+    config = dict(assets['config'])
+    config['simulation_params'] = dict(config['simulation_params'])
+    if time_step is not None:
+        config['simulation_params']['time_step'] = time_step
+    if laps is not None:
+        config['simulation_params']['race_laps'] = laps
+    if cars is not None:
+        base = assets['config']['grid']
+        grid = []
+        for k in range(cars):
+            entry = dict(base[k % len(base)])
+            if k >= len(base):
+                entry['driver'] = f"{entry['driver']}_{k}"
+            entry['pos'] = k + 1
+            grid.append(entry)
+        config['grid'] = grid
+    return {**assets, 'config': config}
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def _run_to_end(model):
+    env = model.env
+    env.run(until=env.any_of([model.race_process, env.timeout(model.race_laps * 92 * 2)]))
+    model.sync_agents()
+
+
+# --- One case (runs in a fresh worker process, so peak RSS is its own) ---
+def run_case(case, config_file_path, seed=1, telemetry_format="npz"):
+    assets = synthetic_assets(load_race_assets(config_file_path), case['cars'], case['time_step'], case['laps'])
+    workdir = tempfile.mkdtemp(prefix="deltav_bench_")
+    cwd = os.getcwd()
+    os.chdir(workdir) # live snapshots are written to the working directory
+    try:
+        rss_before = _peak_rss_mb()
+        model = DeltaVModel(seed=seed, engine=case['engine'], assets=assets, live_snapshot_mode=case['live'],
+                            record_telemetry=case['telemetry'], telemetry_path=None)
+        start = time.perf_counter()
+        _run_to_end(model)
+        wall = time.perf_counter() - start
+        model.close() # waits for queued snapshots, so their bytes are counted
+
+        telemetry_bytes = export_s = 0
+        if model.telemetry is not None:
+            path = os.path.join(workdir, f"telemetry.{telemetry_format}")
+            export_start = time.perf_counter()
+            export_telemetry(model.telemetry, path, fmt=telemetry_format)
+            export_s = time.perf_counter() - export_start
+            telemetry_bytes = os.path.getsize(path)
+        writer = model.snapshot_writer
+        sim = model.env.now
+        ticks = round(sim / model.time_step)
+        return {
+            **case,
+            "name": case_name(case),
+            "seed": seed,
+            "race_completed": model.race_over,
+            "sim_seconds": round(sim, 3),
+            "wall_seconds": round(wall, 4),
+            "ticks": ticks,
+            "ticks_per_sec": round(ticks / wall, 1),
+            "sim_per_wall": round(sim / wall, 2),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+            "rss_growth_mb": round(_peak_rss_mb() - rss_before, 1),
+            "telemetry_bytes": telemetry_bytes,
+            "telemetry_export_s": round(export_s, 4),
+            "snapshot_bytes": writer.bytes_written if writer is not None else 0,
+            "snapshots_written": writer.frames_written if writer is not None else 0,
+            "snapshots_dropped": writer.frames_dropped if writer is not None else 0,
+        }
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_cases(cases, config_file_path, seed=1, telemetry_format="npz"):
+    """Runs every case in its own worker process (one at a time, so timings do not compete)."""
+    config_file_path = os.path.abspath(config_file_path)
+    results = []
+    for case in cases:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(run_case, case, config_file_path, seed, telemetry_format).result()
+        print(f"{result['name']:42s} {result['ticks_per_sec']:10.0f} ticks/s {result['sim_per_wall']:8.1f}x "
+              f"{result['peak_rss_mb']:8.1f} MB  tel {result['telemetry_bytes']:>11,d} B  "
+              f"snap {result['snapshot_bytes']:>11,d} B")
+        results.append(result)
+    return results
+
+
+# --- Cold start: a fresh interpreter importing the core, loading assets and running a short race ---
+_COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from model import DeltaVModel, load_race_assets
+imported = time.perf_counter()
+assets = load_race_assets(sys.argv[1])
+assets['config'] = dict(assets['config'], simulation_params=dict(assets['config']['simulation_params'],
+                                                                  race_laps=int(sys.argv[3])))
+loaded = time.perf_counter()
+model = DeltaVModel(engine=sys.argv[2], assets=assets, seed=1, record_telemetry=False, telemetry_path=None)
+built = time.perf_counter()
+model.env.run(until=model.env.any_of([model.race_process, model.env.timeout(model.race_laps * 92 * 2)]))
+raced = time.perf_counter()
+print(json.dumps({"import_s": imported - start, "assets_s": loaded - imported, "build_s": built - loaded,
+                  "race_s": raced - built, "modules": sorted(m for m in ("mesa", "networkx", "pandas", "matplotlib")
+                                                             if m in sys.modules)}))
+"""
+
+
+def cold_start(config_file_path, engine="agent", laps=1):
+    """
+    Wall time of a single short race in a new interpreter, split into
+    interpreter start-up, imports, asset loading, model build and the race
+    (which heavy optional packages got imported is listed too).
+    """
+    path = [os.path.dirname(os.path.abspath(__file__))] + [p for p in [os.environ.get("PYTHONPATH")] if p]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path))
+    start = time.perf_counter()
+    child = subprocess.run([sys.executable, "-c", _COLD_START_SCRIPT, config_file_path, engine, str(laps)],
+                           capture_output=True, text=True, check=True, env=env)
+    total = time.perf_counter() - start
+    timings = json.loads(child.stdout.strip().splitlines()[-1])
+    phases = {name: round(seconds, 4) for name, seconds in timings.items() if name.endswith("_s")}
+    return {"engine": engine, "laps": laps, "total_s": round(total, 4),
+            "interpreter_s": round(total - sum(phases.values()), 4), **phases, "heavy_modules": timings["modules"]}
+
+
+# --- Golden outcomes ---
+def outcome_fingerprint(model):
+    """
+    Hash of every car's final state at full precision; any change to race
+    results changes it. Numbers go through float() first (an empty battery
+    is int 0 on the agent path, 0.0 on the vector one).
+    """
+    cars = sorted((a.unique_id, a.laps_completed, repr(float(a.total_distance_traveled)),
+                   [repr(float(t)) for t in a.lap_times], a.pit_stops_made, a.status, repr(float(a.battery_soc)),
+                   repr(float(a.fuel_energy_remaining)), a.mom_uses_count, a.tyre_compound) for a in model.f1_agents)
+    return hashlib.sha256(repr((repr(model.env.now), cars)).encode()).hexdigest()
+
+
+def golden_key(config_file_path, assets):
+    """
+    '<config name>-<hash>'. The hash covers what decides the races (race
+    settings, each car's strategy, the compiled track), not where the files
+    live, so same-named configs do not collide and a moved checkout matches.
+    """
+    config = assets['config']
+    grid = [{**entry, 'strategy_file': os.path.basename(entry['strategy_file']),
+             'strategy': assets['strategies'][entry['strategy_file']]} for entry in config['grid']]
+    settings = {name: value for name, value in config.items() if name not in ('grid', 'track')}
+    digest = hashlib.sha256(json.dumps({'settings': settings, 'grid': grid}, sort_keys=True).encode())
+    track = assets['compiled_track']
+    digest.update(repr(track.node_names).encode())
+    for name, array in sorted(track.as_arrays().items()):
+        digest.update(name.encode() + array.tobytes())
+    return f"{os.path.splitext(os.path.basename(config_file_path))[0]}-{digest.hexdigest()[:16]}"
+
+
+def golden_outcomes(assets, engines=("agent",), seeds=GOLDEN_SEEDS):
+    """{'<engine>/seed<N>': fingerprint} for fixed-seed races on the assets' grid."""
+    outcomes = {}
+    for engine in engines:
+        for seed in seeds:
+            model = DeltaVModel(seed=seed, engine=engine, assets=assets, record_telemetry=False, telemetry_path=None)
+            _run_to_end(model)
+            outcomes[f"{engine}/seed{seed}"] = outcome_fingerprint(model)
+    return outcomes
+
+
+def check_golden(outcomes, golden_file, key, update=False):
+    """
+    Compares outcomes with the ones recorded under `key`; returns the
+    mismatching names. update=True (re)records them instead. Outcomes with
+    nothing recorded raise ValueError, so a lost or never-written golden
+    file cannot pass the check.
+    """
+    golden = {}
+    if os.path.exists(golden_file):
+        with open(golden_file, 'r') as f:
+            golden = json.load(f)
+    recorded = golden.get(key, {})
+    if update:
+        golden[key] = {**recorded, **outcomes}
+        with open(golden_file, 'w') as f:
+            json.dump(golden, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"--- GOLDEN: recorded {len(outcomes)} outcomes for {key} in {golden_file} ---")
+        return []
+    missing = [name for name in outcomes if name not in recorded]
+    if missing:
+        where = golden_file if os.path.exists(golden_file) else f"{golden_file} (no such file)"
+        raise ValueError(f"No golden outcomes for {key}: {', '.join(missing)} in {where}. "
+                         f"Record them with --update-golden once the results are known to be right.")
+    mismatches = [name for name, value in outcomes.items() if recorded[name] != value]
+    status = "CHANGED: " + ", ".join(mismatches) if mismatches else "unchanged"
+    print(f"--- GOLDEN: race outcomes {status} ({len(outcomes)} checked, {key}) ---")
+    return mismatches
+
+
+def compare(results, previous):
+    """Prints ticks/s and peak RSS against an earlier results file (matched by case name)."""
+    before = {r['name']: r for r in previous['cases']}
+    print(f"--- COMPARED WITH {previous['meta'].get('commit') or 'previous run'} ---")
+    for r in results:
+        old = before.get(r['name'])
+        if old is None:
+            continue
+        print(f"{r['name']:42s} {old['ticks_per_sec']:10.0f} -> {r['ticks_per_sec']:10.0f} ticks/s "
+              f"({r['ticks_per_sec'] / old['ticks_per_sec']:5.2f}x)  "
+              f"{old['peak_rss_mb']:7.1f} -> {r['peak_rss_mb']:7.1f} MB")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _list(cast):
+    return lambda text: [cast(v) for v in text.split(',')]
+
+
+def _flag(text):
+    return {"on": True, "off": False, "true": True, "false": False, "1": True, "0": False}[text.lower()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delta-V throughput / memory benchmark and golden-outcome check.")
+    parser.add_argument("config", nargs="?", default="starting_grid.json", help="Starting grid JSON (cars are cycled)")
+    parser.add_argument("--engines", type=_list(str), default=["agent"], help="Comma list of agent,vector,event")
+    parser.add_argument("--cars", type=_list(int), default=None, help=f"Comma list (default sweep {AXES['cars']})")
+    parser.add_argument("--time-steps", type=_list(float), default=None)
+    parser.add_argument("--laps", type=_list(int), default=None)
+    parser.add_argument("--live", type=_list(_flag), default=None, help="off,on")
+    parser.add_argument("--telemetry", type=_list(_flag), default=None, help="off,on")
+    parser.add_argument("--full", action="store_true", help="Run the full product of every axis")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--telemetry-format", default="npz", help="Export format measured for telemetry bytes")
+    parser.add_argument("--out", default="benchmark_results.json", help="Machine-readable results")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--golden-config", default=GOLDEN_CONFIG,
+                        help=f"Grid raced for the golden check (default: {os.path.relpath(GOLDEN_CONFIG, _HERE)})")
+    parser.add_argument("--golden-file", default=GOLDEN_FILE)
+    parser.add_argument("--update-golden", action="store_true",
+                        help="Record the current race outcomes as golden (also needed the first time for a grid)")
+    parser.add_argument("--no-golden", action="store_true")
+    parser.add_argument("--no-cold-start", action="store_true", help="Skip the fresh-interpreter single-race timing")
+    args = parser.parse_args()
+
+    golden_mismatches = []
+    outcomes = {}
+    if not args.no_golden:
+        assets = synthetic_assets(load_race_assets(args.golden_config), laps=GOLDEN_LAPS)
+        outcomes = golden_outcomes(assets, engines=args.engines)
+        try:
+            golden_mismatches = check_golden(outcomes, args.golden_file, golden_key(args.golden_config, assets),
+                                             update=args.update_golden)
+        except ValueError as e:
+            raise SystemExit(str(e))
+
+    cold = []
+    if not args.no_cold_start:
+        for engine in args.engines:
+            c = cold_start(args.config, engine)
+            print(f"--- COLD START ({engine}, 1 lap): {c['total_s']:.2f}s = interpreter {c['interpreter_s']:.2f} "
+                  f"+ imports {c['import_s']:.2f} + assets {c['assets_s']:.2f} + build {c['build_s']:.2f} "
+                  f"+ race {c['race_s']:.2f} ---")
+            cold.append(c)
+
+    cases = build_cases(engines=args.engines, full=args.full, cars=args.cars, time_step=args.time_steps,
+                        laps=args.laps, live=args.live, telemetry=args.telemetry)
+    print(f"--- BENCHMARK: {len(cases)} cases on {args.config} ---")
+    results = run_cases(cases, args.config, seed=args.seed, telemetry_format=args.telemetry_format)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": args.config,
+        },
+        "golden": {"outcomes": outcomes, "mismatches": golden_mismatches},
+        "cold_start": cold,
+        "cases": results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"--- RESULTS: {args.out} ---")
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare(results, json.load(f))
+    if golden_mismatches:
+        raise SystemExit(f"Race outcomes changed for {', '.join(golden_mismatches)}")
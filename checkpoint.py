@@ -0,0 +1,313 @@
+import argparse
+import io
+import json
+import math
+import time
+import zipfile
+from array import array
+import numpy as np
+import simpy
+from agent import F1Agent
+from lap_stats import LapBoard, LapStats
+from model import DeltaVModel, load_race_assets
+from monte_carlo import race_result
+from rng import STREAM_NAMES, RaceStreams
+from strategy import compile_strategy
+
+CHECKPOINT_VERSION = 2
+CHECKPOINT_MAGIC = b"DVCK"
+
+# F1Agent slots that are not race state (rebuilt on restore) or are stored by id
+_AGENT_SKIP = ('model', 'params', 'car_ahead')
+AGENT_FIELDS = tuple(name for name in F1Agent.__slots__ if name not in _AGENT_SKIP)
+# DeltaVModel race state (besides the clock, the cars and telemetry)
+MODEL_FIELDS = (
+    'seed', 'rng', 'step_count', 'vsc_active', 'weather_state', 'race_over', 'running',
+    'next_snapshot_time', 'lap_board', 'next_tick_time', 'weather_pending',
+)
+
+
+# --- Capture ---
+def capture(model):
+    """
+    The race state of `model` as plain data: clock, RNG stream states,
+    weather, every car (in step order) and the telemetry columns recorded
+    so far. Everything but the telemetry arrays is JSON (floats round-trip
+    exactly). Call it between env.run() calls; skipped ticks (event engine)
+    and array state (vector engine) are written back onto the cars first.
+    """
+    model.sync_agents()
+    cars = []
+    for a in model.f1_agents:
+        car = {name: getattr(a, name) for name in AGENT_FIELDS}
+        car['position'] = list(a.position)
+        car['lap_times'] = a.lap_times.tolist()
+        car['lap_stats'] = _lap_stats_data(a.lap_stats)
+        car['car_ahead'] = a.car_ahead.unique_id if a.car_ahead is not None else None
+        cars.append(car)
+    telemetry = None
+    if model.telemetry is not None:
+        size = model.telemetry.size
+        telemetry = {name: col[:size] for name, col in model.telemetry.columns.items()}
+    state = {name: getattr(model, name) for name in MODEL_FIELDS}
+    state['rng'] = {name: getattr(model.rng, name).bit_generator.state for name in STREAM_NAMES}
+    state['lap_board'] = {name: list(getattr(model.lap_board, name)) for name in LapBoard.__slots__}
+    if model.weather_pending is not None:
+        state['weather_pending'] = list(model.weather_pending)
+    if model.engine_name == "event":
+        # The event engine runs its own tick loop on the 0.1 s grid, not run_simulation_steps
+        state['next_tick_time'] = math.ceil(model.env.now / model.time_step - 1e-9) * model.time_step
+    state.update({
+        'version': CHECKPOINT_VERSION,
+        'config_file_path': model.config_file_path,
+        'drivers': [d['driver'] for d in model.config['grid']],
+        'engine': model.engine_name,
+        'now': model.env.now,
+        'running_order': [a.unique_id for a in model.running_order],
+        'cars': cars,
+        'telemetry': telemetry,
+    })
+    return state
+
+
+def _lap_stats_data(stats):
+    data = {name: getattr(stats, name) for name in LapStats.__slots__}
+    data['_recent'] = list(stats._recent)
+    return data
+
+
+def _restore_lap_stats(data):
+    stats = LapStats(sectors=len(data['sectors']))
+    for name in LapStats.__slots__:
+        if name != '_recent':
+            setattr(stats, name, data[name])
+    stats._recent.extend(data['_recent'])
+    return stats
+
+
+def _json_default(value):
+    # NumPy scalars left on the cars (e.g. tyre_temp after np.clip)
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot store {type(value).__name__} in a checkpoint")
+
+
+def save_checkpoint(model):
+    """
+    Serializes `model` mid-race into a compact checkpoint: an npz (no
+    pickles) of the JSON race state plus the raw telemetry columns.
+    """
+    state = capture(model)
+    telemetry = state.pop('telemetry')
+    arrays = {'state': np.frombuffer(json.dumps(state, default=_json_default).encode(), dtype=np.uint8)}
+    if telemetry is not None:
+        arrays.update((f"telemetry/{name}", col) for name, col in telemetry.items())
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+    return CHECKPOINT_MAGIC + buf.getvalue()
+
+
+def load_checkpoint(data):
+    """
+    Decodes a checkpoint from save_checkpoint() into capture()'s dict;
+    raises ValueError if it is not one. Only data is read (no pickles).
+    """
+    if not data.startswith(CHECKPOINT_MAGIC):
+        raise ValueError("Not a Delta-V checkpoint")
+    try:
+        with np.load(io.BytesIO(data[len(CHECKPOINT_MAGIC):]), allow_pickle=False) as f:
+            state = json.loads(f['state'].tobytes())
+            telemetry = {name.split('/', 1)[1]: f[name] for name in f.files if name.startswith("telemetry/")}
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+        raise ValueError(f"Damaged Delta-V checkpoint ({e})") from None
+    if not isinstance(state, dict) or state.get('version') != CHECKPOINT_VERSION:
+        version = state.get('version') if isinstance(state, dict) else None
+        raise ValueError(f"Unsupported checkpoint version {version!r} (expected {CHECKPOINT_VERSION})")
+    state['telemetry'] = telemetry or None
+    return state
+
+
+def write_checkpoint(model, path):
+    data = save_checkpoint(model)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def read_checkpoint(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# --- Restore / fork ---
+def restore(data, assets=None, engine=None, overrides=None, **model_kwargs):
+    """
+    Rebuilds a DeltaVModel from a checkpoint (bytes from save_checkpoint) that
+    continues the race exactly where it was captured: same clock, RNG draws,
+    cars, weather cycle and telemetry. SimPy generators cannot be pickled,
+    so the race and weather processes are restarted from their saved
+    resume points (next tick time, pending weather wait).
+
+    assets defaults to load_race_assets() of the checkpointed config file;
+    engine defaults to the checkpointed one. overrides is
+    {driver: {strategy_key: value}}; the cars' strategies are recompiled
+    with them before the race resumes. Other keyword arguments go to
+    DeltaVModel (record_telemetry, telemetry_path, live_snapshot_mode, ...).
+    """
+    state = load_checkpoint(data)
+    if assets is None:
+        assets = _checkpoint_assets(state)
+    if [d['driver'] for d in assets['config']['grid']] != state['drivers']:
+        raise ValueError("Checkpoint grid does not match the race assets")
+    model_kwargs.setdefault('record_telemetry', state['telemetry'] is not None)
+
+    model = DeltaVModel(config_file_path=state['config_file_path'], seed=state['seed'], engine="agent",
+                        assets=assets, **model_kwargs)
+    # Fresh clock at the checkpoint time; the processes __init__ started on the old one are dropped
+    model.env = simpy.Environment(initial_time=state['now'])
+    for name in MODEL_FIELDS:
+        setattr(model, name, state[name])
+    model.rng = RaceStreams(state['seed'])
+    for name in STREAM_NAMES:
+        getattr(model.rng, name).bit_generator.state = state['rng'][name]
+    model.lap_board = LapBoard()
+    for name in LapBoard.__slots__:
+        setattr(model.lap_board, name, state['lap_board'][name])
+    if state['weather_pending'] is not None:
+        model.weather_pending = tuple(state['weather_pending'])
+
+    by_id = {a.unique_id: a for a in model.f1_agents}
+    for car in state['cars']:
+        a = by_id[car['unique_id']]
+        for name in AGENT_FIELDS:
+            setattr(a, name, car[name])
+        a.position = tuple(car['position'])
+        a.lap_times = array('d', car['lap_times'])
+        a.lap_stats = _restore_lap_stats(car['lap_stats'])
+    for car in state['cars']:
+        ahead = car['car_ahead']
+        by_id[car['unique_id']].car_ahead = by_id[ahead] if ahead is not None else None
+    # Step order matters: the shuffle stream permutes the list as it stands
+    model.f1_agents = [by_id[car['unique_id']] for car in state['cars']]
+    model.running_order = [by_id[driver] for driver in state['running_order']]
+    for a in model.f1_agents:
+        a.params = compile_strategy(a.strategy, model.compiled_track, model.time_step, source=a.unique_id,
+                                    tables=model.decision_tables)
+    if overrides:
+        apply_overrides(model, overrides)
+
+    if model.telemetry is not None and state['telemetry'] is not None:
+        model.telemetry.record_batch(**state['telemetry'])
+
+    model._start(engine or state['engine'], resume=state)
+    return model
+
+
+def _checkpoint_assets(state):
+    """load_race_assets() of the checkpointed config file; ValueError if it has none."""
+    if not state['config_file_path']:
+        raise ValueError("Checkpoint has no config file path; pass assets=")
+    return load_race_assets(state['config_file_path'])
+
+
+def apply_overrides(model, overrides):
+    """
+    Replaces strategy values of named cars ({driver: {strategy_key: value}})
+    and recompiles them. Only valid before the engine is built (restore()).
+    """
+    by_id = {a.unique_id: a for a in model.f1_agents}
+    for driver, changes in overrides.items():
+        if driver not in by_id:
+            raise ValueError(f"Unknown driver '{driver}' in strategy overrides")
+        a = by_id[driver]
+        a.strategy = {**a.strategy, **changes}
+        a.params = compile_strategy(a.strategy, model.compiled_track, model.time_step,
+                                    source=f"overrides for {driver}", tables=model.decision_tables)
+        # Values F1Agent copies from its strategy when it is built
+        a.battery_capacity_mj = a.params.battery_capacity_mj
+        a.plank_wear_rate_factor = a.params.plank_wear_factor
+        a.tyre_pressure_factor = a.params.tyre_pressure_factor
+        a.acceleration_g_factor = a.params.g_factor
+
+
+def fork(data, variants, assets=None, engine=None, **model_kwargs):
+    """
+    One restored model per entry of `variants` (each a strategy overrides dict
+    for restore(), {} for the unchanged race), all continuing from the same
+    checkpoint, so what-if races share the simulated prefix.
+    """
+    if assets is None:
+        assets = _checkpoint_assets(load_checkpoint(data))
+    return [restore(data, assets=assets, engine=engine, overrides=variant, **model_kwargs)
+            for variant in variants]
+
+
+def run_to_lap(model, lap, max_time=None):
+    """Advances `model` tick by tick until the leader has completed `lap` laps (or the race ends)."""
+    env = model.env
+    cap = max_time or model.race_laps * 92 * 2
+    while not model.race_over and env.now < cap:
+        model.sync_agents()
+        if max(a.laps_completed for a in model.f1_agents) >= lap:
+            break
+        env.run(until=env.now + model.time_step)
+
+
+def finish(model, max_time=None):
+    """Runs a (restored) model to the chequered flag or race time max_time; returns race_result()."""
+    env = model.env
+    cap = max_time or model.race_laps * 92 * 2
+    if not model.race_over and env.now < cap:
+        env.run(until=env.any_of([model.race_process, env.timeout(cap - env.now)]))
+    model.sync_agents()
+    return race_result(model)
+
+
+def _parse_variant(text):
+    """'Albon:grip_factor=1.1,pit_tyre_cliff_threshold=0.4;Alonso:...' -> overrides dict."""
+    overrides = {}
+    for part in filter(None, text.split(';')):
+        driver, _, assignments = part.partition(':')
+        changes = overrides.setdefault(driver.strip(), {})
+        for assignment in filter(None, assignments.split(',')):
+            key, sep, value = assignment.partition('=')
+            if not sep:
+                raise ValueError(f"Expected key=value in variant '{text}', got '{assignment}'")
+            changes[key.strip()] = float(value)
+    return overrides
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="What-if races forked from a mid-race checkpoint.")
+    parser.add_argument("config", nargs="?", default="starting_grid.json", help="Starting grid JSON")
+    parser.add_argument("--seed", type=int, default=123)
+    parser.add_argument("--engine", choices=("agent", "vector", "event"), default="vector")
+    parser.add_argument("--lap", type=int, default=1, help="Checkpoint once the leader has completed this lap")
+    parser.add_argument("--variant", action="append", default=[],
+                        help="Strategy overrides 'DRIVER:key=value[,key=value][;DRIVER:...]' (repeatable)")
+    parser.add_argument("--save", default=None, help="Also write the checkpoint to this file")
+    args = parser.parse_args()
+
+    assets = load_race_assets(args.config)
+    variants = [{}] + [_parse_variant(v) for v in args.variant]
+    model = DeltaVModel(config_file_path=args.config, seed=args.seed, engine=args.engine,
+                        record_telemetry=False, telemetry_path=None, assets=assets)
+    start = time.perf_counter()
+    run_to_lap(model, args.lap)
+    prefix_s = time.perf_counter() - start
+    data = save_checkpoint(model)
+    if args.save:
+        with open(args.save, 'wb') as f:
+            f.write(data)
+    print(f"--- CHECKPOINT: lap {args.lap}, t={model.env.now:.1f}s, {len(data)} bytes "
+          f"(prefix simulated once in {prefix_s:.2f}s) ---")
+
+    for variant in variants:
+        start = time.perf_counter()
+        fork_model = restore(data, assets=assets, overrides=variant, record_telemetry=False, telemetry_path=None)
+        result = finish(fork_model)
+        label = "; ".join(f"{d}: {c}" for d, c in variant.items()) or "baseline"
+        drivers = list(variant) or result["finishing_order"][:1]
+        places = ", ".join(f"{d} P{result['drivers'][d]['position']}" for d in drivers)
+        print(f"{label:50s} winner {result['finishing_order'][0]:12s} {places} "
+              f"({time.perf_counter() - start:.2f}s)")
@@ -0,0 +1,208 @@
+import json
+import os
+import socketserver
+import threading
+from collections import deque
+from race_events import PAUSE_CHANGE, VSC_CHANGE, WEATHER_CHANGE
+
+# Keys understood in commands.json (the dashboard's file) and their command
+FILE_KEYS = {
+    "pause_active": "pause",
+    "vsc_active": "vsc",
+    "weather": "weather",
+    "speed_multiplier": "speed",
+}
+
+
+class CommandChannel:
+    """
+    Race-control commands for a running simulation.
+
+    Commands arrive on background threads, from an mtime-cached watcher on
+    commands.json and optionally from a local TCP socket (one JSON object
+    per line), and are queued. The sim loop calls apply_pending() at tick
+    boundaries; when nothing has changed that is a single deque check with
+    no file access. While paused, wait() blocks on an event, so a resume is
+    picked up as soon as it arrives instead of on the next poll.
+
+    Commands: {"cmd": "pause"}, {"cmd": "resume"},
+    {"cmd": "vsc", "active": true}, {"cmd": "weather", "state": "WET"},
+    {"cmd": "speed", "multiplier": 4.0}
+    """
+
+    def __init__(self, command_file="commands.json", port=None, poll_interval=0.1, speed_multiplier=1.0):
+        self.command_file = command_file
+        self.poll_interval = poll_interval
+        self.paused = False
+        self.speed_multiplier = speed_multiplier
+        self._pending = deque()
+        self._changed = threading.Event()
+        self._stop = threading.Event()
+        # Values already in the file are a previous session's; only pause_active applies to this race
+        self._file_state = {}
+        if command_file:
+            data = self._load_file()
+            if isinstance(data, dict):
+                self._file_state = {key: data[key] for key in FILE_KEYS if key in data and key != "pause_active"}
+        self._threads = []
+        self._server = None
+
+        if command_file:
+            t = threading.Thread(target=self._watch_file, name="command-file-watcher", daemon=True)
+            t.start()
+            self._threads.append(t)
+        if port is not None:
+            try:
+                self._server = _CommandServer(("127.0.0.1", port), _CommandHandler)
+            except OSError as e:
+                print(f"Command socket unavailable on port {port} ({e}); using {command_file} only")
+        if self._server is not None:
+            self._server.channel = self
+            t = threading.Thread(target=self._server.serve_forever, name="command-socket", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    @property
+    def port(self):
+        return None if self._server is None else self._server.server_address[1]
+
+    # --- Producers (any thread) ---
+    def submit(self, command):
+        """Queues one command dict; raises ValueError if it is malformed."""
+        self._pending.append(self._validate(command))
+        self._changed.set()
+
+    @staticmethod
+    def _validate(command):
+        cmd = command.get("cmd") if isinstance(command, dict) else None
+        if cmd in ("pause", "resume"):
+            return (cmd, None)
+        if cmd == "vsc":
+            active = command.get("active", True)
+            if not isinstance(active, bool):
+                raise ValueError(f"VSC 'active' must be true or false, not {active!r}")
+            return (cmd, active)
+        if cmd == "weather":
+            state = str(command.get("state", "")).upper()
+            if state not in ("DRY", "WET"):
+                raise ValueError(f"Unknown weather state '{command.get('state')}'")
+            return (cmd, state)
+        if cmd == "speed":
+            multiplier = float(command.get("multiplier", 0))
+            if multiplier <= 0:
+                raise ValueError("Speed multiplier must be positive")
+            return (cmd, multiplier)
+        raise ValueError(f"Unknown command {command!r}")
+
+    # --- Consumer (sim thread, at tick boundaries) ---
+    def apply_pending(self, model):
+        """Applies every queued command to the model; returns how many were applied."""
+        if not self._pending:
+            return 0
+        applied = 0
+        while self._pending:
+            cmd, value = self._pending.popleft()
+            if cmd in ("pause", "resume"):
+                paused = cmd == "pause"
+                if self.paused != paused:
+                    model.events.emit(PAUSE_CHANGE, model.env.now, paused=paused)
+                self.paused = paused
+            elif cmd == "vsc":
+                if model.vsc_active != value:
+                    model.events.emit(VSC_CHANGE, model.env.now, active=value)
+                model.vsc_active = value
+            elif cmd == "weather":
+                if model.weather_state != value:
+                    model.events.emit(WEATHER_CHANGE, model.env.now, state=value, source="race_control")
+                model.weather_state = value
+            elif cmd == "speed":
+                self.speed_multiplier = value
+            if cmd in ("vsc", "weather"):
+                model.race_control_changed()
+            applied += 1
+        return applied
+
+    def wait(self, timeout=None):
+        """Blocks until a new command arrives (or timeout); returns True if one did."""
+        if self._changed.wait(timeout):
+            self._changed.clear()
+            return True
+        return False
+
+    def close(self):
+        self._stop.set()
+        self._changed.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for t in self._threads:
+            t.join(1.0)
+
+    # --- commands.json watcher ---
+    def _watch_file(self):
+        last_stamp = None
+        while not self._stop.is_set():
+            try:
+                st = os.stat(self.command_file)
+                stamp = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                stamp = None
+            if stamp is not None and stamp != last_stamp:
+                if self._read_file():
+                    last_stamp = stamp
+            self._stop.wait(self.poll_interval)
+
+    def _load_file(self):
+        """The parsed command file, or None if it is missing or unreadable."""
+        try:
+            with open(self.command_file, 'r') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _read_file(self):
+        """Queues commands for keys whose value changed; False if the file was unreadable."""
+        data = self._load_file()
+        if data is None:
+            # Probably caught mid-write; the next poll retries
+            return False
+        if not isinstance(data, dict):
+            return True
+        for key, cmd in FILE_KEYS.items():
+            if key not in data or self._file_state.get(key) == data[key]:
+                continue
+            self._file_state[key] = data[key]
+            value = data[key]
+            try:
+                if cmd == "pause":
+                    if not isinstance(value, bool):
+                        raise ValueError(f"must be true or false, not {value!r}")
+                    self.submit({"cmd": "pause" if value else "resume"})
+                elif cmd == "vsc":
+                    self.submit({"cmd": "vsc", "active": value})
+                elif cmd == "weather":
+                    self.submit({"cmd": "weather", "state": value})
+                else:
+                    self.submit({"cmd": "speed", "multiplier": value})
+            except (TypeError, ValueError) as e:
+                print(f"Ignoring '{key}' in {self.command_file}: {e}")
+        return True
+
+
+class _CommandServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                self.server.channel.submit(json.loads(line))
+                reply = {"ok": True}
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(reply) + "\n").encode())
@@ -0,0 +1,354 @@
+import heapq
+import math
+from running_order import rank_grid
+
+INF = float('inf')
+
+# What a car does on the ticks it is skipped over
+IDLE, IDLE_CLOCK, STALL, MOVE = range(4)
+
+
+class EventEngine:
+    """
+    Event-driven time advance on the model's simpy Environment.
+
+    A car is stepped in full (F1Agent.step) only on ticks where something
+    can change for it: reaching the end of an edge (and so the finish
+    line or the pit stall), its tyres reaching the cliff or zero, its
+    battery regime or fuel running out, a pit stop completing, or, while
+    it has no MOM yet, each tick on a detection edge, where the gap to the
+    car ahead is checked. In between, its velocity, aero mode and
+    consumption rates are constant, so those ticks are applied in closed
+    form when the car is next needed (lazily). A weather or VSC change
+    wakes every car.
+
+    Ticks stay on the same 0.1 s grid as the fixed-step engines. With
+    telemetry on, every tick is sampled (each car advanced by one tick);
+    with only live consumers, every car is brought up to date on the ticks
+    a snapshot is due (see DeltaVModel.snapshot_interval). Closed-form sums differ from repeated
+    per-tick additions in the last bits, and only the cars due on a tick
+    draw from the shuffle stream, so a seed gives an equivalent race, not
+    the identical one (weather and setup noise are the same; see rng.py).
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.agents = list(model.f1_agents)
+        self.time_step = model.time_step
+        self.track = model.compiled_track
+        n = len(self.agents)
+        # Starts at the model clock: tick 0, or the next tick of a restored checkpoint
+        start = math.ceil(model.env.now / self.time_step - 1e-9)
+        self.base = [start] * n     # ticks already applied to each car
+        self.wake = [start] * n     # next tick each car is stepped in full (None = never)
+        self.plan = [None] * n      # (mode, per-tick rates) for the skipped ticks
+        self.anchor = [None] * n    # (tick, state) the plan's closed form counts from
+        self._heap = [(start, i) for i in range(n)]
+        self.tick = start           # next tick to process
+        self.events = 0             # full car steps taken
+        self._wake_event = None
+        self._replan = False
+
+    # --- Scheduler (simpy process) ---
+    def run(self):
+        model = self.model
+        env = model.env
+        dt = self.time_step
+        while True:
+            if self._replan:
+                self._wake_everyone(env.now)
+            tick = self._next_tick()
+            if tick is None:
+                # Nobody will ever change again on their own; wait for race control
+                self._wake_event = env.event()
+                yield self._wake_event
+                continue
+            delay = tick * dt - env.now
+            if delay > 1e-9:
+                self._wake_event = env.event()
+                yield env.any_of([env.timeout(delay), self._wake_event])
+                self._wake_event = None
+                if self._replan:
+                    continue
+            profiler = model.profiler
+            if profiler is None:
+                self._process_tick(tick)
+            else:
+                start = profiler.begin_tick(tick * dt)
+                self._process_tick(tick)
+                # Everything but the snapshot phases publish_frame booked
+                profiler.add_remainder("engine_step", profiler.clock() - start)
+                profiler.end_tick((tick + 1) * dt)
+            if model.race_over:
+                self._materialize_all(tick + 1)
+                model.end_race()
+                return
+
+    def wake_all(self):
+        """Race control changed (weather / VSC): every car re-plans from the next tick."""
+        self._replan = True
+        if self._wake_event is not None and not self._wake_event.triggered:
+            self._wake_event.succeed()
+
+    def _wake_everyone(self, now):
+        self._replan = False
+        tick = max(self.tick, math.ceil(now / self.time_step - 1e-9))
+        for i, wake in enumerate(self.wake):
+            if wake is None or wake > tick:
+                self.wake[i] = tick
+                heapq.heappush(self._heap, (tick, i))
+
+    def _next_tick(self):
+        heap = self._heap
+        while heap and heap[0][0] != self.wake[heap[0][1]]:
+            heapq.heappop(heap) # superseded entry
+        tick = heap[0][0] if heap else None
+        sample = self._sample_tick()
+        if sample is not None:
+            tick = sample if tick is None else min(tick, sample)
+        return tick
+
+    def _sample_tick(self):
+        """Next tick every car must be brought up to: each tick for telemetry, else the next live frame."""
+        model = self.model
+        if model.telemetry is not None:
+            return self.tick
+        if model.has_live_consumers:
+            return max(self.tick, math.ceil(model.next_snapshot_time / self.time_step - 1e-9))
+        return None
+
+    def _process_tick(self, tick):
+        model = self.model
+        heap = self._heap
+        due = set()
+        while heap and heap[0][0] == tick:
+            _, i = heapq.heappop(heap)
+            if self.wake[i] == tick:
+                due.add(i)
+        due = sorted(due)
+
+        if due:
+            if len(due) > 1:
+                due = [due[k] for k in model.rng.shuffle.permutation(len(due)).tolist()]
+            if any(self._on_detection_edge(i) for i in due):
+                self._rank_at(tick, due)
+            for i in due:
+                self._materialize(i, tick)
+                self._step(i, tick)
+            self.events += len(due)
+
+        sample = self._sample_tick()
+        if sample is not None and tick >= sample:
+            self._materialize_all(tick + 1)
+            model.publish_frame()
+        self.tick = tick + 1
+        model.step_count = self.tick
+
+    def _on_detection_edge(self, i):
+        a = self.agents[i]
+        if a.mom_available or a.status == "FINISHED":
+            return False
+        main_edge = self.track.main_edge[a.position[0]]
+        return main_edge >= 0 and self.track.mom_detection[main_edge]
+
+    def _rank_at(self, tick, due):
+        """Car-ahead and gap from every car's distance at the start of `tick`."""
+        distances = [self._distance_at(i, tick) for i in range(len(self.agents))]
+        _, ahead, gaps = rank_grid(distances, self.model.track_length)
+        agents = self.agents
+        for i in due:
+            k = ahead[i]
+            agents[i].car_ahead = agents[k] if k >= 0 else None
+            agents[i].gap_ahead = float(gaps[i])
+
+    # --- Full steps and planning ---
+    @staticmethod
+    def _key(a):
+        return (a.position[0], a.status, a.velocity, a.aero_mode, a.mom_active, a.mom_available,
+                a.wants_to_pit, a.tyre_compound, a.tyre_grip_modifier)
+
+    def _step(self, i, tick):
+        a = self.agents[i]
+        before = self._key(a)
+        a.step()
+        self.base[i] = tick + 1
+        if self._key(a) != before or self._on_detection_edge(i):
+            # Something changed this tick; see how the car settles on the next one
+            plan, window = None, 0
+        else:
+            plan, window = self._plan(a)
+        self.plan[i] = plan
+        if plan is not None:
+            self.anchor[i] = (tick + 1, a.total_distance_traveled, a.position[1], a.battery_soc,
+                              a.fuel_energy_remaining, a.energy_recovered_this_lap_mj, a.tyre_life_remaining,
+                              a.tyre_temp, a.total_race_time_s, a.time_in_pit_stall,
+                              getattr(a, plan[8]) if plan[0] == MOVE and plan[8] else 0.0,
+                              a.mom_uses_count, a.plank_wear)
+        wake = None if window == INF else self.base[i] + window
+        self.wake[i] = wake
+        if wake is not None:
+            heapq.heappush(self._heap, (wake, i))
+
+    def _plan(self, a):
+        """
+        Per-tick rates for the coming ticks (same arithmetic as update_physics)
+        and how many ticks they hold before the car must be stepped again.
+        One tick of margin is kept on every limit, so the boundary tick itself
+        is always stepped in full.
+        """
+        dt = self.time_step
+        params = a.params
+        track = self.track
+
+        if a.velocity == 0:
+            if a.status == "PITTING" and a.position[0] == track.pit_stall_node:
+                remaining = (params.pit_time_loss_s - a.time_in_pit_stall) / dt
+                return (STALL,), max(0, math.ceil(remaining) - 2)
+            if a.status in ["RACING", "CRASHED", "OUT_OF_ENERGY"]:
+                return (IDLE_CLOCK,), INF
+            return (IDLE,), INF
+
+        next_edge = a.get_next_edge()
+        if next_edge < 0 or track.length[next_edge] <= 0:
+            return None, 0
+        distance = a.velocity * dt
+        progress_rate = distance / track.length[next_edge]
+        window = _ticks_while_above(1.0 - a.position[1], progress_rate, strict_start=True)
+
+        # --- Energy (battery first, then fuel, then regen) ---
+        x_mode = a.aero_mode == "X-MODE"
+        c2 = params.c2_x_drag if x_mode else params.c2_z_drag
+        cost = (params.c1_power * (a.velocity * a.velocity) + c2) * dt
+        if a.mom_active:
+            cost += params.mom_energy_cost
+        battery_drain = min(cost, params.battery_limit_mj)
+        soc_drain = battery_drain / a.battery_capacity_mj
+        energy_gained = 0.0 if x_mode else params.regen_per_step_mj
+        soc_gain = params.regen_soc_per_step if energy_gained > 0 else 0.0
+        if soc_drain <= 0:
+            return None, 0
+
+        soc = a.battery_soc
+        if soc > soc_drain:
+            remaining = cost - battery_drain
+            soc_rate = soc_gain - soc_drain
+            if soc_rate < 0:
+                window = min(window, _ticks_while_above(soc - soc_drain, -soc_rate, strict_start=False))
+        elif soc == (min(1.0, soc_gain) if soc_gain > 0 else 0):
+            # Battery flat: each tick drains what the last one regenerated
+            remaining = cost - soc * a.battery_capacity_mj
+            soc_rate = 0.0
+        else:
+            return None, 0
+        recovered = energy_gained if soc_gain > 0 else 0.0
+
+        fuel_drain = min(remaining, params.ice_limit_mj)
+        if fuel_drain > 0:
+            window = min(window, _ticks_while_above(a.fuel_energy_remaining - fuel_drain, fuel_drain, strict_start=False))
+
+        # --- Tyres (only while racing) ---
+        wear = temp_rate = 0.0
+        compound_clock = None
+        if a.status == "RACING":
+            if a.tyre_compound == "soft":
+                compound_clock = 'time_on_softs_s'
+            elif a.tyre_compound == "hard":
+                compound_clock = 'time_on_hards_s'
+            else:
+                compound_clock = 'time_on_mediums_s'
+            wear = params.wear_per_step(a.tyre_compound)
+            if not x_mode: wear *= 1.5
+            if a.mom_active: wear *= 2.0
+            is_wet = (self.model.weather_state == "WET")
+            is_on_dry_tyres = a.tyre_compound in ("soft", "medium", "hard")
+            if is_wet == is_on_dry_tyres:
+                wear *= 5.0
+            floor = 0.0 if a.on_cliff else params.cliff_threshold
+            if wear > 0:
+                window = min(window, _ticks_while_above(a.tyre_life_remaining - floor, wear, strict_start=True))
+
+            if x_mode:
+                temp_rate = params.temp_step_x_mom if a.mom_active else params.temp_step_x
+            else:
+                temp_rate = params.temp_step_z_mom if a.mom_active else params.temp_step_z
+
+        plank = params.plank_wear_per_step if x_mode else 0.0
+        rates = (MOVE, distance, progress_rate, soc_rate, fuel_drain, recovered,
+                 wear, temp_rate, compound_clock, plank)
+        return rates, max(0, window - 1)
+
+    # --- Applying skipped ticks ---
+    def _materialize(self, i, tick):
+        """
+        Brings car i up to the start of `tick`. Values are computed from the
+        plan's anchor (the car's state after its last full step), never from
+        the previous materialization, so they do not depend on how often the
+        car was sampled in between (snapshot rate, queries).
+        """
+        if tick <= self.base[i]:
+            return
+        plan = self.plan[i]
+        a = self.agents[i]
+        dt = self.time_step
+        mode = plan[0]
+        (tick0, distance0, progress0, soc0, fuel0, recovered0, life0, temp0,
+         race_time0, stall0, clock0, mom_uses0, plank0) = self.anchor[i]
+        k = tick - tick0
+        if mode == STALL:
+            a.time_in_pit_stall = stall0 + k * dt
+            a.total_race_time_s = race_time0 + k * dt
+        elif mode == IDLE_CLOCK:
+            a.total_race_time_s = race_time0 + k * dt
+        elif mode == MOVE:
+            (_, distance, progress_rate, soc_rate, fuel_drain, recovered,
+             wear, temp_rate, compound_clock, plank) = plan
+            a.total_distance_traveled = distance0 + k * distance
+            a.position = (a.position[0], progress0 + k * progress_rate)
+            if soc_rate > 0:
+                a.battery_soc = min(1.0, soc0 + k * soc_rate)
+            elif soc_rate < 0:
+                a.battery_soc = soc0 + k * soc_rate
+            a.fuel_energy_remaining = fuel0 - k * fuel_drain
+            a.energy_recovered_this_lap_mj = recovered0 + k * recovered
+            if compound_clock is not None:
+                setattr(a, compound_clock, clock0 + k * dt)
+                a.tyre_life_remaining = life0 - k * wear
+                a.tyre_temp = min(110.0, max(95.0, temp0 + k * temp_rate))
+            if a.mom_active:
+                a.mom_uses_count = mom_uses0 + k
+            a.total_race_time_s = race_time0 + k * dt
+            if self.model.telemetry is not None:
+                a.record_telemetry_step() # telemetry samples every tick: plank wear + one row
+            else:
+                a.plank_wear = plank0 + k * plank
+        self.base[i] = tick
+
+    def _materialize_all(self, tick):
+        for i in range(len(self.agents)):
+            self._materialize(i, tick)
+
+    def _distance_at(self, i, tick):
+        plan = self.plan[i]
+        if tick > self.base[i] and plan[0] == MOVE:
+            anchor = self.anchor[i]
+            return anchor[1] + (tick - anchor[0]) * plan[1]
+        return self.agents[i].total_distance_traveled
+
+    def sync_agents(self):
+        """Brings every car up to the model clock (e.g. after env.run(until=...) stops mid-plan)."""
+        self._materialize_all(max(self.tick, math.ceil(self.model.env.now / self.time_step - 1e-9)))
+
+
+def _ticks_while_above(margin, rate, strict_start):
+    """
+    Number of upcoming ticks j >= 1 for which margin - j * rate stays > 0
+    (strict_start=True) or margin - (j - 1) * rate stays > 0 (the check
+    happens before the tick's change is applied).
+    """
+    if rate <= 0:
+        return INF
+    if not strict_start:
+        margin += rate
+    if margin <= 0:
+        return 0
+    return max(0, math.ceil(margin / rate) - 1)
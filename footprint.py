@@ -0,0 +1,55 @@
+import argparse
+import sys
+import timeit
+import tracemalloc
+from agent import F1Agent
+from model import DeltaVModel, load_race_assets
+
+
+def agent_bytes(model, count=1000):
+    """Bytes allocated per F1Agent (the car itself, not its shared strategy/params), from tracemalloc."""
+    template = model.f1_agents[0]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    agents = [F1Agent(f"car{i}", model, template.strategy, template.params) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del agents
+    return allocated / count
+
+
+def finished_agent_bytes(model):
+    """Shallow size of each car after a race: object, instance dict (if any), lap_times and position."""
+    sizes = []
+    for a in model.f1_agents:
+        size = sys.getsizeof(a) + sys.getsizeof(a.lap_times) + sys.getsizeof(a.position)
+        if hasattr(a, '__dict__'):
+            size += sys.getsizeof(a.__dict__)
+        sizes.append(size)
+    return sum(sizes) / len(sizes)
+
+
+def attribute_access_ns(agent, number=1_000_000):
+    """Nanoseconds per read and per write of a hot attribute (battery_soc)."""
+    read = min(timeit.repeat("a.battery_soc", globals={'a': agent}, number=number, repeat=5))
+    write = min(timeit.repeat("a.battery_soc = 0.5", globals={'a': agent}, number=number, repeat=5))
+    return read / number * 1e9, write / number * 1e9
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory per F1Agent and attribute access cost.")
+    parser.add_argument("config", nargs="?", default="starting_grid.json", help="Starting grid JSON")
+    parser.add_argument("--agents", type=int, default=1000, help="Cars to allocate for the memory measurement")
+    parser.add_argument("--seed", type=int, default=123)
+    args = parser.parse_args()
+
+    assets = load_race_assets(args.config)
+    model = DeltaVModel(seed=args.seed, record_telemetry=False, telemetry_path=None, assets=assets)
+    model.env.run(until=model.race_laps * 92 * 2)
+    read_ns, write_ns = attribute_access_ns(model.f1_agents[0])
+    print(f"--- {type(model.f1_agents[0]).__name__} ({'__slots__' if not hasattr(model.f1_agents[0], '__dict__') else '__dict__'}) ---")
+    print(f"new agent:        {agent_bytes(model, args.agents):8.0f} bytes")
+    print(f"finished agent:   {finished_agent_bytes(model):8.0f} bytes (shallow, after {model.race_laps} laps)")
+    print(f"attribute read:   {read_ns:8.1f} ns")
+    print(f"attribute write:  {write_ns:8.1f} ns")
@@ -0,0 +1,131 @@
+import math
+from collections import deque
+
+NUM_SECTORS = 3
+ROLLING_LAPS = 5 # laps in the rolling average
+
+
+def sector_starts(track, sectors=NUM_SECTORS):
+    """
+    Per-node sector number for the nodes where sectors 2..n begin (0 for
+    every other node). The main-line lap from the finish line is split
+    into `sectors` equal distances; each boundary is the first node at or
+    past its share of the lap.
+    """
+    starts = [0] * track.num_nodes
+    finish = [e for e in range(track.num_edges) if track.is_finish_line[e] and not track.is_pit_lane[e]]
+    if not finish:
+        return starts
+    first = track.edge_dst[finish[0]]
+    walk = [] # (node, distance from the line)
+    node, covered = first, 0.0
+    for _ in range(track.num_nodes):
+        edge = track.main_or_first[node]
+        if edge < 0:
+            return starts
+        covered += track.length[edge]
+        node = track.edge_dst[edge]
+        if node == first:
+            break
+        walk.append((node, covered))
+    lap_length = covered
+    for k in range(1, sectors):
+        target = lap_length * k / sectors
+        for node, distance in walk:
+            if distance >= target:
+                starts[node] = starts[node] or k
+                break
+    return starts
+
+
+class LapStats:
+    """
+    One car's running lap statistics, each update O(1).
+
+    complete_lap() is called at every finish-line crossing with the car's
+    race time; it returns the lap time (race time minus the running total,
+    the same value `total_race_time_s - sum(lap_times)` gave) and updates
+    last/fastest lap, the rolling average, sector splits and the gap to the
+    leader and interval to the car ahead at the line (via the model's
+    LapBoard). split() is called when the car reaches a sector start node.
+    """
+
+    __slots__ = ('laps', 'total_time', 'last_lap', 'fastest_lap', 'fastest_lap_number',
+                 '_recent', 'sectors', 'last_sectors', 'best_sectors', '_mark',
+                 'gap_to_leader', 'interval')
+
+    def __init__(self, sectors=NUM_SECTORS, rolling_laps=ROLLING_LAPS):
+        self.laps = 0
+        self.total_time = 0.0       # race time at the last crossing (sum of lap times)
+        self.last_lap = 0.0
+        self.fastest_lap = 0.0
+        self.fastest_lap_number = 0
+        self._recent = deque(maxlen=rolling_laps)
+        self.sectors = [None] * sectors       # current lap's splits so far
+        self.last_sectors = [None] * sectors
+        self.best_sectors = [None] * sectors
+        self._mark = 0.0                      # race time at the last split
+        self.gap_to_leader = 0.0
+        self.interval = 0.0
+
+    @property
+    def rolling_average(self):
+        """Mean of the last ROLLING_LAPS lap times (0.0 before the first lap)."""
+        return sum(self._recent) / len(self._recent) if self._recent else 0.0
+
+    def split(self, sector, race_time):
+        """The car reached the start of `sector` (1-based boundary index)."""
+        self.sectors[sector - 1] = race_time - self._mark
+        self._mark = race_time
+
+    def complete_lap(self, race_time, board=None):
+        """Records a finish-line crossing at `race_time` and returns the lap time."""
+        lap_time = race_time - self.total_time
+        self.total_time += lap_time
+        self.laps += 1
+        self.last_lap = lap_time
+        if self.laps == 1 or lap_time < self.fastest_lap:
+            self.fastest_lap = lap_time
+            self.fastest_lap_number = self.laps
+        self._recent.append(lap_time)
+
+        sectors = self.sectors
+        sectors[-1] = race_time - self._mark
+        for k, sector_time in enumerate(sectors):
+            best = self.best_sectors[k]
+            if sector_time is not None and (best is None or sector_time < best):
+                self.best_sectors[k] = sector_time
+        self.last_sectors = sectors
+        self.sectors = [None] * len(sectors)
+        self._mark = race_time
+
+        if board is not None:
+            self.gap_to_leader, self.interval = board.crossing(self.laps, race_time)
+        return lap_time
+
+
+class LapBoard:
+    """
+    Finish-line crossing times shared by the grid: when each lap number was
+    first completed (the leader) and most recently completed (the car
+    ahead on the road), so gap and interval at the line are O(1).
+    """
+
+    __slots__ = ('leader_times', 'last_times')
+
+    def __init__(self):
+        self.leader_times = [math.nan]
+        self.last_times = [math.nan]
+
+    def crossing(self, lap, race_time):
+        """Records a car completing `lap` at `race_time`; returns (gap_to_leader, interval)."""
+        while lap >= len(self.leader_times):
+            self.leader_times.append(math.nan)
+            self.last_times.append(math.nan)
+        leader = self.leader_times[lap]
+        if leader != leader: # first car to complete this lap
+            self.leader_times[lap] = self.last_times[lap] = race_time
+            return 0.0, 0.0
+        interval = race_time - self.last_times[lap]
+        self.last_times[lap] = race_time
+        return race_time - leader, interval
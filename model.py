@@ -1,215 +1,463 @@
+import math
+import os
 import random
 import json
 import simpy
-import copy
-import os
-import glob
 import time
-from datetime import datetime
-from mesa import Model
 from agent import F1Agent
-from track_graph import build_bahrain_track
+from track_compiler import compile_track
+from track_data import load_track
+from strategy import compile_strategy
+from lap_stats import LapBoard, sector_starts
+from running_order import rank_grid
+from rng import RaceStreams
+from race_events import RaceEventBus, WEATHER_CHANGE
+from profiler import TickProfiler, TimedRecorder
+from telemetry import TelemetryRecorder
+from telemetry_export import export_telemetry
+from snapshot_writer import SnapshotWriter, write_simulation_data  # write_simulation_data re-exported for callers
+
+
+def load_race_assets(config_file_path):
+    """
+    Reads a grid config, every strategy file it references and the track
+    once, so many DeltaVModel runs can share them (see monte_carlo.py).
+    Strategy files are validated here (ValueError names the bad file).
+
+    The config's "track" names a track file (see track_data.py), loaded
+    from its compiled artifact; without one the built-in Bahrain graph is
+    compiled ("track" is then that networkx graph, else None). Relative
+    file names are looked up next to the config, then in the working
+    directory.
+    """
+    with open(config_file_path, 'r') as f:
+        config = json.load(f)
+    if config.get('track'):
+        track = None
+        compiled_track = load_track(_config_path(config['track'], config_file_path))
+    else:
+        from track_graph import build_bahrain_track # networkx is only needed for the built-in track
+        track = build_bahrain_track()
+        compiled_track = compile_track(track)
+    time_step = config['simulation_params']['time_step']
+    strategies = {}
+    for driver_data in config['grid']:
+        strategy_file = driver_data['strategy_file']
+        if strategy_file not in strategies:
+            with open(_config_path(strategy_file, config_file_path), 'r') as f:
+                strategies[strategy_file] = json.load(f)
+            if not isinstance(strategies[strategy_file].get("strategy"), dict):
+                raise ValueError(f"{strategy_file}: missing 'strategy' block")
+            compile_strategy(strategies[strategy_file]["strategy"], compiled_track, time_step, source=strategy_file)
+    return {
+        "config": config,
+        "strategies": strategies,
+        "track": track,
+        "compiled_track": compiled_track,
+    }
 
-# --- (write_simulation_data function is unchanged) ---
-def write_simulation_data(data, folder=".", prefix="data_snapshot_", keep_last=12):
-    try:
-        os.makedirs(folder, exist_ok=True)
-    except Exception:
-        pass
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-    fname = f"{prefix}{ts}.json"
-    temp_path = os.path.join(folder, f"{fname}.tmp")
-    final_path = os.path.join(folder, fname)
-    try:
-        with open(temp_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-        os.rename(temp_path, final_path)
-    except Exception as e:
-        print(f"Error writing snapshot file {final_path}: {e}")
-        if os.path.exists(temp_path):
-            try: os.remove(temp_path)
-            except Exception: pass
-        return None
-    try:
-        pattern = os.path.join(folder, f"{prefix}*.json")
-        files = sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)
-        for old in files[keep_last:]:
-            try:
-                os.remove(old)
-            except Exception:
-                pass
-    except Exception:
-        pass
-    return final_path
-# --- (End of function) ---
 
+def build_grid(assets, setup, model=None, tables=None):
+    """
+    The starting grid's F1Agents, in grid order: each car's strategy with
+    its setup noise (one batched draw per factor from the `setup` stream,
+    see rng.RaceStreams), compiled for the track, and the car placed on its
+    grid slot. `model` is the DeltaVModel the cars race in; BatchEngine
+    builds cars without one and only reads their state.
+    """
+    starting_grid = assets['config']['grid']
+    strategy_cache = assets['strategies']
+    track = assets['compiled_track']
+    time_step = assets['config']['simulation_params']['time_step']
+    # --- Car-to-car variability: one batched draw per factor for the whole grid ---
+    n = len(starting_grid)
+    plank_noises = setup.uniform(0.97, 1.03, n).tolist() # +/- 3%
+    g_noises = setup.uniform(0.98, 1.02, n).tolist() # +/- 2%
+    speed_noises = setup.uniform(0.99, 1.01, n).tolist()
+    grip_noises = setup.uniform(0.95, 1.05, n).tolist()
+    mom_noises = setup.uniform(0.95, 1.05, n).tolist()
+    agents = []
+    for car, driver_data in enumerate(starting_grid):
+        strategy_file = driver_data['strategy_file']
+        # Shallow copy: the noise below only replaces top-level numbers, so nested
+        # values (the energy map) are shared between cars instead of duplicated
+        strategy_config = dict(strategy_cache[strategy_file]["strategy"])
 
-class DeltaVModel(Model):
-    def __init__(self, config_file_path, seed=None, live_snapshot_mode=False):
+        strategy_config["plank_wear_factor"] = plank_noises[car]
+        strategy_config["g_factor"] = g_noises[car]
+
+        if "haas" not in strategy_file:
+            strategy_config["standard_top_speed_kph"] *= speed_noises[car]
+            strategy_config["grip_factor"] *= grip_noises[car]
+            if "mom_aggressiveness" in strategy_config:
+                strategy_config["mom_aggressiveness"] *= mom_noises[car]
+        # Compiled after the noise, so the per-car values are baked in
+        params = compile_strategy(strategy_config, track, time_step, source=strategy_file, tables=tables)
+        a = F1Agent(
+            unique_id=driver_data['driver'],
+            model=model,
+            strategy_config=strategy_config,
+            params=params
+        )
+        a.team = driver_data['team']
+        a.telemetry_id = car
+        a.tyre_compound = driver_data['tyre']
+        start_pos_meters = driver_data['pos'] * 10.0
+        start_edge = track.start_edge
+        start_edge_length = track.length[start_edge]
+        start_progress = -(start_pos_meters / start_edge_length)
+        a.position = (track.edge_src[start_edge], start_progress)
+        a.total_distance_traveled = start_progress * start_edge_length
+        agents.append(a)
+    return agents
+
+
+def _config_path(path, config_file_path):
+    """A file named in a grid config: next to the config if it is there, else as given."""
+    beside = os.path.join(os.path.dirname(os.path.abspath(config_file_path)), path)
+    return beside if os.path.exists(beside) else path
+
+
+class DeltaVModel:
+    def __init__(self, config_file_path=None, seed=None, live_snapshot_mode=False, engine="agent",
+                 record_telemetry=True, telemetry_path="telemetry_history.json", shared_state_name=None,
+                 assets=None, snapshot_interval=None, profile=False, replace_shared_state=False):
         self.env = simpy.Environment()
+        self.config_file_path = config_file_path
         self.seed = seed if seed is not None else random.randint(0, 1000000)
-        self.random = random.Random(self.seed)
+        # Independent streams per subsystem (setup, shuffle, weather, sensor, ...), see rng.py
+        self.rng = RaceStreams(self.seed)
         self.running = True
         self.space = None
         self.live_snapshot_mode = live_snapshot_mode
+        # Live-mode snapshots are serialized and pruned on a background thread
+        self.snapshot_writer = SnapshotWriter() if live_snapshot_mode else None
+        self.shared_state = None # set below once the grid size is known
+        self.publish_frames = True # cleared by the pacer to skip live frames when behind
+        self.snapshot_interval = snapshot_interval # sim-seconds between live frames (None = every tick)
+        self.next_snapshot_time = 0.0
         self.vsc_active = False
         self.step_count = 0
         self.race_over = False
+        self.running_order = []
+        # Typed race events (laps, MOM, pits, cliffs, weather, flag); silent until a sink subscribes
+        self.events = RaceEventBus()
+        # Per-phase loop timings (None = not profiled; the loop then takes no timestamps)
+        self.profiler = None
+        self.next_tick_time = 0.0 # when run_simulation_steps steps next (checkpoints)
+        self.weather_pending = None # (phase, end time) of weather_system's current wait
         
         # --- Weather State ---
         self.weather_state = "DRY"
         
-        with open(config_file_path, 'r') as f:
-            self.config = json.load(f)
+        # Preloaded assets (load_race_assets) are shared read-only; strategies are copied per car
+        if assets is None:
+            assets = load_race_assets(config_file_path)
+        self.config = assets['config']
         sim_params = self.config['simulation_params']
         starting_grid = self.config['grid']
         self.num_agents = len(starting_grid)
         self.time_step = sim_params['time_step']
+        if profile:
+            self.profiler = TickProfiler(self.time_step, self.snapshot_writer)
         self.race_laps = self.config['simulation_params']['race_laps']
-        self.track = build_bahrain_track()
-        self.track_length = sum(data['length'] for u, v, data in self.track.edges(data=True))
-        self.f1_agents = []
-        strategy_cache = {}
-        for driver_data in starting_grid:
-            strategy_file = driver_data['strategy_file']
-            if strategy_file not in strategy_cache:
-                with open(strategy_file, 'r') as f:
-                    strategy_cache[strategy_file] = json.load(f) 
-            strategy_config = copy.deepcopy(strategy_cache[strategy_file]["strategy"])
-            
-            # --- START FINAL RANDOMNESS (for car-to-car variability) ---
-            plank_noise = self.random.uniform(0.97, 1.03) # +/- 3%
-            g_noise = self.random.uniform(0.98, 1.02) # +/- 2%
-            
-            strategy_config["plank_wear_factor"] = plank_noise
-            strategy_config["g_factor"] = g_noise
-            # --- END FINAL RANDOMNESS ---
-
-            if "haas" not in strategy_file:
-                speed_noise = self.random.uniform(0.99, 1.01)
-                strategy_config["standard_top_speed_kph"] *= speed_noise
-                grip_noise = self.random.uniform(0.95, 1.05)
-                strategy_config["grip_factor"] *= grip_noise
-                if "mom_aggressiveness" in strategy_config:
-                    mom_noise = self.random.uniform(0.95, 1.05)
-                    strategy_config["mom_aggressiveness"] *= mom_noise
-            a = F1Agent(
-                unique_id=driver_data['driver'], 
-                model=self, 
-                strategy_config=strategy_config
-            )
-            a.team = driver_data['team']
-            a.tyre_compound = driver_data['tyre']
-            start_pos_meters = driver_data['pos'] * 10.0
-            start_node_edge = self.track.get_edge_data("n_t15_apex", "n_t1_brake")
-            start_progress = -(start_pos_meters / start_node_edge['length'])
-            a.position = ("n_t15_apex", start_progress)
-            a.total_distance_traveled = start_progress * start_node_edge['length']
-            self.f1_agents.append(a)
+        self.track = assets['track']
+        # Compiled once: integer node/edge IDs and flat per-edge arrays for the hot path
+        self.compiled_track = assets['compiled_track']
+        self.track_length = self.compiled_track.track_length
+        # --- Lap statistics: sector start nodes and the grid's finish-line crossings ---
+        self.sector_start = sector_starts(self.compiled_track)
+        self.lap_board = LapBoard()
+        # --- Columnar telemetry shared by every car (None = not recorded) ---
+        self.telemetry = None
+        self.telemetry_path = telemetry_path # .json/.jsonl/.csv/.npz/.parquet, None = no dump
+        if record_telemetry:
+            self.telemetry = TelemetryRecorder([d['driver'] for d in starting_grid],
+                                               self.race_laps, self.time_step)
+        # --- Optional shared-memory live state for local dashboards ---
+        if shared_state_name:
+            from shared_state import SharedStateChannel
+            self.shared_state = SharedStateChannel(shared_state_name, max_cars=self.num_agents,
+                                                   replace=replace_shared_state)
+        self.decision_tables = {} # make_decision speed rows shared by cars with equal speeds/grips
+        self.f1_agents = build_grid(assets, self.rng.setup, model=self, tables=self.decision_tables)
+
+        self._start(engine)
+
+    def _start(self, engine, resume=None):
+        """
+        Builds the physics engine and starts the SimPy processes. `resume`
+        (from checkpoint.restore) carries the next tick time and the pending
+        weather timeout, so the processes pick up where the checkpointed ones
+        stopped instead of starting a new race.
+        """
+        # --- Physics engine: "agent" steps each F1Agent, "vector" advances the grid as arrays,
+        # "event" only wakes a car when something can change for it ---
+        if engine == "vector":
+            from vector_engine import VectorEngine
+            self.engine = VectorEngine(self)
+        elif engine == "event":
+            from event_engine import EventEngine
+            self.engine = EventEngine(self)
+        elif engine == "agent":
+            self.engine = None
+        else:
+            raise ValueError(f"Unknown engine '{engine}' (expected 'agent', 'vector' or 'event')")
+        self.engine_name = engine
             
         # --- Start SimPy Processes ---
-        self.env.process(self.run_simulation_steps())
+        resume = resume or {}
+        if engine == "event":
+            self.race_process = self.env.process(self.engine.run())
+        else:
+            self.race_process = self.env.process(self.run_simulation_steps(resume.get('next_tick_time')))
         
         # --- REMOVED RANDOMNESS: Random VSC is disabled. ---
         # The dashboard is now the sole source of race control.
         # self.env.process(self.race_master_events()) 
         # --- END REMOVED RANDOMNESS ---
         
-        self.env.process(self.weather_system())
+        self.env.process(self.weather_system(resume.get('weather_pending')))
 
-    def run_simulation_steps(self):
+    def _delay_until(self, when):
+        """Timeout delay that lands exactly on sim time `when` (now + (when - now) can be an ulp off)."""
+        now = self.env.now
+        delay = max(0.0, when - now)
+        while delay > 0 and now + delay > when:
+            delay = math.nextafter(delay, 0.0)
+        while now + delay < when:
+            delay = math.nextafter(delay, math.inf)
+        return delay
+
+    def run_simulation_steps(self, resume_at=None):
         try:
+            if resume_at is not None:
+                yield self.env.timeout(self._delay_until(resume_at))
             while True:
-                self.random.shuffle(self.f1_agents)
-                for agent in self.f1_agents:
-                    agent.step()
-                
-                data = self.get_simulation_data()
-                
-                if self.live_snapshot_mode:
-                    write_simulation_data(data)
+                if self.profiler is not None:
+                    self._profiled_step(self.profiler)
+                elif self.engine is not None:
+                    self.engine.step()
+                    self.publish_frame()
+                else:
+                    self.update_running_order()
+                    agents = self.f1_agents
+                    agents[:] = [agents[i] for i in self.rng.shuffle.permutation(len(agents)).tolist()]
+                    for agent in self.f1_agents:
+                        agent.step()
+                    self.publish_frame()
                 
                 self.step_count += 1
                 
                 if self.race_over:
-                    print("--- CHEQUERED FLAG: Race has ended. ---")
-                    self.running = False
-                    
-                    # --- NEW: Dump all historical telemetry ---
-                    num_records = self.dump_full_telemetry()
-                    print(f"--- TELEMETRY DUMPED: {num_records} records saved to telemetry_history.json ---")
-                    # --- END NEW ---
-                    
+                    self.end_race()
                     break
                         
+                self.next_tick_time = self.env.now + self.time_step
                 yield self.env.timeout(self.time_step)
         except simpy.Interrupt:
             self.running = False
+            self.close()
             print("Simulation interrupted.")
 
+    def _profiled_step(self, profiler):
+        """One tick of run_simulation_steps with every phase timed (DeltaVModel(profile=True))."""
+        clock = profiler.clock
+        start = profiler.begin_tick(self.env.now)
+        if self.engine is not None:
+            self.engine.step()
+            profiler.add("engine_step", clock() - start)
+        else:
+            self.update_running_order()
+            ranked = clock()
+            agents = self.f1_agents
+            agents[:] = [agents[i] for i in self.rng.shuffle.permutation(len(agents)).tolist()]
+            shuffled = clock()
+            profiler.add("running_order", ranked - start)
+            profiler.add("shuffle", shuffled - ranked)
+
+            # update_physics records telemetry itself; a timing stand-in splits that part out
+            recorder = self.telemetry
+            timed = TimedRecorder(recorder, clock) if recorder is not None else None
+            if timed is not None:
+                self.telemetry = timed
+            perceive = decide = physics = 0.0
+            try:
+                for agent in self.f1_agents:
+                    t0 = clock()
+                    agent.perceive()
+                    t1 = clock()
+                    agent.make_decision()
+                    t2 = clock()
+                    agent.update_physics()
+                    t3 = clock()
+                    perceive += t1 - t0
+                    decide += t2 - t1
+                    physics += t3 - t2
+            finally:
+                if timed is not None:
+                    self.telemetry = recorder
+            profiler.add("perceive", perceive)
+            profiler.add("make_decision", decide)
+            if timed is not None:
+                physics -= timed.elapsed
+                profiler.add("record_telemetry_step", timed.elapsed)
+            profiler.add("update_physics", physics)
+        self.publish_frame()
+        profiler.end_tick(self.env.now + self.time_step)
+
+    @property
+    def has_live_consumers(self):
+        return self.snapshot_writer is not None or self.shared_state is not None
+
+    def publish_frame(self):
+        """
+        Builds a snapshot and hands it to the live consumers. Nothing is built
+        when nobody is attached, while the pacer is dropping frames, or before
+        snapshot_interval has passed since the last frame.
+        """
+        if not self.has_live_consumers or not self.publish_frames:
+            return
+        now = self.env.now
+        if now < self.next_snapshot_time - 1e-9:
+            return
+        if self.snapshot_interval:
+            # Anchored to multiples of the interval, so the rate does not drift with time_step
+            while self.next_snapshot_time <= now + 1e-9:
+                self.next_snapshot_time += self.snapshot_interval
+        profiler = self.profiler
+        if profiler is not None:
+            start = profiler.clock()
+        data = self.get_simulation_data()
+        if profiler is not None:
+            built = profiler.clock()
+        
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.submit(data)
+        if self.shared_state is not None:
+            self.shared_state.publish(data)
+        if profiler is not None:
+            profiler.add("get_simulation_data", built - start)
+            profiler.add("write_simulation_data", profiler.clock() - built)
+
+    def end_race(self):
+        self.running = False
+        self.sync_agents()
+        # The chequered-flag frame stays in shared memory until the owner calls close()
+        if self.shared_state is not None:
+            self.shared_state.publish(self.get_simulation_data())
+        self.close(release_shared_state=False)
+        
+        # --- NEW: Dump all historical telemetry ---
+        if self.telemetry is not None and self.telemetry_path:
+            num_records = self.dump_full_telemetry()
+            print(f"--- TELEMETRY DUMPED: {num_records} records saved to {self.telemetry_path} ---")
+        # --- END NEW ---
+
+    def race_control_changed(self):
+        """
+        Weather or VSC changed mid-race. The event engine re-plans every car it
+        has skipped ahead; the fixed-step engines pick it up on the next tick.
+        """
+        wake_all = getattr(self.engine, "wake_all", None)
+        if wake_all is not None:
+            wake_all()
+
+    def sync_agents(self):
+        """
+        Brings the F1Agent objects up to date with the engine: the vector
+        engine writes its arrays back, the event engine applies skipped ticks.
+        Called before anything reads the agents (snapshots, checkpoints, results).
+        """
+        sync = getattr(self.engine, "sync_agents", None)
+        if sync is not None:
+            sync()
+
+    def close(self, release_shared_state=True):
+        """
+        Flushes and stops background output (snapshot writer, event sinks)
+        and removes the shared state block; end_race keeps the block up
+        (release_shared_state=False) so dashboards can read the final frame.
+        """
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.close()
+        if self.shared_state is not None and release_shared_state:
+            self.shared_state.close()
+        self.events.close()
+
+    def update_running_order(self):
+        """
+        Ranks the grid by total_distance_traveled once per tick and hands every
+        agent its car-ahead and gap, so perceive() no longer scans the field.
+        """
+        agents = self.f1_agents
+        order, ahead, gaps = rank_grid([a.total_distance_traveled for a in agents], self.track_length)
+        for agent, j, gap in zip(agents, ahead.tolist(), gaps.tolist()):
+            agent.car_ahead = agents[j] if j >= 0 else None
+            agent.gap_ahead = gap
+        self.running_order = [agents[i] for i in order.tolist()]
+
     def race_master_events(self):
         """
         This process is now inactive in this deterministic version.
         """
         pass
 
-    def weather_system(self):
+    def weather_system(self, resume=None):
         """
         Implements a continuous weather cycle: (Dry Wait) -> (Rain for 10 Laps) -> (Dry Wait)
+        The pending phase and its end time are kept in weather_pending, so a
+        restored checkpoint can resume the cycle (`resume`) mid-wait.
         """
         RAIN_DURATION_SECONDS = 900.0 # Approx 10 laps (90s/lap)
 
+        weather = self.rng.weather
         while not self.race_over:
-            # 1. DRY PHASE: Wait for a random period (10-20 min of sim time)
-            if self.weather_state == "DRY":
-                time_to_rain_check = self.random.uniform(600, 1200) 
-                yield self.env.timeout(time_to_rain_check)
+            if resume is not None:
+                phase, until = resume
+                resume = None
+                wait = self._delay_until(until)
+            else:
+                phase = self.weather_state
+                # 1. DRY PHASE: Wait for a random period (10-20 min of sim time)
+                if phase == "DRY":
+                    wait = weather.uniform(600, 1200)
+                # 2. WET PHASE: Rain is falling, wait for the fixed 10-lap duration
+                else:
+                    wait = RAIN_DURATION_SECONDS
+            self.weather_pending = (phase, self.env.now + wait)
+            yield self.env.timeout(wait)
 
-                if self.race_over: return
-                
+            if self.race_over: return
+
+            if phase == "DRY":
                 # Check for rain chance (50% chance of the dry period ending)
-                if self.random.random() < 0.5: 
+                if weather.random() < 0.5:
                      self.weather_state = "WET"
-                     print(f"\n--- WEATHER: IT'S STARTING TO RAIN! (t={self.env.now:.1f}s) ---\n")
-            
-            # 2. WET PHASE: Rain is falling, wait for the duration
-            elif self.weather_state == "WET":
-                print(f"--- RAIN: Expecting track to dry in {RAIN_DURATION_SECONDS/60:.0f} minutes. ---")
-                
-                # Wait for the fixed 10-lap duration
-                yield self.env.timeout(RAIN_DURATION_SECONDS)
-
-                if self.race_over: return
-                
+                     self.race_control_changed()
+                     self.events.emit(WEATHER_CHANGE, self.env.now, state="WET", source="weather",
+                                      duration_s=RAIN_DURATION_SECONDS)
+            else:
                 # Track dries up
                 self.weather_state = "DRY"
-                print(f"\n--- WEATHER: THE TRACK IS DRYING UP! (t={self.env.now:.1f}s) ---\n")
+                self.race_control_changed()
+                self.events.emit(WEATHER_CHANGE, self.env.now, state="DRY", source="weather")
 
     # --- NEW: Telemetry Dump Function ---
-    def dump_full_telemetry(self):
+    def dump_full_telemetry(self, path=None, fmt=None):
         """
-        Compiles the telemetry_history from all agents into a single JSON file.
+        Streams the shared telemetry recorder to a file the dashboard can
+        access (format from the extension unless fmt is given).
         Used for CSV export after the race.
         """
-        all_telemetry = []
-        for agent in self.f1_agents:
-            # Add the history for each agent
-            all_telemetry.extend(agent.telemetry_history)
-        
-        # Sort by simulation time
-        all_telemetry.sort(key=lambda x: x['sim_time'])
-
-        # Write the data to a file that the dashboard can access
-        with open("telemetry_history.json", "w") as f:
-            json.dump(all_telemetry, f, indent=2)
-
-        return len(all_telemetry)
+        return export_telemetry(self.telemetry, path or self.telemetry_path, fmt=fmt)
     # --- END NEW ---
 
     def get_simulation_data(self):
         """
         Builds a dictionary of the current simulation state
         """
+        self.sync_agents()
         
         def format_lap_time(s):
             if s <= 0: return "0:00.000"
@@ -237,30 +485,35 @@ class DeltaVModel(Model):
             "weather": self.weather_state
         }
 
+        # Sensor noise for the whole grid in one draw per signal
+        sensor = self.rng.sensor
+        n = len(sorted_agents)
+        energy_noises = sensor.uniform(0.98, 1.02, n).tolist()
+        tyre_noises = sensor.uniform(0.99, 1.01, n).tolist()
+        temp_noises = sensor.uniform(-1.0, 1.0, n).tolist()
+
         agent_list = []
         for i, agent in enumerate(sorted_agents):
             
-            # --- Position Interpolation (Unchanged) ---
-            start_node_name = agent.position[0]
+            # --- Position Interpolation ---
+            start_node = agent.position[0]
             progress_on_edge = agent.position[1]
-            end_node_name = agent.get_next_node_from_successors()
-            start_pos = self.track.nodes[start_node_name]['pos']
-            end_pos = None
-            if end_node_name and end_node_name in self.track.nodes:
-                end_pos = self.track.nodes[end_node_name]['pos']
+            next_edge = agent.get_next_edge()
+            start_pos = self.compiled_track.node_pos[start_node]
+            if next_edge >= 0:
+                end_pos = self.compiled_track.node_pos[self.compiled_track.edge_dst[next_edge]]
             else:
                 end_pos = start_pos
             interp_x = start_pos[0] + (end_pos[0] - start_pos[0]) * progress_on_edge
             interp_y = start_pos[1] + (end_pos[1] - start_pos[1]) * progress_on_edge
             interpolated_position = [interp_x, interp_y]
 
-            last_lap_s = agent.lap_times[-1] if agent.lap_times else 0.0
-            fastest_lap_s = min(agent.lap_times) if agent.lap_times else 0.0
+            stats = agent.lap_stats # O(1) running values, no scan of lap_times
             
             # --- START NOISE CALCULATION ---
-            energy_noise_factor = self.random.uniform(0.98, 1.02)
-            tyre_noise_factor = self.random.uniform(0.99, 1.01)
-            temp_noise_absolute = self.random.uniform(-1.0, 1.0)
+            energy_noise_factor = energy_noises[i]
+            tyre_noise_factor = tyre_noises[i]
+            temp_noise_absolute = temp_noises[i]
             
             # 1. SOC (0.0 to 1.0)
             noisy_soc = agent.battery_soc * energy_noise_factor
@@ -287,8 +540,12 @@ class DeltaVModel(Model):
                 "status": agent.status,
                 "lap_data": {
                     "current_lap": agent.laps_completed + 1,
-                    "last_lap_time": format_lap_time(last_lap_s),
-                    "fastest_lap_time": format_lap_time(fastest_lap_s)
+                    "last_lap_time": format_lap_time(stats.last_lap),
+                    "fastest_lap_time": format_lap_time(stats.fastest_lap),
+                    "average_lap_time": format_lap_time(stats.rolling_average),
+                    "last_sectors": [None if t is None else round(t, 3) for t in stats.last_sectors],
+                    "gap_to_leader": round(stats.gap_to_leader, 3),
+                    "interval": round(stats.interval, 3)
                 },
                 "vehicle_state": {
                     "battery_soc": round(noisy_soc, 2),
@@ -309,4 +566,6 @@ class DeltaVModel(Model):
             "race_status": race_status,
             "agents": agent_list
         }
+        if self.profiler is not None:
+            final_data["profile"] = self.profiler.live_report()
         return final_data
\ No newline at end of file
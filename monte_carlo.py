@@ -0,0 +1,477 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from model import DeltaVModel, load_race_assets
+
+DNF_STATUSES = ("OUT_OF_ENERGY", "CRASHED")
+# Engines that run one race per DeltaVModel ("batch" runs many per BatchEngine)
+RACE_ENGINES = ("agent", "vector", "event")
+# Imported once by the fork server, so every worker forked from it starts with them loaded
+WORKER_PRELOAD = ["model", "vector_engine", "event_engine", "batch_engine"]
+
+# --- Worker side: assets are loaded once per process, not once per race ---
+_worker_assets = None
+_worker_engine = "vector"
+
+
+def worker_context():
+    """
+    Start method for race workers: a fork server preloaded with the
+    simulation core (WORKER_PRELOAD) where the platform has one, else spawn.
+    Workers then fork from a small, clean process instead of re-importing
+    everything, or copying a parent that may be running threads.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(WORKER_PRELOAD)
+    return context
+
+
+def _init_worker(config_file_path, engine):
+    global _worker_assets, _worker_engine
+    _worker_assets = load_race_assets(config_file_path)
+    _worker_engine = engine
+
+
+def _run_race(seed):
+    return run_race(_worker_assets, seed, _worker_engine)
+
+
+def _run_request(seed, engine, max_time):
+    return run_race(_worker_assets, seed, engine or _worker_engine, max_time)
+
+
+def _run_batch(seeds):
+    from batch_engine import run_batch
+    return run_batch(_worker_assets, seeds)
+
+
+def run_race(assets, seed, engine="vector", max_time=None):
+    """
+    Runs one headless race and returns a compact, picklable result:
+    finishing order plus a per-driver summary.
+    """
+    # Race events stay silent: no sink is subscribed to the model's event bus
+    model = DeltaVModel(seed=seed, engine=engine, record_telemetry=False, telemetry_path=None, assets=assets)
+    env = model.env
+    # Stop at the chequered flag, or at max_time if nobody gets there
+    env.run(until=env.any_of([model.race_process, env.timeout(max_time or model.race_laps * 92 * 2)]))
+    model.sync_agents() # event engine: apply ticks skipped up to the cut-off
+    return race_result(model)
+
+
+def race_result(model):
+    """Compact, picklable summary of a model's race: finishing order plus a per-driver summary."""
+    strategy_of = {d['driver']: d['strategy_file'] for d in model.config['grid']}
+    ranked = sorted(model.f1_agents, key=lambda a: a.total_distance_traveled, reverse=True)
+    drivers = {}
+    for position, agent in enumerate(ranked, start=1):
+        drivers[agent.unique_id] = {
+            "team": agent.team,
+            "strategy": strategy_of[agent.unique_id],
+            "position": position,
+            "status": agent.status,
+            "laps": agent.laps_completed,
+            "lap_times": [round(t, 3) for t in agent.lap_times],
+            "fastest_lap_s": round(agent.lap_stats.fastest_lap, 3) if agent.lap_stats.laps else None,
+            "gap_to_leader_s": round(agent.lap_stats.gap_to_leader, 3),
+            "pit_stops": agent.pit_stops_made,
+            "mom_uses": agent.mom_uses_count,
+            "battery_soc": round(agent.battery_soc, 4),
+            "fuel_mj": round(agent.fuel_energy_remaining, 3),
+            "tyre_life": round(agent.tyre_life_remaining, 4),
+            "tyre_compound": agent.tyre_compound,
+        }
+    return {
+        "seed": model.seed,
+        "race_time_s": round(model.env.now, 2),
+        "race_completed": model.race_over,
+        "finishing_order": [a.unique_id for a in ranked],
+        "drivers": drivers,
+    }
+
+
+class RacePool:
+    """
+    Long-lived race workers for many requests (Monte Carlo, what-if
+    studies, a race service). Each worker is forked from the preloaded fork
+    server (worker_context) and loads the race assets once, the compiled
+    track artifact and the strategies, then serves races until close().
+
+    engine is the per-race engine of submit() and map() (one of
+    RACE_ENGINES); map_batches() always runs BatchEngine.
+    """
+
+    def __init__(self, config_file_path, workers=None, engine="vector"):
+        _check_race_engine(engine)
+        self.engine = engine
+        self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, mp_context=worker_context(),
+                                        initializer=_init_worker, initargs=(config_file_path, engine))
+
+    def submit(self, seed, engine=None, max_time=None):
+        """Future for run_race()'s result of one race (engine defaults to the pool's)."""
+        if engine is not None:
+            _check_race_engine(engine)
+        return self.pool.submit(_run_request, seed, engine, max_time)
+
+    def map(self, seeds, chunksize=1):
+        """Results of one race per seed, in seed order."""
+        return self.pool.map(_run_race, seeds, chunksize=chunksize)
+
+    def map_batches(self, batches):
+        """Results of each list of seeds run together in one BatchEngine, batch by batch."""
+        return self.pool.map(_run_batch, batches)
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_race_engine(engine):
+    if engine not in RACE_ENGINES:
+        hint = "; batched races go through map_batches()" if engine == "batch" else ""
+        raise ValueError(f"Unknown race engine '{engine}' (expected one of {', '.join(RACE_ENGINES)}){hint}")
+
+
+def run_monte_carlo(config_file_path, num_races, base_seed=0, workers=None, engine="vector", chunksize=None,
+                    batch_size=256):
+    """
+    Runs num_races races (seeds base_seed .. base_seed + num_races - 1) over a
+    process pool and returns the list of per-race results in seed order.
+    workers=1 runs in-process. engine="batch" advances up to batch_size
+    races at a time in one BatchEngine per worker task.
+    """
+    seeds = range(base_seed, base_seed + num_races)
+    workers = workers or os.cpu_count() or 1
+    if engine == "batch":
+        # Even batches, at least one per worker
+        num_batches = max(workers, -(-num_races // batch_size))
+        batches = [list(seeds[i::num_batches]) for i in range(num_batches)]
+        batches = [b for b in batches if b]
+        if workers == 1:
+            _init_worker(config_file_path, "vector")
+            batch_results = [_run_batch(b) for b in batches]
+        else:
+            with RacePool(config_file_path, workers) as pool:
+                batch_results = list(pool.map_batches(batches))
+        results = {r['seed']: r for batch in batch_results for r in batch}
+        return [results[seed] for seed in seeds]
+    if workers == 1:
+        assets = load_race_assets(config_file_path)
+        return [run_race(assets, seed, engine) for seed in seeds]
+    if chunksize is None:
+        chunksize = max(1, num_races // (workers * 4))
+    with RacePool(config_file_path, workers, engine) as pool:
+        return list(pool.map(seeds, chunksize=chunksize))
+
+
+# --- Sequential stopping: run races until the chosen metrics are precise enough ---
+# A metric is "<kind>:<subject>", optionally "=<half width>" for its own target:
+#   position:<driver>               mean finishing position of a driver
+#   win:<driver or strategy file>   win probability of a driver, or of any car on a strategy
+#   delta:<strategy>,<strategy>     mean per-race difference in the strategies' average position
+METRIC_KINDS = ("position", "win", "delta")
+# Confidence interval half width that counts as precise, per kind (positions, probability, positions)
+DEFAULT_TARGETS = {"position": 0.5, "win": 0.05, "delta": 0.5}
+
+Metric = namedtuple('Metric', ['name', 'kind', 'subjects', 'target'])
+
+
+def parse_metric(spec, target=None):
+    """Metric for a "<kind>:<subject>[=<half width>]" spec; target replaces the kind's default."""
+    name, _, own_target = spec.partition("=")
+    kind, _, subject = name.partition(":")
+    subjects = tuple(s.strip() for s in subject.split(",") if s.strip())
+    if kind not in METRIC_KINDS or not subjects:
+        raise ValueError(f"Metric '{spec}' must be position:<driver>, win:<driver or strategy> "
+                         f"or delta:<strategy>,<strategy>")
+    if len(subjects) != (2 if kind == "delta" else 1):
+        raise ValueError(f"Metric '{spec}': {kind} takes {'two strategies' if kind == 'delta' else 'one subject'}")
+    try:
+        target = float(own_target) if own_target else (target or DEFAULT_TARGETS[kind])
+    except ValueError:
+        raise ValueError(f"Metric '{spec}': target half width must be a number") from None
+    if target <= 0:
+        raise ValueError(f"Metric '{spec}': target half width must be > 0")
+    return Metric(name, kind, subjects, target)
+
+
+def _check_metric(metric, grid):
+    """ValueError unless the metric's subjects are on the config's grid."""
+    drivers = {entry['driver'] for entry in grid}
+    strategies = {entry['strategy_file'] for entry in grid}
+    for subject in metric.subjects:
+        if metric.kind == "position" and subject not in drivers:
+            raise ValueError(f"Metric '{metric.name}': no driver '{subject}' on the grid")
+        if metric.kind == "win" and subject not in drivers and subject not in strategies:
+            raise ValueError(f"Metric '{metric.name}': '{subject}' is neither a driver nor a strategy on the grid")
+        if metric.kind == "delta" and subject not in strategies:
+            raise ValueError(f"Metric '{metric.name}': no car runs strategy '{subject}'")
+
+
+def _average_position(race, strategy):
+    positions = [e['position'] for e in race['drivers'].values() if e['strategy'] == strategy]
+    return sum(positions) / len(positions)
+
+
+def metric_value(metric, race):
+    """The metric's value for one race result (run_race())."""
+    drivers = race['drivers']
+    subject = metric.subjects[0]
+    if metric.kind == "position":
+        return float(drivers[subject]['position'])
+    if metric.kind == "win":
+        winner = race['finishing_order'][0]
+        return 1.0 if subject in (winner, drivers[winner]['strategy']) else 0.0
+    return _average_position(race, subject) - _average_position(race, metric.subjects[1])
+
+
+def confidence_interval(values, confidence=0.95, proportion=False):
+    """
+    (mean, low, high) for the mean of `values`: the normal approximation,
+    or for 0/1 values (proportion=True) the Wilson score interval, which
+    stays sensible while a driver has won none or all of the races so far.
+    """
+    n = len(values)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    mean = sum(values) / n
+    if proportion:
+        scale = 1 + z * z / n
+        centre = (mean + z * z / (2 * n)) / scale
+        half = z * math.sqrt(mean * (1 - mean) / n + z * z / (4 * n * n)) / scale
+        return mean, centre - half, centre + half
+    _, std = _mean_std(values)
+    half = z * std / math.sqrt(n)
+    return mean, mean - half, mean + half
+
+
+def _estimate(metric, values, confidence):
+    mean, low, high = confidence_interval(values, confidence, proportion=(metric.kind == "win"))
+    half_width = (high - low) / 2
+    return {
+        "metric": metric.name,
+        "mean": mean,
+        "low": low,
+        "high": high,
+        "half_width": half_width,
+        "target": metric.target,
+        "reached": half_width <= metric.target,
+    }
+
+
+def run_sequential(config_file_path, metrics, max_races, base_seed=0, workers=None, engine="vector",
+                   confidence=0.95, batch_races=None, min_races=30):
+    """
+    Runs races in batches of batch_races (seeds base_seed, base_seed + 1, ...)
+    until every metric's confidence interval is within its target half width
+    (after at least min_races), or max_races have run. Workers stay up for
+    the whole run (RacePool). Returns the per-race results plus "estimates",
+    why it "stopped" ("precision" or "budget") and the "races_saved" out of
+    the max_races budget. A metric whose driver or strategy is not on the
+    config's grid raises ValueError before any race runs.
+    """
+    metrics = [m if isinstance(m, Metric) else parse_metric(m) for m in metrics]
+    if not metrics:
+        raise ValueError("Sequential Monte Carlo needs at least one metric")
+    with open(config_file_path, 'r') as f:
+        grid = json.load(f)['grid']
+    for metric in metrics:
+        _check_metric(metric, grid) # before any race runs
+    workers = workers or os.cpu_count() or 1
+    batch_races = batch_races or max(10, workers * 4)
+    race_engine = "vector" if engine == "batch" else engine # batches ignore the per-race engine
+    pool = RacePool(config_file_path, workers, race_engine) if workers > 1 else None
+    if pool is None:
+        _check_race_engine(race_engine)
+        _init_worker(config_file_path, race_engine)
+
+    def run(seeds):
+        if engine == "batch":
+            if pool is None:
+                return _run_batch(seeds)
+            batches = [b for b in (seeds[i::workers] for i in range(workers)) if b]
+            return sorted((r for batch in pool.map_batches(batches) for r in batch), key=lambda r: r['seed'])
+        if pool is None:
+            return [_run_race(seed) for seed in seeds]
+        return list(pool.map(seeds, chunksize=max(1, len(seeds) // (workers * 2))))
+
+    results = []
+    values = [[] for _ in metrics]
+    estimates = []
+    stopped = "budget"
+    try:
+        while len(results) < max_races:
+            first = base_seed + len(results)
+            races = run(list(range(first, first + min(batch_races, max_races - len(results)))))
+            results += races
+            for metric, series in zip(metrics, values):
+                series.extend(metric_value(metric, race) for race in races)
+            estimates = [_estimate(metric, series, confidence) for metric, series in zip(metrics, values)]
+            print(f"--- {len(results)} races: " + ", ".join(
+                f"{e['metric']} {e['mean']:.3f} +/-{e['half_width']:.3f}" for e in estimates) + " ---")
+            if len(results) >= min_races and all(e['reached'] for e in estimates):
+                stopped = "precision"
+                break
+    finally:
+        if pool is not None:
+            pool.close()
+    return {
+        "races": results,
+        "estimates": estimates,
+        "confidence": confidence,
+        "stopped": stopped,
+        "races_run": len(results),
+        "budget": max_races,
+        "races_saved": max_races - len(results),
+    }
+
+
+def print_sequential(outcome):
+    print(f"\n=== SEQUENTIAL: {outcome['races_run']} of {outcome['budget']} races, "
+          f"{outcome['confidence']*100:.0f}% intervals ===")
+    width = max([len(e['metric']) for e in outcome['estimates']] + [20]) + 2
+    print(f"{'Metric':<{width}}{'Mean':>9}{'Low':>9}{'High':>9}{'+/-':>8}{'Target':>8}")
+    for e in outcome['estimates']:
+        print(f"{e['metric']:<{width}}{e['mean']:>9.3f}{e['low']:>9.3f}{e['high']:>9.3f}{e['half_width']:>8.3f}"
+              f"{e['target']:>8.3f}{'' if e['reached'] else '  (not reached)'}")
+    if outcome['stopped'] == "precision":
+        print(f"--- Stopped: target precision reached after {outcome['races_run']} races; "
+              f"{outcome['races_saved']} races saved ---")
+    else:
+        missed = [e['metric'] for e in outcome['estimates'] if not e['reached']]
+        print(f"--- Stopped: race budget exhausted after {outcome['races_run']} races; "
+              f"not reached: {', '.join(missed) or 'none (below --min-races)'} ---")
+
+
+# --- Aggregation ---
+def _mean_std(values):
+    if not values:
+        return None, None
+    mean = sum(values) / len(values)
+    if len(values) < 2:
+        return mean, 0.0
+    var = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+    return mean, math.sqrt(var)
+
+
+def _stats(entries):
+    positions = [e['position'] for e in entries]
+    finished = [e for e in entries if e['status'] not in DNF_STATUSES]
+    fastest = [e['fastest_lap_s'] for e in entries if e['fastest_lap_s'] is not None]
+    mean_pos, std_pos = _mean_std(positions)
+    mean_fastest, _ = _mean_std(fastest)
+    return {
+        "starts": len(entries),
+        "wins": positions.count(1),
+        "win_rate": positions.count(1) / len(entries),
+        "podium_rate": sum(1 for p in positions if p <= 3) / len(entries),
+        "mean_position": mean_pos,
+        "std_position": std_pos,
+        "best_position": min(positions),
+        "worst_position": max(positions),
+        "dnf_rate": 1.0 - len(finished) / len(entries),
+        "mean_fastest_lap_s": mean_fastest,
+        "mean_pit_stops": _mean_std([e['pit_stops'] for e in entries])[0],
+        "mean_mom_uses": _mean_std([e['mom_uses'] for e in entries])[0],
+        "mean_final_soc": _mean_std([e['battery_soc'] for e in entries])[0],
+        "mean_final_fuel_mj": _mean_std([e['fuel_mj'] for e in entries])[0],
+        "mean_final_tyre_life": _mean_std([e['tyre_life'] for e in entries])[0],
+    }
+
+
+def summarize(results):
+    """Aggregates per-race results into per-driver and per-strategy statistics."""
+    by_driver = {}
+    by_strategy = {}
+    for race in results:
+        for driver, entry in race['drivers'].items():
+            by_driver.setdefault(driver, []).append(entry)
+            by_strategy.setdefault(entry['strategy'], []).append(entry)
+    return {
+        "races": len(results),
+        "drivers": {d: dict(_stats(e), team=e[0]['team'], strategy=e[0]['strategy'])
+                    for d, e in by_driver.items()},
+        "strategies": {s: _stats(e) for s, e in by_strategy.items()},
+    }
+
+
+def print_report(summary):
+    print(f"\n=== MONTE CARLO: {summary['races']} races ===")
+    print(f"{'Driver':<14}{'Team':<16}{'Win%':>7}{'Pod%':>7}{'AvgPos':>8}{'Std':>6}{'DNF%':>7}{'Pits':>6}")
+    drivers = sorted(summary['drivers'].items(), key=lambda kv: kv[1]['mean_position'])
+    for driver, s in drivers:
+        print(f"{driver:<14}{s['team']:<16}{s['win_rate']*100:>6.1f}%{s['podium_rate']*100:>6.1f}%"
+              f"{s['mean_position']:>8.2f}{s['std_position']:>6.2f}{s['dnf_rate']*100:>6.1f}%{s['mean_pit_stops']:>6.2f}")
+    print(f"\n{'Strategy':<40}{'Win%':>7}{'AvgPos':>8}{'DNF%':>7}{'SoC':>7}{'Fuel':>8}")
+    for strategy, s in sorted(summary['strategies'].items(), key=lambda kv: kv[1]['mean_position']):
+        print(f"{strategy:<40}{s['win_rate']*100:>6.1f}%{s['mean_position']:>8.2f}{s['dnf_rate']*100:>6.1f}%"
+              f"{s['mean_final_soc']:>7.2f}{s['mean_final_fuel_mj']:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delta-V Monte Carlo 'Reason Engine'.")
+    parser.add_argument("configs", nargs="*", default=["starting_grid.json"], metavar="config",
+                        help="Starting grid JSON; several (e.g. one per circuit) run as a calendar")
+    parser.add_argument("--races", type=int, default=100, help="Races to run (the budget with --until)")
+    parser.add_argument("--seed", type=int, default=0, help="First seed; races use seed, seed+1, ...")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--engine", choices=("agent", "vector", "event", "batch"), default="vector",
+                        help="batch: many races per tick loop (same distribution, different draws per seed)")
+    parser.add_argument("--out", default=None, help="Write per-race results and the summary to this JSON file")
+    parser.add_argument("--until", action="append", default=[], metavar="METRIC[=HALF_WIDTH]",
+                        help="Stop early once this metric is precise enough (repeatable): position:<driver>, "
+                             "win:<driver or strategy>, delta:<strategy>,<strategy>")
+    parser.add_argument("--precision", type=float, default=None,
+                        help="Target half width for metrics without their own (default: "
+                             + ", ".join(f"{k} {v}" for k, v in DEFAULT_TARGETS.items()) + ")")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--batch-races", type=int, default=None, help="Races between precision checks")
+    parser.add_argument("--min-races", type=int, default=30, help="Never stop before this many races")
+    args = parser.parse_args()
+    if not 0 < args.confidence < 1:
+        parser.error("--confidence must be between 0 and 1")
+    try:
+        metrics = [parse_metric(spec, args.precision) for spec in args.until]
+    except ValueError as e:
+        parser.error(str(e))
+
+    calendar = {}
+    for config in args.configs:
+        start = time.perf_counter()
+        sequential = None
+        if metrics:
+            print(f"--- Running up to {args.races} races of {config} ({args.engine} engine) ---")
+            sequential = run_sequential(config, metrics, args.races, args.seed, args.workers, args.engine,
+                                        args.confidence, args.batch_races, args.min_races)
+            results = sequential.pop("races")
+        else:
+            print(f"--- Running {args.races} races of {config} ({args.engine} engine) ---")
+            results = run_monte_carlo(config, args.races, args.seed, args.workers, args.engine)
+        elapsed = time.perf_counter() - start
+        summary = summarize(results)
+        print_report(summary)
+        if sequential is not None:
+            print_sequential(sequential)
+        print(f"\n--- {len(results)} races in {elapsed:.1f}s ({elapsed / max(1, len(results)):.2f}s per race) ---")
+        calendar[config] = {"summary": summary, "races": results}
+        if sequential is not None:
+            calendar[config]["sequential"] = sequential
+
+    if args.out:
+        # One config keeps the single-event layout; a calendar is keyed by config
+        report = calendar[args.configs[0]] if len(calendar) == 1 else {"calendar": calendar}
+        with open(args.out, 'w') as f:
+            json.dump(report, f, separators=(",", ":"))
+        print(f"--- Results saved to {args.out} ---")
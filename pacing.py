@@ -0,0 +1,96 @@
+import time
+
+PACING_MODES = ("realtime", "headless", "batch")
+
+
+class RacePacer:
+    """
+    Drives a DeltaVModel's clock against the wall clock.
+
+    realtime  anchored to the wall clock: after each step it sleeps only
+              what is left of the step's budget, so compute time does not
+              accumulate as drift. When the sim is behind by more than
+              max_lag seconds, live frames (snapshots / shared state) are
+              skipped until it catches up.
+    headless  step by step with no sleeping; commands still apply.
+    batch     a single env.run() to the chequered flag or max_time; no
+              commands, no pacing.
+    """
+
+    def __init__(self, model, mode="realtime", speed_multiplier=1.0, max_time=None, max_lag=None):
+        if mode not in PACING_MODES:
+            raise ValueError(f"Unknown pacing mode '{mode}' (expected one of {', '.join(PACING_MODES)})")
+        self.model = model
+        self.mode = mode
+        self.speed_multiplier = speed_multiplier
+        self.max_time = max_time if max_time is not None else model.race_laps * 92
+        # Default: fall one displayed frame behind before dropping frames
+        self.max_lag = max_lag if max_lag is not None else max(0.05, model.time_step / speed_multiplier)
+        self.sim_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.steps = 0
+        self.frames_skipped = 0
+
+    @property
+    def sim_per_wall(self):
+        """Achieved sim-seconds per wall-second."""
+        return self.sim_seconds / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def run(self, commands=None):
+        """Runs until the race ends or max_time; returns self (for the stats)."""
+        model = self.model
+        sim_start = model.env.now
+        wall_start = time.perf_counter()
+        try:
+            if self.mode == "batch":
+                env = model.env
+                first_step = model.step_count
+                if env.now < self.max_time:
+                    # Stop at the chequered flag, not at max_time (the weather process never ends)
+                    env.run(until=env.any_of([model.race_process, env.timeout(self.max_time - env.now)]))
+                self.steps = model.step_count - first_step
+            else:
+                self._run_stepped(commands)
+        finally:
+            model.publish_frames = True
+            self.sim_seconds = model.env.now - sim_start
+            self.wall_seconds = time.perf_counter() - wall_start
+        return self
+
+    def _run_stepped(self, commands):
+        model = self.model
+        env = model.env
+        time_step = model.time_step
+        realtime = self.mode == "realtime"
+        speed = self.speed_multiplier
+        anchor_wall = time.perf_counter()
+        anchor_sim = env.now
+
+        while model.running and env.now < self.max_time:
+            if commands is not None:
+                if commands.apply_pending(model):
+                    if commands.paused:
+                        print("...sim paused...", end="\r")
+                    while commands.paused:
+                        commands.wait()
+                        commands.apply_pending(model)
+                    # Pauses and speed changes restart the wall-clock anchor
+                    speed = self.speed_multiplier = commands.speed_multiplier
+                    anchor_wall = time.perf_counter()
+                    anchor_sim = env.now
+
+            env.run(until=env.now + time_step)
+            self.steps += 1
+
+            if realtime:
+                lag = time.perf_counter() - (anchor_wall + (env.now - anchor_sim) / speed)
+                if lag < 0:
+                    time.sleep(-lag)
+                # Decides whether the next tick publishes a live frame
+                model.publish_frames = lag <= self.max_lag
+                if not model.publish_frames:
+                    self.frames_skipped += 1
+
+    def summary(self):
+        return (f"--- PACING ({self.mode}): {self.sim_seconds:.1f} sim-s in {self.wall_seconds:.2f} wall-s "
+                f"= {self.sim_per_wall:.1f}x, {self.steps} steps, {self.frames_skipped} frames skipped ---")
@@ -0,0 +1,172 @@
+import time
+from array import array
+import numpy as np
+
+# Phases of one tick, in loop order. engine_step is the vector / event
+# engines' physics (they do not run the per-agent phases).
+PHASES = (
+    "running_order", "shuffle", "perceive", "make_decision", "update_physics",
+    "record_telemetry_step", "engine_step", "get_simulation_data", "write_simulation_data",
+)
+# record_telemetry_step is the time spent in the TelemetryRecorder; the few
+# derived values it computes first stay in update_physics. write_simulation_data
+# is the hand-off to the live consumers; the snapshot writer's disk I/O runs on
+# its own thread and is reported separately (snapshot_io).
+
+# What a slow run is bound by
+PHASE_GROUPS = {
+    "physics": ("running_order", "shuffle", "perceive", "make_decision", "update_physics", "engine_step"),
+    "telemetry": ("record_telemetry_step",),
+    "snapshot": ("get_simulation_data", "write_simulation_data"),
+}
+PERCENTILES = (50, 90, 99)
+LIVE_WINDOW = 1000 # ticks the live snapshot's percentiles cover
+
+
+class TickProfiler:
+    """
+    Per-phase wall time of the simulation loop (DeltaVModel(profile=True)).
+
+    The loop adds each phase's time to the current tick with add() and
+    closes it with end_tick(); every phase keeps one sample per tick, so
+    the report has cumulative totals and per-tick percentiles, plus ticks
+    per wall-second and the sim-to-wall ratio. Wall time runs from the first
+    tick to the last (pacing sleeps included); shares are of busy time, the
+    time spent inside ticks. Nothing here runs when the model is built
+    without profiling.
+
+    snapshot_writer (a SnapshotWriter) adds its thread's busy time and
+    dropped frames to the report; that time counts towards the snapshot
+    group when choosing `bound`.
+    """
+
+    def __init__(self, time_step, snapshot_writer=None):
+        self.time_step = time_step
+        self.snapshot_writer = snapshot_writer
+        self.clock = time.perf_counter
+        self.totals = dict.fromkeys(PHASES, 0.0)
+        self.samples = {phase: array('d') for phase in PHASES}
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.steps = 0
+        self.sim_start = self.sim_now = None
+        self.wall_start = self.wall_now = None
+
+    def begin_tick(self, sim_now):
+        now = self.clock()
+        if self.wall_start is None:
+            self.wall_start, self.sim_start = now, sim_now
+        return now
+
+    def add(self, phase, seconds):
+        self.current[phase] += seconds
+
+    def add_remainder(self, phase, seconds):
+        """Books whatever part of `seconds` this tick's other phases have not claimed yet."""
+        self.current[phase] += max(0.0, seconds - sum(self.current.values()))
+
+    def end_tick(self, sim_now):
+        """Closes the current tick; sim_now is the sim time the tick advanced the race to."""
+        for phase, seconds in self.current.items():
+            self.totals[phase] += seconds
+            self.samples[phase].append(seconds)
+            self.current[phase] = 0.0
+        self.steps += 1
+        self.sim_now = sim_now
+        self.wall_now = self.clock()
+
+    # --- Reports ---
+    @property
+    def wall_seconds(self):
+        return (self.wall_now - self.wall_start) if self.steps else 0.0
+
+    @property
+    def sim_seconds(self):
+        return (self.sim_now - self.sim_start) if self.steps else 0.0
+
+    def report(self, window=None):
+        """
+        Dict of ticks, ticks_per_sec, sim_per_wall, the dominant phase group
+        (`bound`) and per-phase total_s / share / mean and percentile
+        microseconds. window limits the percentiles to the last N ticks.
+        """
+        wall = self.wall_seconds
+        ticks = self.sim_seconds / self.time_step
+        busy = sum(self.totals.values())
+        phases = {}
+        for phase in PHASES:
+            total = self.totals[phase]
+            if total <= 0:
+                continue
+            samples = np.frombuffer(self.samples[phase], dtype=float)
+            if window:
+                samples = samples[-window:]
+            stats = {
+                "total_s": round(total, 6),
+                "share": round(total / busy, 4) if busy else 0.0,
+                "mean_us": round(total / self.steps * 1e6, 2),
+            }
+            for p, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES)):
+                stats[f"p{p}_us"] = round(float(value) * 1e6, 2)
+            stats["max_us"] = round(float(samples.max()) * 1e6, 2)
+            phases[phase] = stats
+        groups = {name: sum(self.totals[p] for p in members) for name, members in PHASE_GROUPS.items()}
+        writer = self.snapshot_writer
+        snapshot_io = None
+        if writer is not None:
+            # Off the sim thread, so not part of busy time or the shares, but it is what
+            # limits the run when the disk cannot keep up
+            groups["snapshot"] += writer.busy_seconds
+            snapshot_io = {
+                "busy_s": round(writer.busy_seconds, 6),
+                "frames_written": writer.frames_written,
+                "frames_dropped": writer.frames_dropped,
+            }
+        return {
+            "steps": self.steps,
+            "ticks": round(ticks),
+            "sim_seconds": round(self.sim_seconds, 3),
+            "wall_seconds": round(wall, 3),
+            "busy_seconds": round(busy, 3),
+            "ticks_per_sec": round(ticks / wall, 1) if wall > 0 else 0.0,
+            "sim_per_wall": round(self.sim_seconds / wall, 2) if wall > 0 else 0.0,
+            "bound": max(groups, key=groups.get) if busy else None,
+            "groups_s": {name: round(seconds, 6) for name, seconds in groups.items()},
+            "phases": phases,
+            "snapshot_io": snapshot_io,
+        }
+
+    def live_report(self):
+        """Compact report for the live snapshot (percentiles over the last LIVE_WINDOW ticks)."""
+        return self.report(window=LIVE_WINDOW)
+
+    def format_report(self):
+        r = self.report()
+        lines = [
+            f"--- PROFILE: {r['ticks']} ticks ({r['steps']} steps) in {r['wall_seconds']:.2f}s = "
+            f"{r['ticks_per_sec']:.0f} ticks/s, {r['sim_per_wall']:.1f}x real time, {r['bound'] or '-'}-bound ---",
+            f"{'phase':24s} {'total s':>9s} {'share':>6s} {'mean us':>9s} {'p50 us':>9s} {'p90 us':>9s} {'p99 us':>9s}",
+        ]
+        for phase, s in r["phases"].items():
+            lines.append(f"{phase:24s} {s['total_s']:9.3f} {s['share']*100:5.1f}% {s['mean_us']:9.1f} "
+                         f"{s['p50_us']:9.1f} {s['p90_us']:9.1f} {s['p99_us']:9.1f}")
+        io = r["snapshot_io"]
+        if io is not None:
+            lines.append(f"{'snapshot writer thread':24s} {io['busy_s']:9.3f}  ({io['frames_written']} frames written, "
+                         f"{io['frames_dropped']} dropped)")
+        return "\n".join(lines)
+
+
+class TimedRecorder:
+    """Stands in for the TelemetryRecorder during a profiled tick, timing each record()."""
+
+    __slots__ = ('recorder', 'elapsed', 'clock')
+
+    def __init__(self, recorder, clock):
+        self.recorder = recorder
+        self.elapsed = 0.0
+        self.clock = clock
+
+    def record(self, *values):
+        start = self.clock()
+        self.recorder.record(*values)
+        self.elapsed += self.clock() - start
@@ -0,0 +1,192 @@
+import gzip
+import json
+import sys
+from collections import deque, namedtuple
+
+# --- Event types ---
+LAP_COMPLETED = "LAP_COMPLETED"
+MOM_GRANTED = "MOM_GRANTED"
+PIT_ENTRY = "PIT_ENTRY"
+PIT_EXIT = "PIT_EXIT"
+TYRE_CLIFF = "TYRE_CLIFF"
+WEATHER_CHANGE = "WEATHER_CHANGE"
+VSC_CHANGE = "VSC_CHANGE"
+PAUSE_CHANGE = "PAUSE_CHANGE"
+RACE_END = "RACE_END"
+
+# --- Levels: a sink receives events at or above its level ---
+DEBUG = 10   # per-car, every lap
+INFO = 20    # per-car strategy moments
+NOTICE = 30  # whole-race changes
+OFF = 100
+LEVEL_NAMES = {"debug": DEBUG, "info": INFO, "notice": NOTICE, "off": OFF}
+
+EVENT_LEVELS = {
+    LAP_COMPLETED: DEBUG,
+    MOM_GRANTED: DEBUG,
+    PIT_ENTRY: INFO,
+    PIT_EXIT: INFO,
+    TYRE_CLIFF: INFO,
+    WEATHER_CHANGE: NOTICE,
+    VSC_CHANGE: NOTICE,
+    PAUSE_CHANGE: NOTICE,
+    RACE_END: NOTICE,
+}
+
+
+# One race event. `lap` is the car's current lap (for LAP_COMPLETED, the lap
+# just completed); driver and lap are None for whole-race events. `data`
+# holds the type's fields (lap_time, gap_m, reason, compound, state, ...).
+RaceEvent = namedtuple('RaceEvent', ['time', 'type', 'driver', 'lap', 'data'], defaults=(None, None, None))
+
+
+class RaceEventBus:
+    """
+    Typed race events fanned out to pluggable sinks (ConsoleSink,
+    RingBufferSink, EventFileSink or any callable taking a RaceEvent).
+
+    With no sink attached, emit() is one comparison and returns before an
+    event is built, so emitters in the physics code cost close to nothing;
+    loops that only exist to emit (the vector engine's) check `active` first.
+    """
+
+    __slots__ = ('sinks', 'level', 'active')
+
+    def __init__(self):
+        self.sinks = []     # (level, sink)
+        self.level = OFF    # lowest level any sink wants
+        self.active = False
+
+    def subscribe(self, sink, level=DEBUG):
+        """Attaches a sink for events at `level` and above; returns the sink."""
+        self.sinks.append((level, sink))
+        self._update()
+        return sink
+
+    def unsubscribe(self, sink):
+        self.sinks = [(level, s) for level, s in self.sinks if s is not sink]
+        self._update()
+
+    def _update(self):
+        self.level = min((level for level, _ in self.sinks), default=OFF)
+        self.active = self.level < OFF
+
+    def emit(self, type, time, driver=None, lap=None, **data):
+        level = EVENT_LEVELS[type]
+        if level < self.level:
+            return
+        event = RaceEvent(time, type, driver, lap, data)
+        for sink_level, sink in self.sinks:
+            if level >= sink_level:
+                sink(event)
+
+    def close(self):
+        """Flushes and closes every sink that has a close()."""
+        for _, sink in self.sinks:
+            close = getattr(sink, "close", None)
+            if close is not None:
+                close()
+
+
+# --- Sinks ---
+def format_event(event):
+    """The console line(s) for an event, as the simulation has always narrated it."""
+    d, data = event.driver, event.data
+    if event.type == LAP_COMPLETED:
+        return f"--- AGENT {d} COMPLETED LAP {event.lap}! (Time: {data['lap_time']:.2f}s) ---"
+    if event.type == MOM_GRANTED:
+        return f"--- AGENT {d} GOT MOM! (Gap: {data['gap_m']:.1f}m) ---"
+    if event.type == PIT_ENTRY:
+        if data['reason'] == "wrong_tyres":
+            return f"--- AGENT {d} PITS FOR WRONG TYRES! (Weather: {data['weather']}) ---"
+        return f"--- AGENT {d} DECIDES TO PIT! (Tyre: {data['tyre_life']*100:.0f}%) ---"
+    if event.type == PIT_EXIT:
+        return f"--- AGENT {d} PIT STOP COMPLETE! ---"
+    if event.type == TYRE_CLIFF:
+        return f"--- AGENT {d} TYRES FELL OFF A CLIFF! GRIP REDUCED. ---"
+    if event.type == WEATHER_CHANGE:
+        if data.get('source') == "race_control":
+            return f"\n--- RACE CONTROL: WEATHER SET TO {data['state']} (t={event.time:.1f}s) ---\n"
+        if data['state'] == "WET":
+            return (f"\n--- WEATHER: IT'S STARTING TO RAIN! (t={event.time:.1f}s) ---\n\n"
+                    f"--- RAIN: Expecting track to dry in {data['duration_s']/60:.0f} minutes. ---")
+        return f"\n--- WEATHER: THE TRACK IS DRYING UP! (t={event.time:.1f}s) ---\n"
+    if event.type == VSC_CHANGE:
+        return f"\n--- RACE CONTROL: VSC {'DEPLOYED' if data['active'] else 'ENDING'} (t={event.time:.1f}s) ---\n"
+    if event.type == PAUSE_CHANGE:
+        return f"\n--- RACE CONTROL: SIMULATION {'PAUSED' if data['paused'] else 'RESUMED'} ---"
+    if event.type == RACE_END:
+        return (f"--- AGENT {d} WINS THE RACE! (First to {event.lap} laps) ---\n"
+                f"--- CHEQUERED FLAG: Race has ended. ---")
+    return f"--- {event.type} {d or ''} {data} ---"
+
+
+class ConsoleSink:
+    """Prints events in the classic narration format (to stdout unless a stream is given)."""
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def __call__(self, event):
+        print(format_event(event), file=self.stream or sys.stdout)
+
+    def close(self):
+        (self.stream or sys.stdout).flush()
+
+
+class RingBufferSink:
+    """
+    Keeps the last `capacity` events in memory. `count` is the number of
+    events ever received, so a poller can ask for since(last_count).
+    """
+
+    def __init__(self, capacity=1024):
+        self.buffer = deque(maxlen=capacity)
+        self.count = 0
+
+    def __call__(self, event):
+        self.buffer.append(event)
+        self.count += 1
+
+    def events(self):
+        return list(self.buffer)
+
+    def since(self, count):
+        """Events received after the first `count` (as many as are still buffered)."""
+        missed = self.count - count
+        if missed <= 0:
+            return []
+        return list(self.buffer)[-missed:]
+
+
+class EventFileSink:
+    """
+    Appends events to a compact JSON-lines file, one [time, type, driver, lap,
+    data] array per line (gzip if the path ends in .gz). Readers can tail it
+    while the race runs; read_event_file() loads it back.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        opener = gzip.open if path.endswith(".gz") else open
+        self.file = opener(path, "wt", encoding="utf-8")
+
+    def __call__(self, event):
+        self.file.write(json.dumps([round(event.time, 3), event.type, event.driver, event.lap, event.data],
+                                   separators=(",", ":")))
+        self.file.write("\n")
+        self.file.flush() # events are sparse: make each one visible to tail -f (a gzip sync flush for .gz)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def read_event_file(path):
+    """Yields the RaceEvents stored by EventFileSink."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield RaceEvent(*json.loads(line))
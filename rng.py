@@ -0,0 +1,34 @@
+import numpy as np
+
+# One independent stream per subsystem; append new names at the end so
+# existing streams keep their draws for a given seed
+STREAM_NAMES = ("setup", "shuffle", "weather", "sensor", "incidents")
+
+
+class RaceStreams:
+    """
+    Named, independent random streams for one race, spawned from the race
+    seed with numpy's SeedSequence.
+
+    setup      car-to-car strategy noise (drawn once, for the whole grid)
+    shuffle    per-tick agent step order
+    weather    rain timing
+    sensor     snapshot sensor noise
+    incidents  reserved for future race incidents
+
+    Each stream is a numpy Generator, so a subsystem draws for every car at
+    once (e.g. streams.sensor.uniform(0.98, 1.02, n)). Draws in one
+    stream never shift another: building more or fewer snapshots leaves
+    the weather and step order untouched, and adding a car leaves the
+    weather untouched. It does change the step order (shuffle draws a
+    permutation of the whole grid, which depends on its size) and the
+    cars' setup noise (each factor is drawn for the whole grid in turn).
+    """
+
+    __slots__ = ("seed",) + STREAM_NAMES
+
+    def __init__(self, seed):
+        self.seed = seed
+        children = np.random.SeedSequence(seed).spawn(len(STREAM_NAMES))
+        for name, child in zip(STREAM_NAMES, children):
+            setattr(self, name, np.random.Generator(np.random.PCG64(child)))
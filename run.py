@@ -1,8 +1,10 @@
 import sys
 import json
-import time
-import os  # <-- NEW: Import os
+import argparse
 from model import DeltaVModel
+from commands import CommandChannel
+from pacing import RacePacer, PACING_MODES
+from race_events import ConsoleSink, EventFileSink, LEVEL_NAMES, DEBUG
 
 # --- SPEED CONTROL ---
 # 1.0 = Real-time
@@ -12,78 +14,95 @@ SPEED_MULTIPLIER = 50.0
 # --- END SPEED CONTROL ---
 
 COMMAND_FILE = "commands.json"  # <-- NEW: Define command file
+COMMAND_PORT = 8765  # Local socket for race-control commands (None = commands.json only)
+SHARED_STATE_NAME = "deltav_live"  # Shared-memory live state (read with shared_state.SharedStateReader)
 
-# --- NEW: Function to safely read the pause command ---
-def get_pause_state():
-    """
-    Safely reads the command file to check the pause state.
-    Defaults to False if file not found or error.
-    """
-    try:
-        if os.path.exists(COMMAND_FILE):
-            with open(COMMAND_FILE, 'r') as f:
-                data = json.load(f)
-            # Return the value of "pause_active", default to False if key doesn't exist
-            return data.get("pause_active", False)
-    except Exception as e:
-        # On any error (e.g., file being written, JSON error), just default to not paused
-        return False
-    # Default to not paused
-    return False
-# --- END NEW FUNCTION ---
+parser = argparse.ArgumentParser(description="Run a single Delta-V race.")
+parser.add_argument("config", nargs="?", default="starting_grid.json", help="Starting grid JSON")
+parser.add_argument("--mode", choices=PACING_MODES, default="realtime",
+                    help="realtime: paced to --speed; headless: unpaced, steps one tick at a time; "
+                         "batch: one env.run() to the end")
+parser.add_argument("--speed", type=float, default=SPEED_MULTIPLIER, help="Real-time multiplier (realtime mode)")
+parser.add_argument("--seed", type=int, default=123)
+parser.add_argument("--engine", choices=("agent", "vector", "event"), default="agent",
+                    help="event: only wakes a car when something can change for it (fastest headless, "
+                         "with --no-live --no-telemetry)")
+parser.add_argument("--no-live", action="store_true", help="Do not write live snapshots or shared state")
+parser.add_argument("--no-telemetry", action="store_true",
+                    help="Do not record telemetry (no telemetry_history.json at the end)")
+parser.add_argument("--replace-live", action="store_true",
+                    help=f"Take over the '{SHARED_STATE_NAME}' shared block if one is left from an earlier run")
+parser.add_argument("--snapshot-hz", type=float, default=None,
+                    help="Live frames per sim-second (default: one per physics tick)")
+parser.add_argument("--events", choices=LEVEL_NAMES, default="debug",
+                    help="Race events narrated on the console: debug (every lap), info (pits, cliffs), "
+                         "notice (weather, VSC, pause, flag) or off")
+parser.add_argument("--event-file", default=None,
+                    help="Also write every race event to this JSON-lines file (.gz to compress)")
+parser.add_argument("--profile", action="store_true",
+                    help="Time each phase of the loop; report in live snapshots and at the end")
+parser.add_argument("--profile-out", default=None, help="Also write the end-of-race profile to this JSON file")
+args = parser.parse_args()
 
 # --- Config loading (unchanged) ---
-CONFIG_FILE = "starting_grid.json"
-if len(sys.argv) > 1:
-    CONFIG_FILE = sys.argv[1]
+CONFIG_FILE = args.config
 
 try:
     with open(CONFIG_FILE, 'r') as f:
         config = json.load(f)
     race_laps = config['simulation_params']['race_laps']
     time_step = config['simulation_params']['time_step']
-    MAX_TIME_SECONDS = race_laps * 92 
+    MAX_TIME_SECONDS = race_laps * 92
     print(f"--- DEBUG: RUNNING SIMULATION FOR {MAX_TIME_SECONDS} SECONDS ({race_laps} laps) ---")
 except Exception as e:
     print(f"Error loading config file {CONFIG_FILE}: {e}")
     sys.exit(1)
 
-print(f"--- Starting Delta-V Simulation (Grid: {CONFIG_FILE}, Laps: {race_laps}) ---")
+print(f"--- Starting Delta-V Simulation (Grid: {CONFIG_FILE}, Laps: {race_laps}, Mode: {args.mode}) ---")
 
-# --- Model setup (unchanged) ---
-model = DeltaVModel(
-    config_file_path=CONFIG_FILE, 
-    seed=123,
-    live_snapshot_mode=True # <-- Tell the model to write snapshots
-)
-
-# --- REAL-TIME MASTER LOOP (UPDATED WITH PAUSE LOGIC) ---
-
-sleep_duration = time_step / SPEED_MULTIPLIER
-
-while model.running and (model.env.now < MAX_TIME_SECONDS):
-    try:
-        # --- NEW: PAUSE CHECK ---
-        # Before every step, check if the dashboard has requested a pause.
-        while get_pause_state():
-            # We are paused. Sleep for a bit and check again.
-            # Do not advance the simulation.
-            time.sleep(0.5) 
-            # This print will overwrite itself, looking like a "blinking" status
-            print("...sim paused...", end="\r") 
-        # --- END PAUSE CHECK ---
+# --- Model setup ---
+try:
+    model = DeltaVModel(
+        config_file_path=CONFIG_FILE,
+        seed=args.seed,
+        engine=args.engine,
+        snapshot_interval=1.0 / args.snapshot_hz if args.snapshot_hz else None,
+        live_snapshot_mode=not args.no_live, # <-- Tell the model to write snapshots
+        shared_state_name=None if args.no_live else SHARED_STATE_NAME,
+        replace_shared_state=args.replace_live,
+        record_telemetry=not args.no_telemetry,
+        telemetry_path=None if args.no_telemetry else "telemetry_history.json",
+        profile=args.profile or bool(args.profile_out)
+    )
+except FileExistsError as e:
+    print(f"Error: {e}. Use --replace-live or --no-live.")
+    sys.exit(1)
+if args.events != "off":
+    model.events.subscribe(ConsoleSink(), LEVEL_NAMES[args.events])
+if args.event_file:
+    model.events.subscribe(EventFileSink(args.event_file), DEBUG)
 
-        # If we are here, we are not paused. Run one step.
-        model.env.run(until=model.env.now + time_step)
-        
-        # Sleep for the *adjusted* duration
-        time.sleep(sleep_duration)
-        
-    except KeyboardInterrupt:
-        print("\n--- Simulation interrupted by user ---")
-        model.running = False
-        break
+# --- MASTER LOOP ---
+# Commands (pause/resume/VSC/weather/speed) arrive on background threads and
+# are applied by the pacer between steps; batch mode ignores them.
+commands = None
+if args.mode != "batch":
+    commands = CommandChannel(COMMAND_FILE, port=COMMAND_PORT, speed_multiplier=args.speed)
+pacer = RacePacer(model, mode=args.mode, speed_multiplier=args.speed, max_time=MAX_TIME_SECONDS)
 
-# --- END UPDATED LOOP ---
+try:
+    pacer.run(commands)
+except KeyboardInterrupt:
+    print("\n--- Simulation interrupted by user ---")
+    model.running = False
 
-print("\n--- Simulation Complete ---")
\ No newline at end of file
+if commands is not None:
+    commands.close()
+model.close() # Flush any snapshots still queued on the writer thread and remove the shared block
+print(pacer.summary())
+if model.profiler is not None:
+    print(model.profiler.format_report())
+    if args.profile_out:
+        with open(args.profile_out, 'w') as f:
+            json.dump(model.profiler.report(), f, indent=2)
+print("\n--- Simulation Complete ---")
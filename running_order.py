@@ -0,0 +1,43 @@
+import numpy as np
+
+
+def rank_grid(distances, track_length):
+    """
+    Running order and car-ahead lookup for the whole grid from one sort,
+    O(n log n).
+
+    Returns (order, ahead, gap): car indices sorted leader first, and for
+    every car the index of the nearest car in front and the gap to it in
+    metres (-1 / inf if nobody is in front). A car more than half a
+    lap behind on total distance is physically ahead on track after the
+    wrap, exactly like the old pairwise scan in F1Agent.perceive.
+    """
+    d = np.asarray(distances, dtype=float)
+    n = d.size
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=float)
+    order = np.argsort(d, kind='stable')
+    ranked = d[order]
+    half_lap = track_length / 2
+
+    # 1. Nearest car strictly further along in total distance
+    k_ahead = np.searchsorted(ranked, d, side='right')
+    has_ahead = k_ahead < n
+    k_ahead = np.minimum(k_ahead, n - 1)
+    gap_ahead = np.where(has_ahead, ranked[k_ahead] - d, np.inf)
+
+    # 2. Wrap-around: closest car between one and half a lap behind
+    k_wrap = np.minimum(np.searchsorted(ranked, d - track_length, side='right'), n - 1)
+    gap_wrap = (ranked[k_wrap] - d) + track_length
+    # d - track_length can round onto a car exactly one lap behind; step past it
+    k_next = np.minimum(np.searchsorted(ranked, ranked[k_wrap], side='right'), n - 1)
+    k_wrap = np.where(gap_wrap > 0, k_wrap, k_next)
+    raw_wrap = ranked[k_wrap] - d
+    has_wrap = raw_wrap < -half_lap
+    gap_wrap = raw_wrap + track_length
+    has_wrap &= gap_wrap > 0
+
+    use_wrap = has_wrap & (gap_wrap < gap_ahead)
+    gap = np.where(use_wrap, gap_wrap, gap_ahead)
+    ahead = np.where(use_wrap, order[k_wrap], np.where(has_ahead, order[k_ahead], -1))
+    return order[::-1], ahead, gap
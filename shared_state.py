@@ -0,0 +1,262 @@
+import sys
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from agent import STATUS_NAMES
+from lap_stats import NUM_SECTORS
+
+MAGIC = 0x44564C53 # "DVLS"
+LAYOUT_VERSION = 2
+
+AERO_MODES = ["Z-MODE", "X-MODE"]
+SAFETY_CAR = ["NONE", "VSC"]
+WEATHER = ["DRY", "WET"]
+
+# Blocks created by a SharedStateChannel in this process
+_LOCAL_CHANNELS = set()
+
+# --- Fixed layout: one header record followed by max_cars car records ---
+HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'),
+    ('version', '<u2'),
+    ('max_cars', '<u2'),
+    ('seq', '<u8'),              # seqlock: odd while a frame is being written
+    ('n_cars', '<u4'),
+    ('timestamp', '<U16'),
+    ('current_lap', '<i4'),
+    ('total_laps', '<i4'),
+    ('safety_car', 'u1'),
+    ('weather', 'u1'),
+])
+
+CAR_DTYPE = np.dtype([
+    ('id', '<U32'),
+    ('team', '<U32'),
+    ('rank', '<i4'),
+    ('x', '<f8'),
+    ('y', '<f8'),
+    ('status', 'u1'),
+    ('current_lap', '<i4'),
+    ('last_lap_time', '<U16'),
+    ('fastest_lap_time', '<U16'),
+    ('average_lap_time', '<U16'),
+    ('last_sectors', '<f8', (NUM_SECTORS,)), # NaN = sector not timed
+    ('gap_to_leader', '<f8'),
+    ('interval', '<f8'),
+    ('battery_soc', '<f8'),
+    ('fuel_remaining_mj', '<f8'),
+    ('aero_mode', 'u1'),
+    ('mom_available', '?'),
+    ('tyre_life', '<f8'),
+    ('tyre_compound', '<U16'),
+    ('tyre_temp', '<f8'),
+    ('mom_active', '?'),
+    ('on_cliff', '?'),
+    ('pit_stops_made', '<i4'),
+])
+
+
+def _block_size(max_cars):
+    return HEADER_DTYPE.itemsize + CAR_DTYPE.itemsize * max_cars
+
+
+def _views(buf, max_cars):
+    header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buf, offset=0)
+    cars = np.ndarray((max_cars,), dtype=CAR_DTYPE, buffer=buf, offset=HEADER_DTYPE.itemsize)
+    return header, cars
+
+
+class SharedStateChannel:
+    """
+    Producer side of the live state channel.
+
+    publish() copies a get_simulation_data() frame into a named
+    multiprocessing.shared_memory block with a fixed layout, guarded by a
+    sequence counter (seqlock). Any number of local SharedStateReader
+    processes can map the block without touching the filesystem.
+
+    A block that already exists under `name` belongs to another race (or
+    one that did not shut down cleanly) and raises FileExistsError unless
+    replace=True. The block stays readable until close().
+    """
+
+    def __init__(self, name="deltav_live", max_cars=64, replace=False):
+        self.name = name
+        self.max_cars = max_cars
+        size = _block_size(max_cars)
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            if not replace:
+                raise FileExistsError(f"Shared block '{name}' already exists: another race is publishing "
+                                      f"live state, or one did not shut down cleanly (replace=True takes it over)") from None
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _LOCAL_CHANNELS.add(name)
+
+        self._header, self._cars = _views(self._shm.buf, max_cars)
+        self._header['magic'] = MAGIC
+        self._header['version'] = LAYOUT_VERSION
+        self._header['max_cars'] = max_cars
+        self._header['seq'] = 0
+        self._header['n_cars'] = 0
+
+    def publish(self, data):
+        """Writes one frame (the dict built by get_simulation_data)."""
+        status = data['race_status']
+        agents = data['agents'][:self.max_cars]
+        records = [(
+            a['id'], a['team'], a['rank'], a['position'][0], a['position'][1],
+            STATUS_NAMES.index(a['status']),
+            a['lap_data']['current_lap'], a['lap_data']['last_lap_time'], a['lap_data']['fastest_lap_time'],
+            a['lap_data']['average_lap_time'],
+            [np.nan if t is None else t for t in a['lap_data']['last_sectors']],
+            a['lap_data']['gap_to_leader'], a['lap_data']['interval'],
+            a['vehicle_state']['battery_soc'], a['vehicle_state']['fuel_remaining_mj'],
+            AERO_MODES.index(a['vehicle_state']['aero_mode']), a['vehicle_state']['mom_available'],
+            a['vehicle_state']['tyre_life'], a['vehicle_state']['tyre_compound'],
+            a['vehicle_state']['tyre_temp'], a['vehicle_state']['mom_active'],
+            a['vehicle_state']['on_cliff'], a['vehicle_state']['pit_stops_made'],
+        ) for a in agents]
+
+        header = self._header
+        header['seq'] += 1 # odd: frame in progress
+        self._cars[:len(records)] = records
+        header['n_cars'] = len(records)
+        header['timestamp'] = status['timestamp']
+        header['current_lap'] = status['current_lap']
+        header['total_laps'] = status['total_laps']
+        header['safety_car'] = SAFETY_CAR.index(status['safety_car'])
+        header['weather'] = WEATHER.index(status['weather'])
+        header['seq'] += 1 # even: frame complete
+
+    def close(self):
+        """Releases and removes the shared block (the owner's shutdown; readers then lose it)."""
+        if self._shm is None:
+            return
+        del self._header, self._cars
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        self._shm = None
+        _LOCAL_CHANNELS.discard(self.name)
+
+
+class SharedStateReader:
+    """
+    Consumer side: maps the block read-only in spirit and rebuilds the same
+    dict get_simulation_data() returns, retrying while a frame is mid-write.
+    """
+
+    def __init__(self, name="deltav_live"):
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: stop the resource tracker unlinking the producer's block
+            from multiprocessing import resource_tracker
+            self._shm = shared_memory.SharedMemory(name=name)
+            if name not in _LOCAL_CHANNELS:
+                resource_tracker.unregister(self._shm._name, "shared_memory")
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self._shm.buf)
+        if header['magic'] != MAGIC or header['version'] != LAYOUT_VERSION:
+            self._shm.close()
+            raise ValueError(f"Shared block '{name}' is not a Delta-V live state channel")
+        self.max_cars = int(header['max_cars'])
+        del header
+        self._header, self._cars = _views(self._shm.buf, self.max_cars)
+
+    @property
+    def seq(self):
+        return int(self._header['seq'])
+
+    def read(self, max_retries=1000):
+        """Returns (seq, frame) for a consistent frame, or (seq, None) before the first publish."""
+        for _ in range(max_retries):
+            before = int(self._header['seq'])
+            if before % 2:
+                continue
+            header = self._header.copy()
+            cars = self._cars[:int(header['n_cars'])].copy()
+            if int(self._header['seq']) == before:
+                if before == 0:
+                    return before, None
+                return before, self._to_frame(header, cars)
+        raise TimeoutError("Could not read a consistent frame from the live state channel")
+
+    def wait_for_update(self, last_seq, timeout=None, poll_interval=0.001):
+        """Blocks until a frame newer than last_seq is published; returns (seq, frame)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.seq == last_seq or self.seq % 2:
+            if deadline is not None and time.monotonic() > deadline:
+                return last_seq, None
+            time.sleep(poll_interval)
+        return self.read()
+
+    def close(self):
+        del self._header, self._cars
+        self._shm.close()
+
+    @staticmethod
+    def _to_frame(header, cars):
+        agents = []
+        for c in cars.tolist():
+            (car_id, team, rank, x, y, status, lap, last_lap, fastest_lap, average_lap, sectors, gap, interval,
+             soc, fuel, aero, mom_available, tyre_life, compound, tyre_temp, mom_active, on_cliff, pit_stops) = c
+            agents.append({
+                "id": car_id,
+                "team": team,
+                "rank": rank,
+                "position": [x, y],
+                "status": STATUS_NAMES[status],
+                "lap_data": {
+                    "current_lap": lap,
+                    "last_lap_time": last_lap,
+                    "fastest_lap_time": fastest_lap,
+                    "average_lap_time": average_lap,
+                    "last_sectors": [None if t != t else float(t) for t in sectors],
+                    "gap_to_leader": gap,
+                    "interval": interval
+                },
+                "vehicle_state": {
+                    "battery_soc": soc,
+                    "fuel_remaining_mj": fuel,
+                    "aero_mode": AERO_MODES[aero],
+                    "mom_available": mom_available,
+                    "tyre_life": tyre_life,
+                    "tyre_compound": compound,
+                    "tyre_temp": tyre_temp,
+                    "mom_active": mom_active,
+                    "on_cliff": on_cliff,
+                    "pit_stops_made": pit_stops
+                }
+            })
+        return {
+            "race_status": {
+                "timestamp": str(header['timestamp']),
+                "current_lap": int(header['current_lap']),
+                "total_laps": int(header['total_laps']),
+                "safety_car": SAFETY_CAR[int(header['safety_car'])],
+                "weather": WEATHER[int(header['weather'])]
+            },
+            "agents": agents
+        }
+
+
+if __name__ == "__main__":
+    # Minimal console dashboard: python shared_state.py [channel_name]
+    reader = SharedStateReader(sys.argv[1] if len(sys.argv) > 1 else "deltav_live")
+    seq = -1
+    try:
+        while True:
+            seq, frame = reader.wait_for_update(seq)
+            if frame:
+                rs = frame["race_status"]
+                leader = frame["agents"][0]["id"] if frame["agents"] else "-"
+                print(f"[{rs['timestamp']}] Lap {rs['current_lap']}/{rs['total_laps']} "
+                      f"{rs['weather']} SC:{rs['safety_car']} Leader: {leader}", end="\r")
+    except KeyboardInterrupt:
+        reader.close()
@@ -0,0 +1,151 @@
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+
+def write_snapshot_file(data, folder=".", prefix="data_snapshot_", timestamp=None):
+    """
+    Atomically writes one snapshot (temp file + rename) and returns its
+    path, or None if the write failed.
+    """
+    ts = (timestamp or datetime.now()).strftime("%Y%m%d_%H%M%S_%f")
+    fname = f"{prefix}{ts}.json"
+    temp_path = os.path.join(folder, f"{fname}.tmp")
+    final_path = os.path.join(folder, fname)
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(temp_path, final_path)
+    except Exception as e:
+        print(f"Error writing snapshot file {final_path}: {e}")
+        if os.path.exists(temp_path):
+            try: os.remove(temp_path)
+            except Exception: pass
+        return None
+    return final_path
+
+
+def write_simulation_data(data, folder=".", prefix="data_snapshot_", keep_last=12):
+    """Synchronous one-off snapshot write, pruning by globbing the folder."""
+    try:
+        os.makedirs(folder, exist_ok=True)
+    except Exception:
+        pass
+    final_path = write_snapshot_file(data, folder, prefix)
+    if final_path is None:
+        return None
+    try:
+        pattern = os.path.join(folder, f"{prefix}*.json")
+        files = sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True)
+        for old in files[keep_last:]:
+            try:
+                os.remove(old)
+            except Exception:
+                pass
+    except Exception:
+        pass
+    return final_path
+
+
+class SnapshotWriter:
+    """
+    Background writer for live-mode snapshots.
+
+    submit() never blocks the simulation thread: frames go into a bounded
+    queue and, when the disk falls behind, the oldest pending frame is
+    dropped in favour of the newest one. The last keep_last files are
+    tracked in memory, so retention never re-globs the folder.
+    """
+
+    def __init__(self, folder=".", prefix="data_snapshot_", keep_last=12, max_pending=4):
+        self.folder = folder
+        self.prefix = prefix
+        self.keep_last = keep_last
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.bytes_written = 0
+        self.busy_seconds = 0.0 # writer thread time spent writing and pruning (profiling)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._last_stamp = None
+
+        try:
+            os.makedirs(folder, exist_ok=True)
+        except Exception:
+            pass
+        # Seed retention with files left over from an earlier run (oldest first)
+        existing = sorted(glob.glob(os.path.join(folder, f"{prefix}*.json")), key=os.path.getmtime)
+        self._retained = deque(existing)
+        self._prune()
+
+        self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, data):
+        """Queues a snapshot for writing, dropping the stalest pending frame if full."""
+        if self._closed:
+            return
+        # File names carry the timestamp: keep them unique and in order within one clock tick
+        stamp = datetime.now()
+        if self._last_stamp is not None and stamp <= self._last_stamp:
+            stamp = self._last_stamp + timedelta(microseconds=1)
+        self._last_stamp = stamp
+        frame = (stamp, data)
+        while True:
+            try:
+                self._queue.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.frames_dropped += 1
+                except queue.Empty:
+                    pass
+
+    def close(self, timeout=5.0):
+        """Flushes pending frames and stops the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        while True:
+            try:
+                self._queue.put(None, timeout=timeout)
+                break
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.frames_dropped += 1
+                except queue.Empty:
+                    pass
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+            timestamp, data = frame
+            start = time.perf_counter()
+            path = write_snapshot_file(data, self.folder, self.prefix, timestamp)
+            if path is not None:
+                self.frames_written += 1
+                try:
+                    self.bytes_written += os.path.getsize(path)
+                except OSError:
+                    pass
+                self._retained.append(path)
+                self._prune()
+            self.busy_seconds += time.perf_counter() - start
+
+    def _prune(self):
+        while len(self._retained) > self.keep_last:
+            old = self._retained.popleft()
+            try:
+                os.remove(old)
+            except Exception:
+                pass
@@ -0,0 +1,237 @@
+import math
+
+# --- Strategy file schema ---
+# Keys every strategy must define (the agent reads them without a default)
+REQUIRED_KEYS = (
+    'battery_capacity_mj', 'fuel_tank_mj', 'vsc_speed', 'standard_top_speed_kph', 'grip_factor',
+    'mom_boost_speed_kph', 'pit_time_loss_seconds', 'c_1_power', 'c_2_x_mode_drag', 'c_2_z_mode_drag',
+    'battery_power_limit_mj_per_step', 'ice_power_limit_mj_per_step',
+    'tyre_wear_rate_soft', 'tyre_wear_rate_medium', 'tyre_wear_rate_hard',
+)
+# Optional keys and the defaults the agent has always used for them
+DEFAULTS = {
+    'electric_motor_taper_kph': 290.0,
+    'grip_modifier_wet_wrong_tyre': 0.5,
+    'grip_modifier_dry_wrong_tyre': 0.7,
+    'mom_energy_cost': 0.0,
+    'corner_regen_mj_per_second': 0.05,
+    'pit_tyre_cliff_threshold': 0.10,
+    'tyre_cliff_grip_modifier': 0.8,
+    'temp_gain_corners_per_sec': 1.5,
+    'temp_loss_straights_per_sec': 1.0,
+    'temp_gain_mom_per_sec': 2.0,
+    'plank_wear_rate': 0.005,
+    'mom_detection_gap': 10.0,
+    'mom_extra_energy_mj': 0.5,
+    'plank_wear_factor': 1.0,
+    'tyre_pressure_factor': 1.0,
+    'g_factor': 1.0,
+}
+# Keys that must be > 0 (they are divided by)
+POSITIVE_KEYS = ('battery_capacity_mj',)
+ENERGY_MAP_COMMANDS = ("DEPLOY", "STANDARD")
+# Weather grip states: tyres suit the weather, dry tyres in the wet, wet tyres in the dry
+GRIP_OK, GRIP_WET_WRONG_TYRE, GRIP_DRY_WRONG_TYRE = range(3)
+
+
+class CompiledStrategy:
+    """
+    One car's strategy, validated and compiled once for a track and time step.
+
+    Every value the per-tick agent code needs is a float attribute (the
+    JSON stores some as strings), speeds are already in m/s, and per-second
+    rates are pre-multiplied by the time step exactly as update_physics
+    multiplies them, so results stay bit-identical. The MOM brain ("Pro++"
+    energy map, else "Pro+" aggressiveness) is resolved to `deploy_at`, a
+    per-node-ID list of bools, and the target speed without MOM to
+    `speed_rows` (see decision_rows).
+
+    Raises ValueError naming the strategy file for a missing or non-numeric
+    key, or an energy map entry for a node the track does not have.
+    """
+
+    __slots__ = (
+        'source', 'time_step',
+        # Power unit
+        'battery_capacity_mj', 'fuel_tank_mj', 'c1_power', 'c2_x_drag', 'c2_z_drag', 'mom_energy_cost',
+        'battery_limit_mj', 'ice_limit_mj', 'regen_per_second', 'regen_per_step_mj', 'regen_soc_per_step',
+        # Speeds (m/s) and grip
+        'vsc_speed', 'top_speed_ms', 'taper_speed_ms', 'mom_boost_ms',
+        'grip_factor', 'wet_wrong_tyre_grip', 'dry_wrong_tyre_grip',
+        # Tyres
+        'wear_rate_soft', 'wear_rate_medium', 'wear_rate_hard',
+        'wear_soft_per_step', 'wear_medium_per_step', 'wear_hard_per_step',
+        'cliff_threshold', 'cliff_grip',
+        'temp_gain_corners', 'temp_loss_straights', 'temp_gain_mom',
+        'temp_step_z', 'temp_step_z_mom', 'temp_step_x', 'temp_step_x_mom',
+        # Pits, MOM
+        'pit_time_loss_s', 'mom_detection_gap', 'mom_extra_energy_mj', 'mom_extra_soc',
+        'has_energy_map', 'aggressive', 'deploy_at',
+        # Decision table
+        'speed_rows',
+        # Telemetry factors
+        'plank_wear_rate', 'plank_wear_factor', 'plank_wear_per_step', 'tyre_pressure_factor', 'g_factor',
+    )
+
+    def __init__(self, config, track, time_step, source="strategy", tables=None):
+        self.source = source
+        self.time_step = time_step
+        get = self._reader(config)
+
+        # --- Power unit ---
+        self.battery_capacity_mj = get('battery_capacity_mj')
+        self.fuel_tank_mj = get('fuel_tank_mj')
+        self.c1_power = get('c_1_power')
+        self.c2_x_drag = get('c_2_x_mode_drag')
+        self.c2_z_drag = get('c_2_z_mode_drag')
+        self.mom_energy_cost = get('mom_energy_cost')
+        self.battery_limit_mj = get('battery_power_limit_mj_per_step')
+        self.ice_limit_mj = get('ice_power_limit_mj_per_step')
+        self.regen_per_second = get('corner_regen_mj_per_second')
+        self.regen_per_step_mj = self.regen_per_second * time_step
+        self.regen_soc_per_step = self.regen_per_step_mj / self.battery_capacity_mj
+
+        # --- Speeds and grip ---
+        self.vsc_speed = get('vsc_speed')
+        self.top_speed_ms = get('standard_top_speed_kph') / 3.6
+        self.taper_speed_ms = get('electric_motor_taper_kph') / 3.6
+        self.mom_boost_ms = get('mom_boost_speed_kph') / 3.6
+        self.grip_factor = get('grip_factor')
+        self.wet_wrong_tyre_grip = get('grip_modifier_wet_wrong_tyre')
+        self.dry_wrong_tyre_grip = get('grip_modifier_dry_wrong_tyre')
+
+        # --- Tyres ---
+        self.wear_rate_soft = get('tyre_wear_rate_soft')
+        self.wear_rate_medium = get('tyre_wear_rate_medium')
+        self.wear_rate_hard = get('tyre_wear_rate_hard')
+        self.wear_soft_per_step = self.wear_rate_soft * time_step
+        self.wear_medium_per_step = self.wear_rate_medium * time_step
+        self.wear_hard_per_step = self.wear_rate_hard * time_step
+        self.cliff_threshold = get('pit_tyre_cliff_threshold')
+        self.cliff_grip = get('tyre_cliff_grip_modifier')
+        self.temp_gain_corners = get('temp_gain_corners_per_sec')
+        self.temp_loss_straights = get('temp_loss_straights_per_sec')
+        self.temp_gain_mom = get('temp_gain_mom_per_sec')
+        # (gain - loss) * time_step per aero mode, with and without MOM
+        self.temp_step_z = (self.temp_gain_corners - 0.0) * time_step
+        self.temp_step_z_mom = (self.temp_gain_corners + self.temp_gain_mom - 0.0) * time_step
+        self.temp_step_x = (0.0 - self.temp_loss_straights) * time_step
+        self.temp_step_x_mom = (0.0 + self.temp_gain_mom - self.temp_loss_straights) * time_step
+
+        # --- Pits, MOM ---
+        self.pit_time_loss_s = get('pit_time_loss_seconds')
+        self.mom_detection_gap = get('mom_detection_gap')
+        self.mom_extra_energy_mj = get('mom_extra_energy_mj')
+        self.mom_extra_soc = self.mom_extra_energy_mj / self.battery_capacity_mj
+        self._compile_mom_brain(config, track)
+
+        # --- Telemetry factors (per-car noise is already in config) ---
+        self.plank_wear_rate = get('plank_wear_rate')
+        self.plank_wear_factor = get('plank_wear_factor')
+        self.plank_wear_per_step = self.plank_wear_rate * time_step * self.plank_wear_factor
+        self.tyre_pressure_factor = get('tyre_pressure_factor')
+        self.g_factor = get('g_factor')
+
+        # --- Decision table ---
+        self.speed_rows = decision_rows(self, track, tables)
+
+    def _reader(self, config):
+        def get(key):
+            if key in config:
+                value = config[key]
+            elif key in DEFAULTS:
+                value = DEFAULTS[key]
+            else:
+                raise ValueError(f"{self.source}: missing required key '{key}'")
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{self.source}: '{key}' must be a number, got {value!r}") from None
+            if not math.isfinite(value) or (key in POSITIVE_KEYS and value <= 0):
+                raise ValueError(f"{self.source}: '{key}' has invalid value {value!r}")
+            return value
+        return get
+
+    def _compile_mom_brain(self, config, track):
+        """'Pro++' energy map takes precedence over 'Pro+' aggressiveness, as in make_decision."""
+        self.has_energy_map = "energy_deployment_map" in config
+        self.aggressive = False
+        if self.has_energy_map:
+            energy_map = config["energy_deployment_map"] or {}
+            if not isinstance(energy_map, dict):
+                raise ValueError(f"{self.source}: 'energy_deployment_map' must be an object of node: command")
+            deploy_at = [False] * track.num_nodes
+            for node, command in energy_map.items():
+                if node not in track.node_index:
+                    raise ValueError(f"{self.source}: energy_deployment_map node '{node}' is not on the track")
+                if command not in ENERGY_MAP_COMMANDS:
+                    raise ValueError(f"{self.source}: energy_deployment_map['{node}'] must be one of "
+                                     f"{', '.join(ENERGY_MAP_COMMANDS)}, got {command!r}")
+                deploy_at[track.node_index[node]] = (command == "DEPLOY")
+        else:
+            if "mom_aggressiveness" in config:
+                try:
+                    self.aggressive = 0.5 < float(config["mom_aggressiveness"])
+                except (TypeError, ValueError):
+                    raise ValueError(f"{self.source}: 'mom_aggressiveness' must be a number") from None
+            deploy_at = [self.aggressive] * track.num_nodes
+        self.deploy_at = deploy_at
+
+    def wear_per_step(self, compound):
+        """Base tyre wear for one step on `compound` (intermediates wear like mediums)."""
+        if compound == "soft":
+            return self.wear_soft_per_step
+        if compound == "hard":
+            return self.wear_hard_per_step
+        return self.wear_medium_per_step
+
+
+def decision_rows(params, track, tables=None):
+    """
+    make_decision's target velocity without MOM for every edge, one row per
+    (cliff, weather grip state): rows[on_cliff * 3 + grip_state][edge]. Pit
+    lane edges run at vsc_speed, straights at top speed and corners at
+    sqrt(grip * radius) capped by top speed; all are capped by taper speed.
+
+    The rows only depend on the speeds and grips in their key, so cars
+    compiled with the same `tables` dict (one per race) share them when
+    those values are equal.
+    """
+    key = (params.grip_factor, params.wet_wrong_tyre_grip, params.dry_wrong_tyre_grip, params.cliff_grip,
+           params.top_speed_ms, params.taper_speed_ms, params.vsc_speed)
+    if tables is not None and key in tables:
+        return tables[key]
+    top_speed, taper_speed = params.top_speed_ms, params.taper_speed_ms
+    rows = []
+    for tyre_mod in (1.0, params.cliff_grip):
+        for weather_mod in (1.0, params.wet_wrong_tyre_grip, params.dry_wrong_tyre_grip):
+            # Same products, in the same order, as the per-tick code used
+            grip = params.grip_factor * tyre_mod * weather_mod
+            row = []
+            for radius, is_pit_lane in zip(track.radius, track.is_pit_lane):
+                if is_pit_lane:
+                    velocity = params.vsc_speed
+                elif radius is None:
+                    velocity = top_speed
+                else:
+                    if radius <= 0: velocity = 0
+                    else: velocity = (grip * radius) ** 0.5
+                    if velocity > top_speed:
+                        velocity = top_speed
+                if velocity > taper_speed:
+                    velocity = taper_speed
+                row.append(velocity)
+            rows.append(row)
+    rows = tuple(rows)
+    if tables is not None:
+        tables[key] = rows
+    return rows
+
+
+def compile_strategy(config, track, time_step, source="strategy", tables=None):
+    """
+    Validates a strategy dict (the "strategy" block of a strategy file) and
+    compiles it. Pass one `tables` dict for a whole race to share decision
+    rows between cars.
+    """
+    return CompiledStrategy(config, track, time_step, source, tables)
@@ -0,0 +1,168 @@
+import math
+import numpy as np
+from agent import STATUS_NAMES
+
+# (field, dtype) in record_telemetry_step order. Measurements stay float64:
+# float32 shifts values that sit near a rounding boundary of the export.
+TELEMETRY_FIELDS = [
+    ('sim_time', np.float64),
+    ('lap', np.int16),
+    ('driver', np.int16),
+    ('status', np.int8),
+    ('tyre_life_pct', np.float64),
+    ('tyre_temp_c', np.float64),
+    ('tyre_pressure_psi', np.float64),
+    ('soc_percent', np.float64),
+    ('fuel_mj', np.float64),
+    ('plank_wear_mm', np.float64),
+    ('front_wing_angle_deg', np.float64),
+]
+
+ESTIMATED_LAP_SECONDS = 92.0
+
+
+class TelemetryRecorder:
+    """
+    Columnar telemetry store shared by the whole model.
+
+    One fixed-dtype array per field, preallocated for the expected race
+    length and grown in chunks, instead of an 11-key dict per car per tick.
+    Values are stored unrounded; rows() and the exporters apply the
+    rounding the old per-step dicts used. Rows are appended tick by tick, so the store is
+    already ordered by sim_time.
+    """
+
+    def __init__(self, drivers, race_laps, time_step, chunk_rows=65536):
+        self.drivers = list(drivers)
+        self.chunk_rows = chunk_rows
+        ticks = math.ceil(race_laps * ESTIMATED_LAP_SECONDS / time_step)
+        capacity = max(chunk_rows, ticks * len(self.drivers))
+        self.columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in TELEMETRY_FIELDS}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def capacity(self):
+        return len(self.columns['sim_time'])
+
+    @property
+    def nbytes(self):
+        """Bytes held by the recorded rows (not the spare capacity)."""
+        return sum(col.itemsize for col in self.columns.values()) * self.size
+
+    def _grow(self, needed):
+        new_capacity = self.capacity
+        while new_capacity < needed:
+            new_capacity += self.chunk_rows
+        for name, col in self.columns.items():
+            grown = np.empty(new_capacity, dtype=col.dtype)
+            grown[:self.size] = col[:self.size]
+            self.columns[name] = grown
+
+    def record(self, sim_time, lap, driver, status, tyre_life_pct, tyre_temp_c,
+               tyre_pressure_psi, soc_percent, fuel_mj, plank_wear_mm, front_wing_angle_deg):
+        """Stores one data point (driver and status are integer codes)."""
+        i = self.size
+        if i == self.capacity:
+            self._grow(i + 1)
+        c = self.columns
+        c['sim_time'][i] = sim_time
+        c['lap'][i] = lap
+        c['driver'][i] = driver
+        c['status'][i] = status
+        c['tyre_life_pct'][i] = tyre_life_pct
+        c['tyre_temp_c'][i] = tyre_temp_c
+        c['tyre_pressure_psi'][i] = tyre_pressure_psi
+        c['soc_percent'][i] = soc_percent
+        c['fuel_mj'][i] = fuel_mj
+        c['plank_wear_mm'][i] = plank_wear_mm
+        c['front_wing_angle_deg'][i] = front_wing_angle_deg
+        self.size = i + 1
+
+    def record_batch(self, **fields):
+        """Stores one data point per car from equally sized arrays (scalars broadcast)."""
+        count = len(fields['driver'])
+        start = self.size
+        end = start + count
+        if end > self.capacity:
+            self._grow(end)
+        for name, values in fields.items():
+            self.columns[name][start:end] = values
+        self.size = end
+
+    def iter_chunks(self, chunk_rows=None, driver=None):
+        """
+        Yields the recorded columns in bounded slices (dicts of array views),
+        optionally filtered to a single driver (by unique_id).
+        """
+        chunk_rows = chunk_rows or self.chunk_rows
+        driver_code = None if driver is None else self.drivers.index(driver)
+        for start in range(0, self.size, chunk_rows):
+            stop = min(start + chunk_rows, self.size)
+            chunk = {name: self.columns[name][start:stop] for name, _ in TELEMETRY_FIELDS}
+            if driver_code is not None:
+                keep = chunk['driver'] == driver_code
+                chunk = {name: col[keep] for name, col in chunk.items()}
+            yield chunk
+
+    def rows(self, driver=None, chunk_rows=None):
+        """
+        Yields the recorded data points as the dicts dump_full_telemetry
+        writes, optionally for a single driver (by unique_id).
+        """
+        drivers = self.drivers
+        names = [name for name, _ in TELEMETRY_FIELDS]
+        for chunk in self.iter_chunks(chunk_rows, driver):
+            for values in zip(*rounded_columns(chunk)):
+                row = dict(zip(names, values))
+                row['driver'] = drivers[row['driver']]
+                row['status'] = STATUS_NAMES[row['status']]
+                yield row
+
+
+# Decimals each field is rounded to on export (None = integer code)
+EXPORT_DECIMALS = {
+    'sim_time': 2,
+    'lap': None,
+    'driver': None,
+    'status': None,
+    'tyre_life_pct': 1,
+    'tyre_temp_c': 1,
+    'tyre_pressure_psi': 1,
+    'soc_percent': 1,
+    'fuel_mj': 2,
+    'plank_wear_mm': 3,
+    'front_wing_angle_deg': 1,
+}
+
+
+# Fields the per-step dicts rounded as NumPy floats (tyre_temp goes through
+# np.clip); np.round scales by 10**decimals first, so it can disagree with
+# round() on a float within a hair of a half.
+NUMPY_ROUNDED = ('tyre_temp_c', 'tyre_pressure_psi')
+
+
+def rounded_columns(chunk):
+    """
+    Python lists per field (TELEMETRY_FIELDS order), rounded for export to
+    the same values as the old per-step dicts: round() for Python floats,
+    np.round for the NUMPY_ROUNDED fields.
+    """
+    columns = []
+    for name, _ in TELEMETRY_FIELDS:
+        decimals = EXPORT_DECIMALS[name]
+        col = chunk[name]
+        if decimals is None:
+            columns.append(col.tolist())
+            continue
+        values = np.round(col, decimals).tolist()
+        if name in NUMPY_ROUNDED:
+            columns.append(values)
+            continue
+        scaled = col * 10.0 ** decimals
+        for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6).tolist():
+            values[i] = round(col[i].item(), decimals)
+        columns.append(values)
+    return columns
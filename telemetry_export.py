@@ -0,0 +1,124 @@
+import csv
+import json
+import os
+import numpy as np
+from agent import STATUS_NAMES
+from telemetry import TELEMETRY_FIELDS, rounded_columns
+
+EXPORT_FORMATS = {
+    ".json": "json",
+    ".jsonl": "jsonl",
+    ".csv": "csv",
+    ".npz": "npz",
+    ".parquet": "parquet",
+}
+
+FIELD_NAMES = [name for name, _ in TELEMETRY_FIELDS]
+
+
+def export_telemetry(recorder, path, fmt=None, chunk_rows=None):
+    """
+    Streams a TelemetryRecorder to disk in bounded chunks and returns the
+    number of rows written.
+
+    The recorder is one shared stream appended tick by tick, so it is
+    already in sim_time order and no sort or merge is needed. fmt is one of
+    json (a compact JSON array, what the dashboard reads), jsonl, csv, npz
+    (raw columns) or parquet (needs pyarrow); by default it comes from the
+    file extension. The file is written to a .tmp and renamed when done.
+    """
+    if fmt is None:
+        fmt = EXPORT_FORMATS.get(os.path.splitext(path)[1].lower(), "json")
+    if fmt not in EXPORT_FORMATS.values():
+        raise ValueError(f"Unknown telemetry export format '{fmt}'")
+
+    temp_path = f"{path}.tmp"
+    try:
+        if fmt == "npz":
+            _write_npz(recorder, temp_path)
+        elif fmt == "parquet":
+            _write_parquet(recorder, temp_path, chunk_rows)
+        else:
+            with open(temp_path, "w", encoding="utf-8", newline="") as f:
+                if fmt == "csv":
+                    _write_csv(recorder, f, chunk_rows)
+                else:
+                    _write_json(recorder, f, chunk_rows, lines=(fmt == "jsonl"))
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(recorder)
+
+
+def _write_json(recorder, f, chunk_rows, lines):
+    # One %-template per row; names are JSON-encoded once up front
+    template = "{" + ", ".join(f'"{name}": %s' for name in FIELD_NAMES) + "}"
+    drivers = [json.dumps(d) for d in recorder.drivers]
+    statuses = [json.dumps(s) for s in STATUS_NAMES]
+    separator = "\n" if lines else ",\n"
+
+    if not lines:
+        f.write("[\n")
+    first = True
+    for chunk in recorder.iter_chunks(chunk_rows):
+        columns = rounded_columns(chunk)
+        columns[2] = [drivers[d] for d in columns[2]]
+        columns[3] = [statuses[s] for s in columns[3]]
+        text = separator.join(template % row for row in zip(*columns))
+        if not text:
+            continue
+        if not first:
+            f.write(separator)
+        f.write(text)
+        first = False
+    f.write("\n" if lines else "\n]\n")
+
+
+def _write_csv(recorder, f, chunk_rows):
+    writer = csv.writer(f)
+    writer.writerow(FIELD_NAMES)
+    drivers = recorder.drivers
+    for chunk in recorder.iter_chunks(chunk_rows):
+        columns = rounded_columns(chunk)
+        columns[2] = [drivers[d] for d in columns[2]]
+        columns[3] = [STATUS_NAMES[s] for s in columns[3]]
+        writer.writerows(zip(*columns))
+
+
+def _write_npz(recorder, path):
+    # Raw typed columns plus the code tables needed to decode driver/status
+    with open(path, "wb") as f:
+        np.savez_compressed(
+            f,
+            driver_names=np.array(recorder.drivers),
+            status_names=np.array(STATUS_NAMES),
+            **{name: recorder.columns[name][:len(recorder)] for name in FIELD_NAMES},
+        )
+
+
+def _write_parquet(recorder, path, chunk_rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet telemetry export needs pyarrow (pip install pyarrow)")
+
+    drivers = pa.array(recorder.drivers)
+    statuses = pa.array(STATUS_NAMES)
+    writer = None
+    try:
+        for chunk in recorder.iter_chunks(chunk_rows):
+            columns = {name: pa.array(chunk[name]) for name in FIELD_NAMES}
+            columns['driver'] = pa.DictionaryArray.from_arrays(pa.array(chunk['driver'].astype(np.int32)), drivers)
+            columns['status'] = pa.DictionaryArray.from_arrays(pa.array(chunk['status'].astype(np.int32)), statuses)
+            table = pa.table(columns)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+        if writer is None:
+            pq.write_table(pa.table({name: pa.array(recorder.columns[name][:0]) for name in FIELD_NAMES}), path)
+    finally:
+        if writer is not None:
+            writer.close()
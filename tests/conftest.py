@@ -0,0 +1,23 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmark import BENCHMARK_DATA, GOLDEN_CONFIG
+
+# The benchmark's golden grid: six cars, six laps on a small circuit, with all three strategies
+DATA = BENCHMARK_DATA
+GRID_FILE = GOLDEN_CONFIG
+
+
+@pytest.fixture
+def grid_file():
+    return GRID_FILE
+
+
+@pytest.fixture(scope="session")
+def race_assets():
+    from model import load_race_assets
+    return load_race_assets(GRID_FILE)
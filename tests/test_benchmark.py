@@ -0,0 +1,39 @@
+import json
+import os
+import pytest
+from benchmark import GOLDEN_CONFIG, GOLDEN_FILE, GOLDEN_LAPS, check_golden, golden_key, golden_outcomes, synthetic_assets
+from model import load_race_assets
+
+
+@pytest.fixture(scope="module")
+def golden_assets():
+    return synthetic_assets(load_race_assets(GOLDEN_CONFIG), laps=GOLDEN_LAPS)
+
+
+def test_race_outcomes_match_golden(golden_assets):
+    outcomes = golden_outcomes(golden_assets, engines=("agent",))
+    assert check_golden(outcomes, GOLDEN_FILE, golden_key(GOLDEN_CONFIG, golden_assets)) == []
+
+
+def test_missing_golden_fails(tmp_path):
+    outcomes = {"agent/seed1": "0" * 64}
+    with pytest.raises(ValueError, match="--update-golden"):
+        check_golden(outcomes, str(tmp_path / "golden.json"), "grid-0")
+    check_golden(outcomes, str(tmp_path / "golden.json"), "grid-0", update=True)
+    assert check_golden(outcomes, str(tmp_path / "golden.json"), "grid-0") == []
+    with pytest.raises(ValueError):
+        check_golden(outcomes, str(tmp_path / "golden.json"), "other-0")
+
+
+def test_golden_key_follows_content_not_path(golden_assets, tmp_path):
+    config = json.load(open(GOLDEN_CONFIG))
+    folder = os.path.dirname(GOLDEN_CONFIG)
+    config['track'] = os.path.join(folder, config['track'])
+    for entry in config['grid']:
+        entry['strategy_file'] = os.path.join(folder, entry['strategy_file'])
+    moved = tmp_path / "grid.json"
+    moved.write_text(json.dumps(config))
+    key = golden_key(GOLDEN_CONFIG, golden_assets)
+    assert golden_key(str(moved), synthetic_assets(load_race_assets(str(moved)), laps=GOLDEN_LAPS)) == key
+    # Same file name, different race
+    assert golden_key(str(moved), synthetic_assets(load_race_assets(str(moved)), laps=GOLDEN_LAPS + 1)) != key
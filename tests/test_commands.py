@@ -0,0 +1,126 @@
+import json
+import os
+import socket
+import threading
+import time
+import pytest
+from commands import CommandChannel
+from model import DeltaVModel
+from race_events import PAUSE_CHANGE, VSC_CHANGE, RingBufferSink
+
+
+@pytest.fixture
+def model(race_assets):
+    model = DeltaVModel(seed=1, assets=race_assets, record_telemetry=False, telemetry_path=None)
+    yield model
+    model.close()
+
+
+def test_race_control_goes_to_the_event_bus(model, capsys):
+    sink = model.events.subscribe(RingBufferSink())
+    channel = CommandChannel(command_file=None)
+    for command in ({"cmd": "pause"}, {"cmd": "vsc", "active": True}, {"cmd": "resume"},
+                    {"cmd": "vsc", "active": True}):
+        channel.submit(command)
+    assert channel.apply_pending(model) == 4
+    assert [(e.type, e.data) for e in sink.events()] == [
+        (PAUSE_CHANGE, {"paused": True}), (VSC_CHANGE, {"active": True}), (PAUSE_CHANGE, {"paused": False})]
+    assert model.vsc_active and not channel.paused
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.parametrize("command", [
+    {"cmd": "vsc", "active": "false"}, {"cmd": "vsc", "active": 0}, {"cmd": "weather", "state": "SNOW"},
+    {"cmd": "speed", "multiplier": -1}, {"cmd": "warp"}, ["pause"],
+])
+def test_malformed_commands_are_rejected(command):
+    with pytest.raises(ValueError):
+        CommandChannel(command_file=None).submit(command)
+
+
+def write_commands(path, stamp, **values):
+    path.write_text(json.dumps(values))
+    os.utime(path, ns=(stamp, stamp)) # a new mtime even within one clock tick
+
+
+def wait_for(channel, model, done, timeout=5.0):
+    """Applies commands as the channel receives them until done() holds."""
+    deadline = time.monotonic() + timeout
+    while not done():
+        assert time.monotonic() < deadline, "command never arrived"
+        channel.wait(0.05)
+        channel.apply_pending(model)
+
+
+def test_file_left_by_an_earlier_session_only_pauses(model, tmp_path):
+    path = tmp_path / "commands.json"
+    write_commands(path, 10**18, pause_active=True, vsc_active=True, weather="WET", speed_multiplier=8.0)
+    channel = CommandChannel(str(path), poll_interval=0.01, speed_multiplier=2.0)
+    try:
+        wait_for(channel, model, lambda: channel.paused)
+        time.sleep(0.05)
+        channel.apply_pending(model)
+        assert (model.vsc_active, model.weather_state, channel.speed_multiplier) == (False, "DRY", 2.0)
+
+        # Changes made while the race runs apply at the next tick
+        write_commands(path, 2 * 10**18, pause_active=False, vsc_active=False, weather="WET", speed_multiplier=8.0)
+        wait_for(channel, model, lambda: not channel.paused)
+        write_commands(path, 3 * 10**18, pause_active=False, vsc_active=True, weather="DRY", speed_multiplier=4.0)
+        wait_for(channel, model, lambda: channel.speed_multiplier == 4.0)
+        assert (model.vsc_active, model.weather_state) == (True, "DRY")
+    finally:
+        channel.close()
+
+
+class CountingChannel(CommandChannel):
+    reads = 0
+
+    def _load_file(self):
+        self.reads += 1
+        return super()._load_file()
+
+
+def test_unchanged_file_is_not_reread(model, tmp_path):
+    path = tmp_path / "commands.json"
+    channel = CountingChannel(str(path), poll_interval=0.005)
+    try:
+        write_commands(path, 10**18, pause_active=True)
+        wait_for(channel, model, lambda: channel.paused)
+        reads = channel.reads
+        time.sleep(0.1) # about 20 polls
+        assert channel.reads == reads
+        assert channel.apply_pending(model) == 0
+    finally:
+        channel.close()
+
+
+def test_socket_commands_apply_at_the_next_tick(model):
+    channel = CommandChannel(command_file=None, port=0)
+    try:
+        with socket.create_connection(("127.0.0.1", channel.port), timeout=5) as conn:
+            stream = conn.makefile("rw")
+            stream.write('{"cmd": "vsc", "active": true}\n{"cmd": "vsc", "active": "yes"}\n')
+            stream.flush()
+            replies = [json.loads(stream.readline()) for _ in range(2)]
+        assert replies[0] == {"ok": True}
+        assert not replies[1]["ok"] and "true or false" in replies[1]["error"]
+        assert not model.vsc_active # queued, not applied
+        model.env.run(until=model.time_step)
+        channel.apply_pending(model)
+        assert model.vsc_active
+    finally:
+        channel.close()
+
+
+def test_wait_wakes_on_a_new_command():
+    channel = CommandChannel(command_file=None)
+    woke = []
+    waiter = threading.Thread(target=lambda: woke.append((channel.wait(5.0), time.monotonic())))
+    waiter.start()
+    time.sleep(0.05)
+    sent = time.monotonic()
+    channel.submit({"cmd": "resume"})
+    waiter.join(5.0)
+    assert woke and woke[0][0]
+    assert woke[0][1] - sent < 1.0
+    assert not channel.wait(0.01) # the wake-up was consumed
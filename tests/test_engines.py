@@ -0,0 +1,137 @@
+import pytest
+from model import DeltaVModel
+
+SEED = 7
+# Per-driver state compared across engines
+STATE = (
+    'status', 'laps_completed', 'lap_times', 'position', 'velocity', 'total_distance_traveled',
+    'total_race_time_s', 'battery_soc', 'fuel_energy_remaining', 'tyre_compound',
+    'tyre_life_remaining', 'on_cliff', 'tyre_temp', 'pit_stops_made', 'mom_uses_count', 'plank_wear',
+)
+
+
+def run_to_flag(assets, engine):
+    model = DeltaVModel(seed=SEED, engine=engine, record_telemetry=False, telemetry_path=None,
+                        assets=assets)
+    env = model.env
+    env.run(until=env.any_of([model.race_process, env.timeout(model.race_laps * 92 * 2)]))
+    model.sync_agents()
+    ranked = sorted(model.f1_agents, key=lambda a: a.total_distance_traveled, reverse=True)
+    order = [a.unique_id for a in ranked]
+    state = {a.unique_id: {name: getattr(a, name) for name in STATE} for a in model.f1_agents}
+    return model, order, state
+
+
+@pytest.fixture(scope="module")
+def agent_race(race_assets):
+    return run_to_flag(race_assets, "agent")
+
+
+def test_agent_race_reaches_the_flag(agent_race):
+    model, order, state = agent_race
+    assert model.race_over
+    assert state[order[0]]['laps_completed'] == model.race_laps
+
+
+def test_vector_engine_matches_agent_engine(race_assets, agent_race):
+    model, order, state = agent_race
+    vector, vector_order, vector_state = run_to_flag(race_assets, "vector")
+    assert vector.env.now == model.env.now
+    assert vector_order == order
+    for driver in order:
+        # bit for bit: same draws, same float arithmetic
+        assert vector_state[driver] == state[driver], driver
+
+
+def test_event_engine_matches_agent_engine(race_assets, agent_race):
+    model, order, state = agent_race
+    event, event_order, event_state = run_to_flag(race_assets, "event")
+    assert event_order == order
+    for driver in order:
+        expected, actual = state[driver], event_state[driver]
+        for name in STATE:
+            if name == 'position':
+                assert actual[name][0] == expected[name][0], (driver, name)
+                assert actual[name][1] == pytest.approx(expected[name][1], abs=1e-6), (driver, name)
+            elif name == 'lap_times':
+                assert list(actual[name]) == pytest.approx(list(expected[name]), abs=1e-9), (driver, name)
+            elif isinstance(expected[name], float):
+                assert actual[name] == pytest.approx(expected[name], rel=1e-9, abs=1e-9), (driver, name)
+            else:
+                assert actual[name] == expected[name], (driver, name)
+
+
+def test_vector_engine_syncs_agents_only_when_read(race_assets):
+    model = DeltaVModel(seed=SEED, engine="vector", record_telemetry=False, telemetry_path=None,
+                        assets=race_assets)
+    leader = model.f1_agents[0]
+    start = leader.total_distance_traveled
+    model.env.run(until=5.0)
+    assert model.engine.agents_stale
+    assert leader.total_distance_traveled == start
+    model.get_simulation_data()
+    assert not model.engine.agents_stale
+    assert leader.total_distance_traveled > start
+
+
+def test_vector_compound_codes_are_per_engine(race_assets):
+    from vector_engine import COMPOUND_NAMES
+    codes = []
+    for _ in range(2):
+        model = DeltaVModel(seed=SEED, engine="vector", record_telemetry=False, telemetry_path=None,
+                            assets=race_assets)
+        model.f1_agents[0].tyre_compound = "wet"
+        model.engine._load_state()
+        codes.append(model.engine.compound_names.index("wet"))
+    assert codes == [len(COMPOUND_NAMES)] * 2
+    assert "wet" not in COMPOUND_NAMES
+
+
+class FrameLog:
+    """Stands in for a live consumer (shared state): notes the sim time of every frame."""
+
+    def __init__(self, model):
+        self.model = model
+        self.times = []
+
+    def publish(self, data):
+        self.times.append(self.model.env.now)
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("engine", ["agent", "event"])
+def test_live_frames_do_not_change_the_race(race_assets, engine):
+    from checkpoint import finish
+    results = []
+    logs = []
+    for live, interval in ((False, None), (True, None), (True, 0.5)):
+        model = DeltaVModel(seed=SEED, engine=engine, record_telemetry=False, telemetry_path=None,
+                            assets=race_assets, snapshot_interval=interval)
+        if live:
+            model.shared_state = FrameLog(model)
+            logs.append(model.shared_state)
+        results.append(finish(model))
+    assert results[1] == results[0]
+    assert results[2] == results[0]
+
+    every_tick, sampled = logs
+    race_time = results[0]['race_time_s']
+    # One frame per tick plus the chequered-flag frame end_race publishes
+    assert len(every_tick.times) == pytest.approx(race_time / model.time_step + 2, abs=1)
+    frames = sampled.times[:-1]
+    # Every multiple of the interval up to the flag, and nothing in between
+    assert frames == pytest.approx([0.5 * i for i in range(len(frames))], abs=1e-6)
+    assert race_time - 0.5 < frames[-1] <= race_time
+
+
+def test_build_grid_gives_the_model_cars(race_assets):
+    from model import build_grid
+    from rng import RaceStreams
+    model = DeltaVModel(seed=SEED, record_telemetry=False, telemetry_path=None, assets=race_assets)
+    cars = build_grid(race_assets, RaceStreams(SEED).setup)
+    assert [a.unique_id for a in cars] == [a.unique_id for a in model.f1_agents]
+    for car, agent in zip(cars, model.f1_agents):
+        assert car.model is None
+        assert (car.strategy, car.position, car.telemetry_id) == (agent.strategy, agent.position, agent.telemetry_id)
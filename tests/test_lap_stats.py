@@ -0,0 +1,52 @@
+import math
+import pytest
+from batch_engine import run_batch
+from lap_stats import LapBoard, LapStats
+from monte_carlo import run_race
+
+
+def test_lap_stats_running_values():
+    stats = LapStats(sectors=3, rolling_laps=2)
+    assert stats.rolling_average == 0.0
+    race_time = 0.0
+    for lap, (s1, s2, s3) in enumerate([(30.0, 31.0, 32.0), (29.0, 32.0, 30.0), (31.0, 30.5, 30.0)], start=1):
+        stats.split(1, race_time + s1)
+        stats.split(2, race_time + s1 + s2)
+        race_time += s1 + s2 + s3
+        assert stats.complete_lap(race_time) == pytest.approx(s1 + s2 + s3)
+        assert stats.last_sectors == pytest.approx([s1, s2, s3])
+        assert stats.sectors == [None, None, None]
+        assert stats.laps == lap
+    assert stats.last_lap == pytest.approx(91.5)
+    assert (stats.fastest_lap, stats.fastest_lap_number) == (pytest.approx(91.0), 2)
+    assert stats.rolling_average == pytest.approx((91.0 + 91.5) / 2) # the last two laps only
+    assert stats.best_sectors == pytest.approx([29.0, 30.5, 30.0])
+    assert stats.total_time == pytest.approx(race_time)
+
+
+def test_lap_board_gap_and_interval():
+    board = LapBoard()
+    leader, second, third = LapStats(), LapStats(), LapStats()
+    leader.complete_lap(90.0, board)
+    second.complete_lap(91.5, board)
+    third.complete_lap(94.0, board)
+    assert (leader.gap_to_leader, leader.interval) == (0.0, 0.0)
+    assert (second.gap_to_leader, second.interval) == pytest.approx((1.5, 1.5))
+    assert (third.gap_to_leader, third.interval) == pytest.approx((4.0, 2.5))
+    # Lap 2: the third car is now ahead of the second on the road
+    leader.complete_lap(180.0, board)
+    third.complete_lap(183.0, board)
+    second.complete_lap(184.0, board)
+    assert (third.gap_to_leader, third.interval) == pytest.approx((3.0, 3.0))
+    assert (second.gap_to_leader, second.interval) == pytest.approx((4.0, 1.0))
+    assert math.isnan(board.leader_times[0])
+
+
+def test_batch_engine_lap_stats_match_single_races(race_assets):
+    seeds = [0, 1, 2, 3]
+    for batched in run_batch(race_assets, seeds):
+        single = run_race(race_assets, batched['seed'], engine="agent")
+        for driver, expected in single['drivers'].items():
+            actual = batched['drivers'][driver]
+            assert actual['fastest_lap_s'] == expected['fastest_lap_s'], (batched['seed'], driver)
+            assert actual['gap_to_leader_s'] == expected['gap_to_leader_s'], (batched['seed'], driver)
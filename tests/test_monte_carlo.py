@@ -0,0 +1,32 @@
+import pytest
+from monte_carlo import RacePool, print_sequential, run_race, run_sequential
+
+
+def test_pool_rejects_batch_engine(grid_file):
+    with pytest.raises(ValueError, match="map_batches"):
+        RacePool(grid_file, workers=2, engine="batch")
+
+
+def test_headless_race_prints_nothing(race_assets, capsys):
+    result = run_race(race_assets, seed=1, engine="agent")
+    assert result['race_completed']
+    assert capsys.readouterr().out == ""
+
+
+def test_sequential_checks_metrics_before_racing(grid_file, monkeypatch):
+    def no_races(*args):
+        raise AssertionError("raced before checking the metrics")
+    monkeypatch.setattr("monte_carlo._init_worker", no_races)
+    for spec in ("position:Hamilton", "win:strategy_missing.json", "delta:strategy_field_baseline.json,Ocon"):
+        with pytest.raises(ValueError, match="Metric"):
+            run_sequential(grid_file, [spec], max_races=4, workers=1)
+
+
+def test_sequential_budget_report_names_missed_targets(grid_file, capsys):
+    outcome = run_sequential(grid_file, ["win:Ocon=0.01", "position:Ocon=100"],
+                             max_races=2, workers=1, engine="agent", min_races=1)
+    assert outcome['stopped'] == "budget" and outcome['races_run'] == 2
+    print_sequential(outcome)
+    report = capsys.readouterr().out.splitlines()[-1]
+    assert "after 2 races" in report
+    assert "not reached: win:Ocon" in report and "position:" not in report
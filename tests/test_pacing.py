@@ -0,0 +1,12 @@
+import pytest
+from model import DeltaVModel
+from pacing import RacePacer
+
+
+@pytest.mark.parametrize("mode", ["headless", "batch"])
+def test_pacer_stops_at_the_flag(race_assets, mode):
+    model = DeltaVModel(seed=2, assets=race_assets, record_telemetry=False, telemetry_path=None)
+    pacer = RacePacer(model, mode=mode, max_time=model.race_laps * 92 * 2).run()
+    assert model.race_over
+    assert pacer.sim_seconds == pytest.approx(model.step_count * model.time_step, abs=model.time_step)
+    assert pacer.sim_seconds < pacer.max_time
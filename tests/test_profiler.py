@@ -0,0 +1,67 @@
+import pytest
+from model import DeltaVModel
+from profiler import TickProfiler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeWriter:
+    busy_seconds = 0.0
+    frames_written = 0
+    frames_dropped = 0
+
+
+def profiled_ticks(profiler, ticks, **phases):
+    clock = profiler.clock = FakeClock()
+    for tick in range(ticks):
+        profiler.begin_tick(tick * 0.1)
+        for phase, seconds in phases.items():
+            profiler.add(phase, seconds)
+            clock.now += seconds
+        profiler.end_tick((tick + 1) * 0.1)
+
+
+def test_report_totals_shares_and_bound():
+    profiler = TickProfiler(0.1)
+    profiled_ticks(profiler, 10, engine_step=0.003, get_simulation_data=0.001)
+    r = profiler.report()
+    assert (r['steps'], r['ticks'], r['sim_seconds']) == (10, 10, pytest.approx(1.0))
+    assert r['busy_seconds'] == pytest.approx(0.04)
+    assert r['phases']['engine_step']['share'] == pytest.approx(0.75)
+    assert r['phases']['engine_step']['p50_us'] == pytest.approx(3000.0)
+    assert 'perceive' not in r['phases']
+    assert r['bound'] == "physics"
+    assert r['snapshot_io'] is None
+
+
+def test_snapshot_writer_time_counts_towards_the_bound():
+    writer = FakeWriter()
+    profiler = TickProfiler(0.1, snapshot_writer=writer)
+    profiled_ticks(profiler, 10, engine_step=0.003, write_simulation_data=0.0001)
+    assert profiler.report()['bound'] == "physics"
+    writer.busy_seconds, writer.frames_written, writer.frames_dropped = 0.5, 6, 4
+    r = profiler.report()
+    assert r['bound'] == "snapshot"
+    assert r['snapshot_io'] == {"busy_s": 0.5, "frames_written": 6, "frames_dropped": 4}
+    assert r['busy_seconds'] == pytest.approx(0.031) # the writer thread is not sim-loop time
+    assert "4 dropped" in profiler.format_report()
+
+
+def test_profiled_live_race(race_assets, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path) # live snapshots go to the working directory
+    model = DeltaVModel(seed=1, assets=race_assets, telemetry_path=None, profile=True,
+                        live_snapshot_mode=True, snapshot_interval=1.0)
+    model.env.run(until=20.0)
+    model.close()
+    r = model.profiler.report()
+    assert r['steps'] == 200
+    assert {"perceive", "update_physics", "record_telemetry_step", "get_simulation_data"} <= set(r['phases'])
+    io = r['snapshot_io']
+    assert io['frames_written'] + io['frames_dropped'] == 20
+    assert io['busy_s'] > 0
@@ -0,0 +1,23 @@
+import zlib
+from race_events import EventFileSink, RaceEvent, read_event_file
+
+EVENT = RaceEvent(12.3456, "pit_entry", "Ocon", 4, {"tyre": "hard"})
+
+
+def test_event_file_is_readable_while_open(tmp_path):
+    path = str(tmp_path / "events.jsonl")
+    sink = EventFileSink(path)
+    sink(EVENT)
+    assert list(read_event_file(path)) == [EVENT._replace(time=12.346)]
+    sink.close()
+
+
+def test_gzip_event_file_is_flushed_per_event(tmp_path):
+    path = str(tmp_path / "events.jsonl.gz")
+    sink = EventFileSink(path)
+    sink(EVENT)
+    with open(path, "rb") as f:
+        text = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(f.read()).decode()
+    assert text.startswith('[12.346,"pit_entry","Ocon",4,')
+    sink.close()
+    assert list(read_event_file(path)) == [EVENT._replace(time=12.346)]
@@ -0,0 +1,37 @@
+import os
+import pytest
+from model import DeltaVModel
+from shared_state import SharedStateChannel, SharedStateReader
+
+
+@pytest.fixture
+def channel_name():
+    return f"deltav_test_{os.getpid()}"
+
+
+def test_existing_block_is_not_taken_over(channel_name):
+    owner = SharedStateChannel(channel_name, max_cars=4)
+    try:
+        with pytest.raises(FileExistsError, match="replace=True"):
+            SharedStateChannel(channel_name, max_cars=4)
+        SharedStateChannel(channel_name, max_cars=4, replace=True).close()
+    finally:
+        owner.close()
+
+
+def test_final_frame_outlives_the_race(race_assets, channel_name):
+    model = DeltaVModel(seed=1, assets=race_assets, record_telemetry=False, telemetry_path=None,
+                        shared_state_name=channel_name)
+    try:
+        model.env.run(until=model.race_process)
+        reader = SharedStateReader(channel_name)
+        _, frame = reader.read()
+        reader.close()
+        leader = max(model.f1_agents, key=lambda a: a.total_distance_traveled)
+        assert frame['race_status'] == model.get_simulation_data()['race_status']
+        assert frame['agents'][0]['id'] == leader.unique_id
+        assert frame['agents'][0]['status'] == "FINISHED"
+    finally:
+        model.close()
+    with pytest.raises(FileNotFoundError):
+        SharedStateReader(channel_name)
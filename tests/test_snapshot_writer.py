@@ -0,0 +1,62 @@
+import json
+import os
+import threading
+import snapshot_writer
+from snapshot_writer import SnapshotWriter
+
+
+def snapshots(folder):
+    """Frame numbers in the folder's snapshot files, oldest first."""
+    names = sorted(n for n in os.listdir(folder) if n.startswith("data_snapshot_"))
+    frames = []
+    for name in names:
+        with open(os.path.join(folder, name)) as f:
+            frames.append(json.load(f)["frame"])
+    return frames
+
+
+def test_close_flushes_pending_frames(tmp_path):
+    writer = SnapshotWriter(str(tmp_path), keep_last=10, max_pending=8)
+    for frame in range(5):
+        writer.submit({"frame": frame})
+    writer.close()
+    assert snapshots(tmp_path) == [0, 1, 2, 3, 4]
+    assert (writer.frames_written, writer.frames_dropped) == (5, 0)
+    writer.submit({"frame": 5}) # ignored once closed
+    assert snapshots(tmp_path) == [0, 1, 2, 3, 4]
+
+
+def test_full_queue_drops_the_oldest_frame(tmp_path, monkeypatch):
+    writing, disk_free = threading.Event(), threading.Event()
+    write = snapshot_writer.write_snapshot_file
+
+    def slow_disk(*args):
+        writing.set()
+        disk_free.wait(5.0)
+        return write(*args)
+
+    monkeypatch.setattr(snapshot_writer, "write_snapshot_file", slow_disk)
+    writer = SnapshotWriter(str(tmp_path), keep_last=10, max_pending=2)
+    writer.submit({"frame": 0})
+    assert writing.wait(5.0) # frame 0 is being written; the queue is empty
+    for frame in range(1, 7):
+        writer.submit({"frame": frame})
+    assert writer.frames_dropped == 4
+    disk_free.set()
+    writer.close()
+    assert snapshots(tmp_path) == [0, 5, 6]
+    assert writer.frames_written == 3
+
+
+def test_keeps_only_the_last_files_including_an_earlier_run(tmp_path):
+    for k in range(3):
+        old = tmp_path / f"data_snapshot_20200101_00000{k}_000000.json"
+        old.write_text(json.dumps({"frame": -3 + k}))
+        os.utime(old, (1_000_000 + k, 1_000_000 + k))
+    (tmp_path / "other.json").write_text("{}")
+    writer = SnapshotWriter(str(tmp_path), keep_last=2)
+    assert snapshots(tmp_path) == [-2, -1] # pruned when the writer starts
+    writer.submit({"frame": 0})
+    writer.close()
+    assert snapshots(tmp_path) == [-1, 0]
+    assert (tmp_path / "other.json").exists()
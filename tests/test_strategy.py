@@ -0,0 +1,38 @@
+import pytest
+from strategy import compile_strategy
+
+
+@pytest.fixture
+def base(race_assets):
+    return race_assets['strategies']['strategy_haas_energy_burn.json']['strategy']
+
+
+def test_valid_strategy_compiles(race_assets, base):
+    track = race_assets['compiled_track']
+    params = compile_strategy(dict(base), track, 0.1, source="burn.json")
+    assert params.top_speed_ms == pytest.approx(float(base['standard_top_speed_kph']) / 3.6)
+    assert sum(params.deploy_at) == len(base['energy_deployment_map'])
+
+
+@pytest.mark.parametrize("change, message", [
+    ({'fuel_tank_mj': None}, "missing required key 'fuel_tank_mj'"),
+    ({'grip_factor': "fast"}, "'grip_factor' must be a number"),
+    ({'vsc_speed': float("nan")}, "'vsc_speed' has invalid value"),
+    ({'battery_capacity_mj': 0}, "'battery_capacity_mj' has invalid value"),
+    ({'battery_capacity_mj': -4.0}, "'battery_capacity_mj' has invalid value"),
+    ({'energy_deployment_map': {'n_nowhere': "DEPLOY"}}, "node 'n_nowhere' is not on the track"),
+    ({'energy_deployment_map': {'n_t2': "BOOST"}}, r"energy_deployment_map\['n_t2'\] must be one of"),
+    ({'energy_deployment_map': ["n_t2"]}, "must be an object"),
+])
+def test_bad_strategy_names_the_file(race_assets, base, change, message):
+    config = {**base, **change}
+    config = {key: value for key, value in config.items() if value is not None}
+    with pytest.raises(ValueError, match=f"^burn.json: .*{message}"):
+        compile_strategy(config, race_assets['compiled_track'], 0.1, source="burn.json")
+
+
+def test_bad_mom_aggressiveness(race_assets, base):
+    config = {key: value for key, value in base.items() if key != 'energy_deployment_map'}
+    config['mom_aggressiveness'] = "high"
+    with pytest.raises(ValueError, match="'mom_aggressiveness' must be a number"):
+        compile_strategy(config, race_assets['compiled_track'], 0.1, source="burn.json")
@@ -0,0 +1,67 @@
+import csv
+import json
+from agent import STATUS_NAMES
+from model import DeltaVModel
+from telemetry import TelemetryRecorder
+
+SEED = 3
+
+
+class BaselineRecorder(TelemetryRecorder):
+    """Also keeps every data point as the per-step dict F1Agent used to build (rounded on the spot)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.points = []
+
+    def record(self, sim_time, lap, driver, status, tyre_life_pct, tyre_temp_c,
+               tyre_pressure_psi, soc_percent, fuel_mj, plank_wear_mm, front_wing_angle_deg):
+        self.points.append({
+            'sim_time': round(sim_time, 2),
+            'lap': lap,
+            'driver': self.drivers[driver],
+            'status': STATUS_NAMES[status],
+            'tyre_life_pct': round(tyre_life_pct, 1),
+            'tyre_temp_c': round(tyre_temp_c, 1),
+            'tyre_pressure_psi': round(tyre_pressure_psi, 1),
+            'soc_percent': round(soc_percent, 1),
+            'fuel_mj': round(fuel_mj, 2),
+            'plank_wear_mm': round(plank_wear_mm, 3),
+            'front_wing_angle_deg': front_wing_angle_deg,
+        })
+        super().record(sim_time, lap, driver, status, tyre_life_pct, tyre_temp_c,
+                       tyre_pressure_psi, soc_percent, fuel_mj, plank_wear_mm, front_wing_angle_deg)
+
+
+def race(race_assets, engine, path, baseline=False):
+    model = DeltaVModel(seed=SEED, engine=engine, assets=race_assets, telemetry_path=str(path))
+    if baseline:
+        recorder = model.telemetry
+        model.telemetry = BaselineRecorder(recorder.drivers, model.race_laps, model.time_step)
+    model.env.run(until=model.race_process)
+    return model
+
+
+def by_time(points):
+    return sorted(points, key=lambda p: (p['sim_time'], p['driver']))
+
+
+def test_export_matches_per_step_dicts(race_assets, tmp_path):
+    model = race(race_assets, "agent", tmp_path / "telemetry.json", baseline=True)
+    with open(tmp_path / "telemetry.json") as f:
+        exported = json.load(f)
+    assert len(exported) == len(model.telemetry.points)
+    assert by_time(exported) == by_time(model.telemetry.points)
+
+    model.dump_full_telemetry(str(tmp_path / "telemetry.csv"))
+    with open(tmp_path / "telemetry.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == list(exported[0])
+    assert [row['fuel_mj'] for row in rows] == [repr(p['fuel_mj']) for p in exported]
+
+
+def test_vector_engine_exports_the_same_telemetry(race_assets, tmp_path):
+    race(race_assets, "agent", tmp_path / "agent.json")
+    race(race_assets, "vector", tmp_path / "vector.json")
+    with open(tmp_path / "agent.json") as a, open(tmp_path / "vector.json") as v:
+        assert by_time(json.load(v)) == by_time(json.load(a))
@@ -0,0 +1,44 @@
+import json
+import os
+import pickle
+import pytest
+import track_data
+from benchmark import BENCHMARK_DATA as DATA
+from track_data import load_track, track_from_data
+
+
+def fresh_load(path, cache_dir):
+    track_data._loaded.clear() # as a new process would
+    return load_track(path, cache_dir=str(cache_dir))
+
+
+def test_artifact_rebuilds_the_same_track(tmp_path):
+    path = os.path.join(DATA, "track.json")
+    with open(path) as f:
+        compiled = track_from_data(json.load(f), source=path)
+    fresh_load(path, tmp_path)
+    artifacts = os.listdir(tmp_path)
+    assert len(artifacts) == 1 and artifacts[0].endswith(".npz")
+    loaded = fresh_load(path, tmp_path)
+    assert vars(loaded) == vars(compiled)
+
+
+class Boom:
+    def __reduce__(self):
+        return (pytest.fail, ("the artifact was unpickled",))
+
+
+def test_artifact_is_never_unpickled(tmp_path):
+    path = os.path.join(DATA, "track.json")
+    fresh_load(path, tmp_path)
+    artifact = tmp_path / os.listdir(tmp_path)[0]
+    artifact.write_bytes(pickle.dumps(Boom()))
+    assert fresh_load(path, tmp_path).num_edges > 0
+
+
+def test_cache_key_follows_compiled_track_fields(tmp_path, monkeypatch):
+    path = os.path.join(DATA, "track.json")
+    fresh_load(path, tmp_path)
+    monkeypatch.setattr(track_data, "_schema", ["changed"])
+    fresh_load(path, tmp_path)
+    assert len(os.listdir(tmp_path)) == 2
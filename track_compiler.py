@@ -0,0 +1,133 @@
+import numpy as np
+
+
+class CompiledTrack:
+    """
+    Flat, integer-indexed edge table compiled once from a track (a networkx
+    graph via compile_track(), or a track file via track_data.load_track()).
+
+    Nodes and edges get dense integer IDs. Per-edge attributes are plain
+    Python lists for the per-agent path and NumPy arrays for the vector
+    engine. Per-node "next edge" lookups replace successors()/get_edge_data()
+    scans on every tick (-1 means "no such edge").
+
+    `edges` is a list of (from, to, attributes) in successor order: each
+    node's edges in the order its successors were added. `start` is the edge
+    the grid lines up on, behind its end node.
+    """
+
+    def __init__(self, nodes, edges, pit_fork="n_t15_apex", pit_stall="n_pit_stall", pit_exit="n_pit_exit",
+                 start=("n_t15_apex", "n_t1_brake"), name=None):
+        self.name = name
+        self.node_names = [node for node, _ in nodes]
+        self.node_index = {node: i for i, node in enumerate(self.node_names)}
+        self.node_pos = [tuple(pos) for _, pos in nodes]
+        num_nodes = len(self.node_names)
+
+        # --- Edge table ---
+        self.edge_src = []
+        self.edge_dst = []
+        self.length = []
+        self.radius = []
+        self.x_mode_allowed = []
+        self.mom_detection = []
+        self.is_pit_entry_decision = []
+        self.is_finish_line = []
+        self.is_pit_lane = []
+        self.aero_mode = [] # what make_decision sets on the edge (X-MODE on main-line straights)
+
+        # --- Per-node successor lookups ---
+        self.first_edge = [-1] * num_nodes
+        self.main_edge = [-1] * num_nodes
+        self.pit_edge = [-1] * num_nodes
+
+        for src, dst, data in edges:
+            u = self.node_index[src]
+            e = len(self.edge_src)
+            self.edge_src.append(u)
+            self.edge_dst.append(self.node_index[dst])
+            self.length.append(data['length'])
+            self.radius.append(data.get('radius'))
+            self.x_mode_allowed.append(bool(data.get('x_mode_allowed', False)))
+            self.mom_detection.append(bool(data.get('mom_detection', False)))
+            self.is_pit_entry_decision.append(bool(data.get('is_pit_entry_decision', False)))
+            self.is_finish_line.append(bool(data.get('is_finish_line', False)))
+            self.is_pit_lane.append(bool(data.get('is_pit_lane', False)))
+            self.aero_mode.append("X-MODE" if self.radius[e] is None and not self.is_pit_lane[e] else "Z-MODE")
+
+            if self.first_edge[u] < 0:
+                self.first_edge[u] = e
+            if self.is_pit_lane[e]:
+                if self.pit_edge[u] < 0: self.pit_edge[u] = e
+            elif self.main_edge[u] < 0:
+                self.main_edge[u] = e
+
+        self.num_nodes = num_nodes
+        self.num_edges = len(self.edge_src)
+
+        # "Main-line next edge" / "pit next edge", falling back to the first
+        # successor the same way the old successor scan did
+        self.main_or_first = [m if m >= 0 else f for m, f in zip(self.main_edge, self.first_edge)]
+        self.pit_or_first = [p if p >= 0 else f for p, f in zip(self.pit_edge, self.first_edge)]
+
+        # Same summation order as iterating graph.edges(data=True)
+        self.track_length = sum(self.length)
+
+        self.pit_fork_node = self.node_index[pit_fork]
+        self.pit_stall_node = self.node_index[pit_stall]
+        self.pit_exit_node = self.node_index[pit_exit]
+        self.start_edge = self.edge_id(*start)
+        if self.start_edge < 0:
+            raise ValueError(f"{name or 'track'}: no start edge {start[0]} -> {start[1]}")
+
+    def edge_id(self, u, v):
+        """Edge ID for the (u, v) node-name pair, or -1 if there is no such edge."""
+        ui = self.node_index[u]
+        vi = self.node_index[v]
+        for e in range(self.num_edges):
+            if self.edge_src[e] == ui and self.edge_dst[e] == vi:
+                return e
+        return -1
+
+    def next_edge(self, node, wants_to_pit=False, force_track=False):
+        """
+        Edge a car at `node` drives next. At the pit fork the main line is
+        taken unless the car wants to pit (or force_track is set); every
+        other node follows its first successor.
+        """
+        if force_track:
+            return self.main_or_first[node]
+        if node == self.pit_fork_node:
+            return self.pit_or_first[node] if wants_to_pit else self.main_or_first[node]
+        return self.first_edge[node]
+
+    def as_arrays(self):
+        """NumPy views of the table for batched engines (radius is NaN on straights)."""
+        return {
+            'edge_dst': np.array(self.edge_dst, dtype=np.int64),
+            'length': np.array(self.length, dtype=float),
+            'radius': np.array([np.nan if r is None else r for r in self.radius], dtype=float),
+            'x_mode_allowed': np.array(self.x_mode_allowed, dtype=bool),
+            'mom_detection': np.array(self.mom_detection, dtype=bool),
+            'is_pit_entry_decision': np.array(self.is_pit_entry_decision, dtype=bool),
+            'is_finish_line': np.array(self.is_finish_line, dtype=bool),
+            'is_pit_lane': np.array(self.is_pit_lane, dtype=bool),
+            'first_edge': np.array(self.first_edge, dtype=np.int64),
+            'main_edge': np.array(self.main_edge, dtype=np.int64),
+            'main_or_first': np.array(self.main_or_first, dtype=np.int64),
+            'pit_or_first': np.array(self.pit_or_first, dtype=np.int64),
+            'node_pos': np.array(self.node_pos, dtype=float),
+        }
+
+
+def graph_edges(graph):
+    """(from, to, attributes) for every edge of a networkx graph, in successor order."""
+    return [(node, succ, graph.get_edge_data(node, succ)) for node in graph.nodes for succ in graph.successors(node)]
+
+
+def compile_track(graph, **layout):
+    """
+    Compiles a networkx track graph (e.g. build_bahrain_track()) into a
+    CompiledTrack. layout overrides the pit / start node names.
+    """
+    return CompiledTrack([(node, graph.nodes[node]['pos']) for node in graph.nodes], graph_edges(graph), **layout)
@@ -0,0 +1,220 @@
+import argparse
+import hashlib
+import json
+import os
+import zipfile
+import numpy as np
+from track_compiler import CompiledTrack, graph_edges
+
+# --- Track file format (JSON) ---
+# {
+#   "name": "Bahrain",
+#   "nodes": [{"id": "n_t1_brake", "pos": [x, y]}, ...],
+#   "edges": [{"from": "n_t15_apex", "to": "n_t1_brake", "length": 1000.0, "radius": null,
+#              "x_mode_allowed": true, "mom_detection": false, "is_finish_line": false,
+#              "is_pit_entry_decision": false, "is_pit_lane": false}, ...],
+#   "pit": {"fork": "n_t15_apex", "stall": "n_pit_stall", "exit": "n_pit_exit"},
+#   "start": ["n_t15_apex", "n_t1_brake"]
+# }
+# radius null = straight; missing flags are false. A node's edges are tried in
+# the order they are listed (the first is the main line unless it is pit lane).
+# The grid config references a track file with "track": "<path>".
+TRACK_FORMAT_VERSION = 1
+EDGE_FLAGS = ('x_mode_allowed', 'mom_detection', 'is_finish_line', 'is_pit_entry_decision', 'is_pit_lane')
+
+# --- Compiled artifacts ---
+# An .npz of plain arrays (no pickles) holding the validated, sorted edge
+# table; CompiledTrack is rebuilt from it. The cache key covers the track
+# file, ARTIFACT_VERSION and the field layout of CompiledTrack, so a change
+# to either invalidates old artifacts without a manual bump.
+ARTIFACT_VERSION = 2
+CACHE_DIR = ".track_cache" # next to the track file
+
+_loaded = {} # artifact key -> CompiledTrack, shared read-only by every model in the process
+_schema = []
+
+
+def track_from_data(data, source="track"):
+    """
+    Validates a track definition (the JSON above) and compiles it into a
+    CompiledTrack. Raises ValueError naming `source` for a malformed file.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"{source}: a track file must be a JSON object")
+    version = data.get('version', TRACK_FORMAT_VERSION)
+    if version != TRACK_FORMAT_VERSION:
+        raise ValueError(f"{source}: unsupported track format version {version!r}")
+    for key in ('nodes', 'edges', 'pit', 'start'):
+        if key not in data:
+            raise ValueError(f"{source}: missing required key '{key}'")
+
+    nodes = []
+    for node in data['nodes']:
+        try:
+            x, y = node['pos']
+            nodes.append((node['id'], (float(x), float(y))))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{source}: every node needs an 'id' and a 'pos' of [x, y], got {node!r}") from None
+    order = {name: i for i, (name, _) in enumerate(nodes)}
+    if len(order) != len(nodes):
+        raise ValueError(f"{source}: duplicate node ids")
+
+    edges = []
+    for edge in data['edges']:
+        for end in ('from', 'to'):
+            if edge.get(end) not in order:
+                raise ValueError(f"{source}: edge {edge.get('from')} -> {edge.get('to')} has unknown '{end}' node")
+        try:
+            length = float(edge['length'])
+            radius = edge.get('radius')
+            radius = None if radius is None else float(radius)
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{source}: edge {edge['from']} -> {edge['to']} needs a numeric 'length' "
+                             f"and a numeric or null 'radius'") from None
+        if length <= 0:
+            raise ValueError(f"{source}: edge {edge['from']} -> {edge['to']} has length {length!r}")
+        attributes = {'length': length, 'radius': radius}
+        attributes.update((flag, bool(edge.get(flag, False))) for flag in EDGE_FLAGS)
+        edges.append((edge['from'], edge['to'], attributes))
+    # Successor order: grouped by source node, listed order within a node (stable sort)
+    edges.sort(key=lambda edge: order[edge[0]])
+
+    pit, start = data['pit'], data['start']
+    layout = {}
+    for role in ('fork', 'stall', 'exit'):
+        if not isinstance(pit, dict) or pit.get(role) not in order:
+            raise ValueError(f"{source}: 'pit' must name the track's fork, stall and exit nodes")
+        layout[f"pit_{role}"] = pit[role]
+    if not isinstance(start, (list, tuple)) or len(start) != 2 or any(n not in order for n in start):
+        raise ValueError(f"{source}: 'start' must be the [from, to] node pair of the grid's edge")
+    return CompiledTrack(nodes, edges, start=tuple(start), name=data.get('name', source), **layout)
+
+
+def graph_to_data(graph, name, pit_fork="n_t15_apex", pit_stall="n_pit_stall", pit_exit="n_pit_exit",
+                  start=("n_t15_apex", "n_t1_brake")):
+    """
+    Track file contents for a networkx track graph (e.g. build_bahrain_track()),
+    which load_track() compiles into the same CompiledTrack as compile_track().
+    """
+    edges = []
+    for src, dst, attributes in graph_edges(graph):
+        edge = {'from': src, 'to': dst, 'length': attributes['length'], 'radius': attributes.get('radius')}
+        edge.update((flag, bool(attributes.get(flag, False))) for flag in EDGE_FLAGS)
+        edges.append(edge)
+    return {
+        'version': TRACK_FORMAT_VERSION,
+        'name': name,
+        'nodes': [{'id': node, 'pos': list(graph.nodes[node]['pos'])} for node in graph.nodes],
+        'edges': edges,
+        'pit': {'fork': pit_fork, 'stall': pit_stall, 'exit': pit_exit},
+        'start': list(start),
+    }
+
+
+def load_track(path, cache_dir=None):
+    """
+    The CompiledTrack for a track file. It is compiled once into an artifact
+    (CACHE_DIR next to the file, or cache_dir) keyed by the file's content,
+    so later processes, Monte Carlo workers included, load the artifact
+    instead of validating and compiling again; within a process every
+    caller shares one CompiledTrack. An unwritable cache directory only
+    disables the artifact.
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    key = hashlib.sha256(raw + schema_hash().encode()).hexdigest()[:16]
+    if key in _loaded:
+        return _loaded[key]
+    folder = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    artifact = os.path.join(folder, f"{os.path.splitext(os.path.basename(path))[0]}-{key}.npz")
+    track = _read_artifact(artifact)
+    if track is None:
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"{path}: not valid JSON ({e})") from None
+        track = track_from_data(data, source=path)
+        _write_artifact(track, artifact)
+    _loaded[key] = track
+    return track
+
+
+def schema_hash():
+    """Hash of ARTIFACT_VERSION, the stored flags and CompiledTrack's fields (of a two-node probe track)."""
+    if not _schema:
+        probe = CompiledTrack([("a", (0.0, 0.0)), ("b", (1.0, 0.0))], [("a", "b", {'length': 1.0})],
+                              pit_fork="a", pit_stall="a", pit_exit="b", start=("a", "b"))
+        layout = (ARTIFACT_VERSION, EDGE_FLAGS, sorted(vars(probe)))
+        _schema.append(hashlib.sha256(repr(layout).encode()).hexdigest()[:16])
+    return _schema[0]
+
+
+def _read_artifact(path):
+    try:
+        with np.load(path, allow_pickle=False) as f:
+            arrays = {name: f[name] for name in f.files}
+    except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+        return None # missing, damaged or not an artifact: recompile
+    try:
+        names = arrays['node_names'].tolist()
+        nodes = list(zip(names, arrays['node_pos'].tolist()))
+        flags = [arrays[flag].tolist() for flag in EDGE_FLAGS]
+        edges = []
+        for e, (src, dst, length, radius) in enumerate(zip(arrays['edge_src'].tolist(), arrays['edge_dst'].tolist(),
+                                                             arrays['length'].tolist(), arrays['radius'].tolist())):
+            attributes = {'length': length, 'radius': None if radius != radius else radius} # NaN = straight
+            attributes.update((flag, values[e]) for flag, values in zip(EDGE_FLAGS, flags))
+            edges.append((names[src], names[dst], attributes))
+        name, pit_fork, pit_stall, pit_exit, start_from, start_to = arrays['layout'].tolist()
+        return CompiledTrack(nodes, edges, pit_fork=pit_fork, pit_stall=pit_stall, pit_exit=pit_exit,
+                             start=(start_from, start_to), name=name or None)
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
+def _write_artifact(track, path):
+    names = track.node_names
+    start = track.start_edge
+    arrays = {
+        'node_names': np.array(names, dtype=str),
+        'node_pos': np.array(track.node_pos, dtype=float),
+        'edge_src': np.array(track.edge_src, dtype=np.int64),
+        'edge_dst': np.array(track.edge_dst, dtype=np.int64),
+        'length': np.array(track.length, dtype=float),
+        'radius': np.array([np.nan if r is None else r for r in track.radius], dtype=float),
+        'layout': np.array([track.name or "", names[track.pit_fork_node], names[track.pit_stall_node],
+                            names[track.pit_exit_node], names[track.edge_src[start]], names[track.edge_dst[start]]],
+                           dtype=str),
+    }
+    arrays.update((flag, np.array(getattr(track, flag), dtype=bool)) for flag in EDGE_FLAGS)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path) # atomic, so a concurrent reader never sees half a file
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# --- CLI ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delta-V track files: export the built-in track, compile tracks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="Write the built-in Bahrain track as a track file")
+    export.add_argument("out")
+    build = sub.add_parser("compile", help="Validate track files and build their cached artifacts")
+    build.add_argument("tracks", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        from track_graph import build_bahrain_track
+        with open(args.out, 'w') as f:
+            json.dump(graph_to_data(build_bahrain_track(), "Bahrain"), f, indent=2)
+        print(f"--- Track written to {args.out} ---")
+    else:
+        for path in args.tracks:
+            track = load_track(path)
+            print(f"--- {track.name}: {track.num_nodes} nodes, {track.num_edges} edges, "
+                  f"{track.track_length:.0f} m ({path}) ---")
@@ -0,0 +1,496 @@
+import numpy as np
+from agent import DRY_TYRES, STATUS_NAMES
+from running_order import rank_grid
+from lap_stats import sector_starts
+from strategy import GRIP_OK, GRIP_WET_WRONG_TYRE, GRIP_DRY_WRONG_TYRE
+from race_events import LAP_COMPLETED, MOM_GRANTED, PIT_ENTRY, PIT_EXIT, TYRE_CLIFF, RACE_END
+
+# --- Integer codes for the string states used by F1Agent (see agent.STATUS_NAMES) ---
+RACING, PITTING, FINISHED, OUT_OF_ENERGY, CRASHED = range(5)
+
+# Fixed codes; a grid with other compounds gets its own codes after these (see _load_state)
+COMPOUND_NAMES = ("soft", "medium", "hard", "intermediate")
+SOFT, MEDIUM, HARD, INTERMEDIATE = range(4)
+
+
+
+class VectorEngine:
+    """
+    Struct-of-arrays physics engine for the whole grid.
+
+    Holds every car's state in NumPy arrays and advances all cars with
+    batched array operations per tick. It reproduces F1Agent.step() exactly:
+    same shuffle draws, same float arithmetic and the same once-per-tick
+    running order, so a given seed gives the same race as the per-agent path.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.time_step = model.time_step
+        self.events = model.events # race event bus (emit loops only run when a sink is attached)
+        # Cars are indexed by telemetry_id (grid order); _order holds the
+        # current step order, which differs after a checkpoint restore
+        self.agents = sorted(model.f1_agents, key=lambda a: a.telemetry_id)
+        self.n = len(self.agents)
+        self._order = np.array([a.telemetry_id for a in model.f1_agents], dtype=np.int64)
+        self._rank = np.empty(self.n, dtype=np.int64)
+        self._arange = np.arange(self.n)
+        self.agents_stale = False # the agents lag the arrays until sync_agents()
+
+        self._load_track(model.compiled_track)
+        self._load_params()
+        self._load_state()
+
+    # --- Setup ---
+    def _load_track(self, track):
+        """Pulls the model's compiled edge table in as NumPy arrays."""
+        arrays = track.as_arrays()
+        self.node_names = track.node_names
+        self.node_index = track.node_index
+        self.num_edges = track.num_edges
+        self.edge_dst = arrays['edge_dst']
+        self.edge_length = arrays['length']
+        self.edge_radius = arrays['radius']
+        self.edge_x_mode = arrays['x_mode_allowed']
+        self.edge_mom_detection = arrays['mom_detection']
+        self.edge_pit_decision = arrays['is_pit_entry_decision']
+        self.edge_finish = arrays['is_finish_line']
+        self.edge_pit_lane = arrays['is_pit_lane']
+        self.first_edge = arrays['first_edge']
+        self.main_edge = arrays['main_edge']
+        self.main_or_first = arrays['main_or_first']
+        self.pit_or_first = arrays['pit_or_first']
+
+        self.sector_start = np.array(sector_starts(track), dtype=np.int64)
+        self.pit_fork_node = track.pit_fork_node
+        self.stall_node = track.pit_stall_node
+        self.pit_exit_node = track.pit_exit_node
+
+    def _load_params(self):
+        """Copies each car's compiled (already noised) strategy into per-car arrays."""
+        def column(attr):
+            return np.array([getattr(a.params, attr) for a in self.agents], dtype=float)
+
+        self.battery_capacity = np.array([a.battery_capacity_mj for a in self.agents], dtype=float)
+        self.vsc_speed = column('vsc_speed')
+        self.mom_boost_ms = column('mom_boost_ms')
+        self.pit_time_loss = column('pit_time_loss_s')
+        self.c1_power = column('c1_power')
+        self.c2_x_drag = column('c2_x_drag')
+        self.c2_z_drag = column('c2_z_drag')
+        self.mom_energy_cost = column('mom_energy_cost')
+        self.battery_limit = column('battery_limit_mj')
+        self.ice_limit = column('ice_limit_mj')
+        self.regen_per_second = column('regen_per_second')
+        self.wear_soft = column('wear_rate_soft')
+        self.wear_medium = column('wear_rate_medium')
+        self.wear_hard = column('wear_rate_hard')
+        self.cliff_threshold = column('cliff_threshold')
+        self.cliff_grip = column('cliff_grip')
+        self.temp_gain_corners = column('temp_gain_corners')
+        self.temp_loss_straights = column('temp_loss_straights')
+        self.temp_gain_mom = column('temp_gain_mom')
+        self.plank_wear_rate = column('plank_wear_rate')
+        self.plank_wear_factor = np.array([a.plank_wear_rate_factor for a in self.agents], dtype=float)
+        self.tyre_pressure_factor = np.array([a.tyre_pressure_factor for a in self.agents], dtype=float)
+        self.mom_detection_gap = column('mom_detection_gap')
+        self.mom_extra_energy = column('mom_extra_energy_mj')
+
+        # --- MOM brains ("Pro++" energy map or "Pro+" aggressiveness), resolved per node ---
+        self.deploy = np.array([a.params.deploy_at for a in self.agents], dtype=bool).reshape(self.n, -1)
+
+        self._build_decision_speed_table()
+
+    def _build_decision_speed_table(self):
+        """
+        Every car's make_decision target speed without MOM for each (cliff,
+        weather grip state, edge), gathered from the compiled strategies'
+        shared speed_rows (strategy.decision_rows), so both engines read the
+        same Python floats.
+        """
+        rows = [a.params.speed_rows for a in self.agents]
+        self.decision_speed = np.array(rows, dtype=float).reshape(-1)
+
+    def _load_state(self):
+        agents = self.agents
+        self.node = np.array([a.position[0] for a in agents], dtype=np.int64)
+        self.progress = np.array([a.position[1] for a in agents], dtype=float)
+        self.velocity = np.array([a.velocity for a in agents], dtype=float)
+        self.status = np.array([STATUS_NAMES.index(a.status) for a in agents], dtype=np.int64)
+        self.laps = np.array([a.laps_completed for a in agents], dtype=np.int64)
+        self.total_distance = np.array([a.total_distance_traveled for a in agents], dtype=float)
+        self.race_time = np.array([a.total_race_time_s for a in agents], dtype=float)
+        self.soc = np.array([a.battery_soc for a in agents], dtype=float)
+        self.fuel = np.array([a.fuel_energy_remaining for a in agents], dtype=float)
+        self.recovered = np.array([a.energy_recovered_this_lap_mj for a in agents], dtype=float)
+        self.x_mode = np.array([a.aero_mode == "X-MODE" for a in agents])
+        self.mom_available = np.array([a.mom_available for a in agents])
+        self.mom_active = np.array([a.mom_active for a in agents])
+        self.compound_names = list(COMPOUND_NAMES)
+        for a in agents:
+            if a.tyre_compound not in self.compound_names:
+                self.compound_names.append(a.tyre_compound)
+        self.compound = np.array([self.compound_names.index(a.tyre_compound) for a in agents], dtype=np.int64)
+        self._dry_compound = np.array([name in DRY_TYRES for name in self.compound_names])
+        self.tyre_life = np.array([a.tyre_life_remaining for a in agents], dtype=float)
+        self.on_cliff = np.array([a.on_cliff for a in agents])
+        self.tyre_temp = np.array([a.tyre_temp for a in agents], dtype=float)
+        self.wants_to_pit = np.array([a.wants_to_pit for a in agents])
+        self.time_in_pit_stall = np.array([a.time_in_pit_stall for a in agents], dtype=float)
+        self.pit_stops = np.array([a.pit_stops_made for a in agents], dtype=np.int64)
+        self.time_on_softs = np.array([a.time_on_softs_s for a in agents], dtype=float)
+        self.time_on_mediums = np.array([a.time_on_mediums_s for a in agents], dtype=float)
+        self.time_on_hards = np.array([a.time_on_hards_s for a in agents], dtype=float)
+        self.mom_uses = np.array([a.mom_uses_count for a in agents], dtype=np.int64)
+        self.plank_wear = np.array([a.plank_wear for a in agents], dtype=float)
+        self.telemetry_id = np.array([a.telemetry_id for a in agents], dtype=np.int64)
+
+    # --- Main tick ---
+    def step(self):
+        """Advances every car by one time_step (perceive -> decide -> update)."""
+        model = self.model
+        _, self.car_ahead, self.gap_ahead = rank_grid(self.total_distance, model.track_length)
+        self._order = self._order[model.rng.shuffle.permutation(self.n)]
+        self._rank[self._order] = self._arange
+
+        is_wet = np.full(self.n, model.weather_state == "WET")
+        is_on_dry_tyres = self._dry_compound[self.compound]
+        wrong_tyre = (is_on_dry_tyres == is_wet)
+
+        self._perceive(wrong_tyre)
+        next_edge = self._decide(is_wet, is_on_dry_tyres, model.vsc_active)
+        self._update(next_edge, wrong_tyre, is_wet)
+        self.agents_stale = True
+
+    def _perceive(self, wrong_tyre):
+        """MOM detection and pit decisions for the whole grid."""
+        node = self.node
+        active = (self.status != FINISHED) & (self.first_edge[node] >= 0)
+
+        # --- MOM detection (car-ahead ranked once at the start of the tick) ---
+        main_edge = self.main_edge[node]
+        detected = (active & (main_edge >= 0) & self.edge_mom_detection[main_edge]
+                    & (self.car_ahead >= 0) & (self.gap_ahead < self.mom_detection_gap))
+        granted = np.flatnonzero(detected & ~self.mom_available)
+        if granted.size:
+            if self.events.active:
+                now = self.model.env.now
+                for i in self._in_rank_order(granted):
+                    self.events.emit(MOM_GRANTED, now, self.agents[i].unique_id, self.laps[i].item() + 1,
+                                     gap_m=self.gap_ahead[i].item())
+            soc = self.soc[granted] + (self.mom_extra_energy[granted] / self.battery_capacity[granted])
+            self.soc[granted] = np.minimum(soc, 1.0)
+        self.mom_available |= detected
+
+        # --- Pit decision ---
+        decision_edge = self.main_or_first[node]
+        at_decision = active & self.edge_pit_decision[decision_edge]
+        if at_decision.any():
+            tyre_worn_out = self.tyre_life <= self.cliff_threshold
+            should_pit = tyre_worn_out | wrong_tyre
+            can_pit = self.laps > 0
+            pits = at_decision & can_pit & should_pit & (self.status == RACING)
+            entering = pits & ~self.wants_to_pit
+            self.wants_to_pit[at_decision] = pits[at_decision]
+            if self.events.active:
+                now = self.model.env.now
+                for i in self._in_rank_order(np.flatnonzero(entering)):
+                    self.events.emit(PIT_ENTRY, now, self.agents[i].unique_id, self.laps[i].item() + 1,
+                                     reason="wrong_tyres" if wrong_tyre[i] else "tyre_wear",
+                                     tyre_life=self.tyre_life[i].item(), weather=self.model.weather_state)
+
+    def _next_edge(self):
+        node = self.node
+        at_fork = node == self.pit_fork_node
+        return np.where(at_fork,
+                        np.where(self.wants_to_pit, self.pit_or_first[node], self.main_or_first[node]),
+                        self.first_edge[node])
+
+    def _decide(self, is_wet, is_on_dry_tyres, vsc_active):
+        """
+        Batched make_decision: velocity, aero and path. Returns each car's
+        next edge. is_wet is per car (one weather per race).
+        """
+        n = self.n
+        status = self.status
+        next_edge = self._next_edge()
+        stopped = (status == OUT_OF_ENERGY) | (status == CRASHED) | (status == FINISHED)
+
+        if vsc_active:
+            self.velocity = np.where(stopped, 0.0, self.vsc_speed)
+            self.x_mode = np.zeros(n, dtype=bool)
+            self.mom_active = np.zeros(n, dtype=bool)
+            return next_edge
+
+        node = self.node
+        held = stopped | (node == self.stall_node)
+        no_next = ~held & (next_edge < 0)
+        status[no_next] = FINISHED
+        driving = ~held & ~no_next
+        status[driving & self.wants_to_pit & (node == self.pit_fork_node)] = PITTING
+
+        edge = np.where(next_edge >= 0, next_edge, 0)
+        pit_lane = self.edge_pit_lane[edge]
+        straight = np.isnan(self.edge_radius[edge])
+
+        grip_state = np.where(is_on_dry_tyres,
+                              np.where(is_wet, GRIP_WET_WRONG_TYRE, GRIP_OK),
+                              np.where(is_wet, GRIP_OK, GRIP_DRY_WRONG_TYRE))
+        table_index = ((self._arange * 2 + self.on_cliff) * 3 + grip_state) * self.num_edges + edge
+        base_velocity = self.decision_speed[table_index]
+
+        # --- "Universal Brain" MOM logic ---
+        mom_allowed = self.mom_available & self.edge_x_mode[edge] & ~pit_lane
+        activated = driving & mom_allowed & self.deploy[self._arange, node]
+
+        velocity = np.where(activated, self.mom_boost_ms, base_velocity)
+        velocity[~driving] = 0.0
+        self.velocity = velocity
+        self.x_mode = np.where(held, False, np.where(no_next, self.x_mode, ~pit_lane & straight))
+        self.mom_active = activated
+        self.mom_uses += activated
+        return next_edge
+
+    def _update(self, next_edge, wrong_tyre, is_wet):
+        """Batched update_physics: pit service, movement, laps, energy, tyres."""
+        dt = self.time_step
+        status = self.status
+        node = self.node
+        velocity = self.velocity
+
+        # --- PIT STOP SERVICE LOGIC ---
+        service = (status == PITTING) & (node == self.stall_node) & (velocity == 0)
+        if service.any():
+            s = np.flatnonzero(service)
+            self.time_in_pit_stall[s] += dt
+            done = s[self.time_in_pit_stall[s] >= self.pit_time_loss[s]]
+            self.compound[done] = np.where(is_wet[done], INTERMEDIATE, MEDIUM)
+            if self.events.active:
+                now = self.model.env.now
+                for i in self._in_rank_order(done):
+                    self.events.emit(PIT_EXIT, now, self.agents[i].unique_id, self.laps[i].item() + 1,
+                                     compound=self.compound_names[self.compound[i]])
+            self.tyre_life[done] = 1.0
+            self.on_cliff[done] = False
+            self.tyre_temp[done] = 95.0
+            self.pit_stops[done] += 1
+            self.time_in_pit_stall[done] = 0.0
+            self.wants_to_pit[done] = False
+            status[done] = RACING
+            self.node[done] = self.pit_exit_node
+            self.progress[done] = 0.0
+            self.race_time[s] += dt
+
+        idle = ~service & (velocity == 0)
+        idle_clock = idle & ((status == RACING) | (status == CRASHED) | (status == OUT_OF_ENERGY))
+        self.race_time[idle_clock] += dt
+
+        moving = ~service & (velocity != 0)
+        lost = moving & (next_edge < 0)
+        status[lost] = FINISHED
+        velocity[lost] = 0.0
+        m = np.flatnonzero(moving & (next_edge >= 0))
+        if m.size == 0:
+            return
+
+        # --- 1-3. Movement, position and laps ---
+        edge = next_edge[m]
+        distance_to_move = velocity[m] * dt
+        self.total_distance[m] += distance_to_move
+        edge_length = self.edge_length[edge]
+        progress_to_add = np.divide(distance_to_move, edge_length,
+                                    out=np.ones_like(distance_to_move), where=edge_length > 0)
+        progress = self.progress[m] + progress_to_add
+        crossed = progress >= 1.0
+        self.progress[m] = np.where(crossed, progress - 1.0, progress)
+        self.node[m] = np.where(crossed, self.edge_dst[edge], node[m])
+        self._split_sectors(m[crossed])
+
+        finishers = m[crossed & self.edge_finish[edge]]
+        if finishers.size:
+            self._complete_laps(finishers)
+
+        # --- 4. ENERGY MODEL (Battery-First) ---
+        x_mode = self.x_mode[m]
+        mom_active = self.mom_active[m]
+        v = velocity[m]
+        capacity = self.battery_capacity[m]
+        drag_cost = np.where(x_mode, self.c2_x_drag[m], self.c2_z_drag[m])
+        total_energy_cost = (self.c1_power[m] * (v * v) + drag_cost) * dt
+        total_energy_cost = np.where(mom_active, total_energy_cost + self.mom_energy_cost[m], total_energy_cost)
+
+        battery_drain = np.minimum(total_energy_cost, self.battery_limit[m])
+        soc_drain = battery_drain / capacity
+        soc = self.soc[m]
+        battery_covers = soc > soc_drain
+        energy_cost_remaining = np.where(battery_covers, total_energy_cost - battery_drain,
+                                         total_energy_cost - soc * capacity)
+        soc = np.where(battery_covers, soc - soc_drain, 0.0)
+
+        fuel_drain = np.minimum(energy_cost_remaining, self.ice_limit[m])
+        fuel = self.fuel[m]
+        has_fuel = fuel > fuel_drain
+        self.fuel[m] = np.where(has_fuel, fuel - fuel_drain, 0.0)
+        out_of_energy = m[~has_fuel]
+        status[out_of_energy] = OUT_OF_ENERGY
+        velocity[out_of_energy] = 0.0
+
+        # --- C. REGENERATION ---
+        energy_gained = self.regen_per_second[m] * dt
+        regen = ~x_mode & (soc < 1.0) & (energy_gained > 0)
+        soc = np.where(regen, np.minimum(1.0, soc + energy_gained / capacity), soc)
+        self.soc[m] = soc
+        self.recovered[m[regen]] += energy_gained[regen]
+
+        # --- 5. TYRE WEAR MODEL ---
+        racing = status[m] == RACING
+        r = m[racing]
+        if r.size:
+            compound = self.compound[r]
+            soft = compound == SOFT
+            hard = compound == HARD
+            medium = ~soft & ~hard
+            self.time_on_softs[r[soft]] += dt
+            self.time_on_hards[r[hard]] += dt
+            self.time_on_mediums[r[medium]] += dt
+            wear_rate = np.where(soft, self.wear_soft[r], np.where(hard, self.wear_hard[r], self.wear_medium[r]))
+
+            z_mode = ~self.x_mode[r]
+            tyre_wear = wear_rate * dt
+            tyre_wear = np.where(z_mode, tyre_wear * 1.5, tyre_wear)
+            tyre_wear = np.where(self.mom_active[r], tyre_wear * 2.0, tyre_wear)
+            tyre_wear = np.where(wrong_tyre[r], tyre_wear * 5.0, tyre_wear)
+            self.tyre_life[r] -= tyre_wear
+
+            cliff = r[~self.on_cliff[r] & (self.tyre_life[r] <= self.cliff_threshold[r])]
+            self.on_cliff[cliff] = True
+            if self.events.active:
+                now = self.model.env.now
+                for i in self._in_rank_order(cliff):
+                    self.events.emit(TYRE_CLIFF, now, self.agents[i].unique_id, self.laps[i].item() + 1,
+                                     tyre_life=self.tyre_life[i].item())
+
+            crashed = r[self.tyre_life[r] <= 0]
+            self.tyre_life[crashed] = 0
+            status[crashed] = CRASHED
+            velocity[crashed] = 0.0
+
+            temp_gain = np.where(z_mode, self.temp_gain_corners[r], 0.0)
+            temp_loss = np.where(z_mode, 0.0, self.temp_loss_straights[r])
+            temp_gain = np.where(self.mom_active[r], temp_gain + self.temp_gain_mom[r], temp_gain)
+            self.tyre_temp[r] = np.clip(self.tyre_temp[r] + (temp_gain - temp_loss) * dt, 95.0, 110.0)
+
+        # --- 6. Log Total Time ---
+        logged = m[status[m] != FINISHED]
+        self.race_time[logged] += dt
+        self._record_telemetry(logged)
+
+    def _complete_laps(self, finishers):
+        """Lap bookkeeping for cars that crossed the finish line this tick (step order)."""
+        model = self.model
+        status = self.status
+        for i in self._in_rank_order(finishers):
+            agent = self.agents[i]
+            current_lap_time = agent.lap_stats.complete_lap(self.race_time[i].item(), model.lap_board)
+            agent.lap_times.append(current_lap_time)
+            self.laps[i] += 1
+            self.mom_available[i] = False
+            self.recovered[i] = 0.0
+            laps = self.laps[i].item()
+            self.events.emit(LAP_COMPLETED, model.env.now, agent.unique_id, laps, lap_time=current_lap_time)
+            if laps >= model.race_laps and not model.race_over:
+                self.events.emit(RACE_END, model.env.now, agent.unique_id, laps)
+                model.race_over = True
+                status[i] = FINISHED
+
+    def _split_sectors(self, arrived):
+        """Sector splits for cars that reached a sector start node this tick."""
+        sector = self.sector_start[self.node[arrived]]
+        for i, k in zip(arrived[sector > 0].tolist(), sector[sector > 0].tolist()):
+            self.agents[i].lap_stats.split(k, self.race_time[i].item())
+
+    def _record_telemetry(self, cars):
+        """Same data points as F1Agent.record_telemetry_step, for a batch of cars."""
+        if cars.size == 0:
+            return
+        dt = self.time_step
+        x_mode = self.x_mode[cars]
+        plank = cars[x_mode]
+        self.plank_wear[plank] += self.plank_wear_rate[plank] * dt * self.plank_wear_factor[plank]
+
+        recorder = self.model.telemetry
+        if recorder is None:
+            return
+        tyre_temp = self.tyre_temp[cars]
+        recorder.record_batch(
+            sim_time=self.model.env.now,
+            lap=self.laps[cars] + 1,
+            driver=self.telemetry_id[cars],
+            status=self.status[cars],
+            tyre_life_pct=self.tyre_life[cars] * 100,
+            tyre_temp_c=tyre_temp,
+            tyre_pressure_psi=(28.0 + (tyre_temp - 95.0) * 0.2) * self.tyre_pressure_factor[cars],
+            soc_percent=self.soc[cars] * 100,
+            fuel_mj=self.fuel[cars],
+            plank_wear_mm=self.plank_wear[cars],
+            front_wing_angle_deg=np.where(x_mode, 5.0, 12.0),
+        )
+
+    def _in_rank_order(self, cars):
+        """Sorts car indices into this tick's shuffled step order."""
+        if len(cars) > 1:
+            return cars[np.argsort(self._rank[cars])]
+        return cars
+
+    # --- Agent view ---
+    def sync_agents(self):
+        """
+        Writes the array state back onto the F1Agent objects (and their
+        shuffled order) so get_simulation_data and post-race code see it.
+        Between calls the agents keep the values of the last sync; it is a
+        no-op when no tick has run since.
+        """
+        if not self.agents_stale:
+            return
+        self.agents_stale = False
+        self.model.f1_agents[:] = [self.agents[i] for i in self._order.tolist()]
+        columns = zip(
+            self.agents, self.node.tolist(), self.progress.tolist(), self.velocity.tolist(),
+            self.status.tolist(), self.laps.tolist(), self.total_distance.tolist(),
+            self.race_time.tolist(), self.soc.tolist(), self.fuel.tolist(),
+            self.recovered.tolist(), self.x_mode.tolist(), self.mom_available.tolist(),
+            self.mom_active.tolist(), self.compound.tolist(), self.tyre_life.tolist(),
+            self.on_cliff.tolist(), self.cliff_grip.tolist(), self.tyre_temp.tolist(),
+            self.wants_to_pit.tolist(), self.time_in_pit_stall.tolist(), self.pit_stops.tolist(),
+            self.time_on_softs.tolist(), self.time_on_mediums.tolist(), self.time_on_hards.tolist(),
+            self.mom_uses.tolist(), self.plank_wear.tolist(),
+        )
+        for (a, node, progress, velocity, status, laps, distance, race_time, soc, fuel,
+             recovered, x_mode, mom_available, mom_active, compound, tyre_life, on_cliff,
+             cliff_grip, tyre_temp, wants_to_pit, stall_time, pit_stops, softs, mediums,
+             hards, mom_uses, plank_wear) in columns:
+            a.position = (node, progress)
+            a.velocity = velocity
+            a.status = STATUS_NAMES[status]
+            a.laps_completed = laps
+            a.total_distance_traveled = distance
+            a.total_race_time_s = race_time
+            a.battery_soc = soc
+            a.fuel_energy_remaining = fuel
+            a.energy_recovered_this_lap_mj = recovered
+            a.aero_mode = "X-MODE" if x_mode else "Z-MODE"
+            a.mom_available = mom_available
+            a.mom_active = mom_active
+            a.tyre_compound = self.compound_names[compound]
+            a.tyre_life_remaining = tyre_life
+            a.on_cliff = on_cliff
+            a.tyre_grip_modifier = cliff_grip if on_cliff else 1.0
+            a.tyre_temp = tyre_temp
+            a.wants_to_pit = wants_to_pit
+            a.time_in_pit_stall = stall_time
+            a.pit_stops_made = pit_stops
+            a.time_on_softs_s = softs
+            a.time_on_mediums_s = mediums
+            a.time_on_hards_s = hards
+            a.mom_uses_count = mom_uses
+            a.plank_wear = plank_wear